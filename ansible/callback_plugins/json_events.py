@@ -0,0 +1,84 @@
+# ansible/callback_plugins/json_events.py
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+    name: json_events
+    type: stdout
+    short_description: One JSON object per line for every play/task/host event
+    description:
+        - Streams playbook events to stdout as JSON lines (one event per line, flushed
+          immediately) so the console runner (fastapi/app/ansible_runner.py) can read
+          typed per-host results instead of scraping human-readable output.
+        - Result events carry the host, play, task, action and the task's C(register)
+          name, so a multi-host run can be split per host without any other state.
+"""
+
+import json
+import sys
+
+from ansible.parsing.ajson import AnsibleJSONEncoder
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "stdout"
+    CALLBACK_NAME = "json_events"
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self._play = None
+        self._task = None
+
+    def _emit(self, event):
+        sys.stdout.write(json.dumps(event, cls=AnsibleJSONEncoder) + "\n")
+        sys.stdout.flush()
+
+    def _result_event(self, status, result):
+        task = result._task
+        data = dict(result._result)
+        self._clean_results(data, task.action)
+        data = dict((k, v) for k, v in data.items() if not k.startswith("_ansible"))
+        self._emit(
+            {
+                "event": "result",
+                "status": status,
+                "host": result._host.get_name(),
+                "play": self._play,
+                "task": task.get_name().strip(),
+                "action": task.action,
+                "register": task.register,
+                "result": data,
+            }
+        )
+
+    def v2_playbook_on_play_start(self, play):
+        self._play = play.get_name().strip()
+        self._emit({"event": "play_start", "play": self._play})
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._task = task.get_name().strip()
+        self._emit({"event": "task_start", "play": self._play, "task": self._task})
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.v2_playbook_on_task_start(task, False)
+
+    def v2_runner_on_ok(self, result):
+        self._result_event("changed" if result._result.get("changed") else "ok", result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._result_event("ignored" if ignore_errors else "failed", result)
+
+    def v2_runner_on_unreachable(self, result):
+        self._result_event("unreachable", result)
+
+    def v2_runner_on_skipped(self, result):
+        self._result_event("skipped", result)
+
+    def v2_playbook_on_stats(self, stats):
+        hosts = dict((h, stats.summarize(h)) for h in sorted(stats.processed.keys()))
+        self._emit({"event": "stats", "hosts": hosts})
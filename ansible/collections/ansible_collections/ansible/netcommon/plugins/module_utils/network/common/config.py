@@ -16,6 +16,8 @@ __metaclass__ = type
 import hashlib
 import re
 
+from sys import intern
+
 from ansible.module_utils.common.text.converters import to_bytes, to_native
 from ansible.module_utils.six.moves import zip
 
@@ -38,11 +40,41 @@ except AttributeError:
 
 
 class ConfigLine(object):
+    """One line of a NetworkConfig, in the tree of its parents and children.
+
+    Lines only point at their parent; _parents (the ancestors, outermost
+    first) is worked out from that chain, and the _children list is only
+    allocated once asked for, so leaves don't carry an empty one. line and
+    the ancestor chain are cached along with the parent's line / chain they
+    were built from, and rebuilt when that changes (an ancestor moved
+    elsewhere); text is not expected to change once the line is created.
+    path is built on every call.
+    """
+
+    __slots__ = (
+        "text",
+        "_raw",
+        "_child_list",
+        "_parent",
+        "_ancestors",
+        "_line",
+        "_line_base",
+        "_chain",
+        "_chain_base",
+    )
+
     def __init__(self, raw):
         self.text = str(raw).strip()
-        self.raw = raw
-        self._children = list()
-        self._parents = list()
+        self._raw = raw
+        self._child_list = None
+        self._parent = None
+        # set only when _parents was assigned a list that isn't the chain
+        # of its last element
+        self._ancestors = None
+        self._line = None
+        self._line_base = None
+        self._chain = None
+        self._chain_base = None
 
     def __str__(self):
         return self.raw
@@ -59,11 +91,68 @@ class ConfigLine(object):
                 return item
         raise KeyError(key)
 
+    @property
+    def _children(self):
+        if self._child_list is None:
+            self._child_list = list()
+        return self._child_list
+
+    @_children.setter
+    def _children(self, children):
+        self._child_list = children
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @raw.setter
+    def raw(self, raw):
+        self._raw = raw
+
+    def _ancestor_chain(self):
+        # _parents as a tuple, cached like line
+        if self._ancestors is not None:
+            return self._ancestors
+        parent = self._parent
+        if parent is None:
+            return ()
+        base = parent._ancestor_chain()
+        if self._chain is None or self._chain_base is not base or self._chain[-1] is not parent:
+            self._chain = base + (parent,)
+            self._chain_base = base
+        return self._chain
+
+    @property
+    def _parents(self):
+        return list(self._ancestor_chain())
+
+    @_parents.setter
+    def _parents(self, parents):
+        parents = list(parents)
+        self._parent = parents[-1] if parents else None
+        self._ancestors = None
+        if parents:
+            chain = parents[-1]._ancestor_chain()
+            if len(chain) != len(parents) - 1 or any(a is not b for a, b in zip(chain, parents)):
+                self._ancestors = tuple(parents)
+        self._line = None
+        self._chain = None
+
     @property
     def line(self):
-        line = self.parents
-        line.append(self.text)
-        return " ".join(line)
+        if self._ancestors is not None:
+            if self._line is None:
+                line = _obj_to_text(self._ancestors)
+                line.append(self.text)
+                self._line = " ".join(line)
+            return self._line
+        if self._parent is None:
+            return self.text
+        base = self._parent.line
+        if self._line is None or self._line_base is not base:
+            self._line = base + " " + self.text
+            self._line_base = base
+        return self._line
 
     @property
     def children(self):
@@ -80,16 +169,16 @@ class ConfigLine(object):
     @property
     def path(self):
         config = _obj_to_raw(self._parents)
-        config.append(self.raw)
+        config.append(self._raw)
         return "\n".join(config)
 
     @property
     def has_children(self):
-        return len(self._children) > 0
+        return bool(self._child_list)
 
     @property
     def has_parents(self):
-        return len(self._parents) > 0
+        return self._parent is not None
 
     def add_child(self, obj):
         if not isinstance(obj, ConfigLine):
@@ -106,6 +195,26 @@ def ignore_line(text, tokens=None):
             return True
 
 
+class _LineKeys(object):
+    """ConfigLine.line of each object, interned and worked out once.
+
+    Two ConfigLines are equal exactly when their keys are, so membership
+    tests against a list of them (each one rebuilding both lines) become
+    set lookups. Only valid while the objects aren't modified, i.e. for
+    the duration of one diff / dump.
+    """
+
+    def __init__(self):
+        self._keys = {}
+
+    def __call__(self, obj):
+        found = self._keys.get(id(obj))
+        if found is None:
+            # keep obj referenced so its id isn't reused meanwhile
+            found = self._keys[id(obj)] = (obj, intern(obj.line))
+        return found[1]
+
+
 def _obj_to_text(x):
     return [o.text for o in x]
 
@@ -116,12 +225,16 @@ def _obj_to_raw(x):
 
 def _obj_to_block(objects, visited=None):
     items = list()
+    keys = _LineKeys()
+    seen = set()
     for o in objects:
-        if o not in items:
+        if keys(o) not in seen:
             items.append(o)
+            seen.add(keys(o))
             for child in o._children:
-                if child not in items:
+                if keys(child) not in seen:
                     items.append(child)
+                    seen.add(keys(child))
     return _obj_to_raw(items)
 
 
@@ -243,7 +356,10 @@ class NetworkConfig(object):
                 curlevel = len(indents) - 1
                 parent_level = curlevel - 1
 
-                cfg._parents = ancestors[:curlevel]
+                # i.e. _parents = ancestors[:curlevel], which is always the
+                # chain of its last element
+                depth = min(curlevel, len(ancestors))
+                cfg._parent = ancestors[depth - 1] if depth else None
 
                 if curlevel > len(ancestors):
                     config.append(cfg)
@@ -280,17 +396,24 @@ class NetworkConfig(object):
     def _expand_block(self, configobj, S=None):
         if S is None:
             S = list()
+        keys = _LineKeys()
+        self._expand_keyed(configobj, S, set(keys(o) for o in S), keys)
+        return S
+
+    def _expand_keyed(self, configobj, S, seen, keys):
         S.append(configobj)
+        seen.add(keys(configobj))
         for child in configobj._children:
-            if child in S:
+            if keys(child) in seen:
                 continue
-            self._expand_block(child, S)
-        return S
+            self._expand_keyed(child, S, seen, keys)
 
     def _diff_line(self, other):
+        keys = _LineKeys()
+        others = set(keys(o) for o in other)
         updates = list()
         for item in self.items:
-            if item not in other:
+            if keys(item) not in others:
                 updates.append(item)
         return updates
 
@@ -347,15 +470,20 @@ class NetworkConfig(object):
         meth = getattr(self, "_diff_%s" % match)
         updates = meth(other)
 
+        keys = _LineKeys()
+
         if replace == "block":
             parents = list()
+            seen = set()
             for item in updates:
                 if not item.has_parents:
                     parents.append(item)
+                    seen.add(keys(item))
                 else:
-                    for p in item._parents:
-                        if p not in parents:
+                    for p in item._ancestor_chain():
+                        if keys(p) not in seen:
                             parents.append(p)
+                            seen.add(keys(p))
 
             updates = list()
             for item in parents:
@@ -372,19 +500,19 @@ class NetworkConfig(object):
                 # to be added later on
                 if (
                     all([curr_elem.has_parents, last_elem.has_parents])
-                    and curr_elem.parents[0] != last_elem.parents[0]
+                    and curr_elem._ancestor_chain()[0].text != last_elem._ancestor_chain()[0].text
                 ):
                     add_parents = True
                 # check if parent of current line is already added, if added don't
                 # add again
-                if last_elem.has_children and last_elem.children[0] != curr_elem.text:
+                if last_elem.has_children and last_elem._children[0].text != curr_elem.text:
                     add_parents = True
-            for p in curr_elem._parents:
-                if p.line not in visited or add_parents:
-                    visited.add(p.line)
+            for p in curr_elem._ancestor_chain():
+                if keys(p) not in visited or add_parents:
+                    visited.add(keys(p))
                     expanded.append(p)
             expanded.append(curr_elem)
-            visited.add(curr_elem.line)
+            visited.add(keys(curr_elem))
 
         return expanded
 
@@ -395,6 +523,8 @@ class NetworkConfig(object):
 
         # global config command
         if not parents:
+            keys = _LineKeys()
+            present = set(keys(item) for item in self.items)
             for line in lines:
                 # handle ignore lines
                 if ignore_line(line, self.comment_tokens):
@@ -402,8 +532,9 @@ class NetworkConfig(object):
 
                 item = ConfigLine(line)
                 item.raw = line
-                if item not in self.items:
+                if keys(item) not in present:
                     self.items.append(item)
+                    present.add(keys(item))
 
         else:
             for index, p in enumerate(parents):
@@ -123,9 +123,7 @@ class ResourceModule(RmEngineBase):  # pylint: disable=R0902
         if have is None:
             have = self.have
         for parser in to_list(parsers):
-            compval = self._tmplt.get_parser(parser).get("compval")
-            if not compval:
-                compval = parser
+            compval = self._tmplt.compval_keys(parser)
             inw = get_from_dict(want, compval)
             inh = get_from_dict(have, compval)
 
@@ -40,8 +40,9 @@ except ImportError:
 
 string_types = (str,)
 try:
-    from jinja2 import Environment, StrictUndefined
+    from jinja2 import Environment, StrictUndefined, Undefined
     from jinja2.exceptions import UndefinedError
+    from jinja2.utils import LRUCache
 
     HAS_JINJA2 = True
 except ImportError:
@@ -643,8 +644,11 @@ def search_obj_in_list(name, lst, key="name"):
 
 
 def get_from_dict(data_dict, keypath):
-    """get from dictionary"""
-    map_list = keypath.split(".")
+    """get from dictionary
+
+    keypath is a dotted string or a sequence of keys already split up
+    """
+    map_list = keypath.split(".") if isinstance(keypath, string_types) else keypath
     try:
         return reduce(operator.getitem, map_list, data_dict)
     except KeyError:
@@ -669,6 +673,27 @@ def compare_partial_dict(want, have, compare_keys):
     return wantd == haved
 
 
+# Compiled templates kept by Template, keyed by template source
+TEMPLATE_CACHE_SIZE = 2048
+
+# A template that is just "{{ name }}" or "{{ name.key.key }}"
+SIMPLE_VARIABLE_RE = re.compile(r"^{{\s*([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)\s*}}$")
+
+_MISSING = object()
+_shared_env = None
+
+
+def _template_environment():
+    """Jinja environment (and its compiled-template cache) shared by
+    every Template instance."""
+    global _shared_env
+    if _shared_env is None:
+        env = Environment(undefined=StrictUndefined)
+        env.filters.update({"ternary": ternary, "all": all, "any": any})
+        _shared_env = (env, LRUCache(TEMPLATE_CACHE_SIZE))
+    return _shared_env
+
+
 class Template:
     def __init__(self):
         if not HAS_JINJA2:
@@ -677,8 +702,7 @@ class Template:
                 "It can be installed using `pip install jinja2`"
             )
 
-        self.env = Environment(undefined=StrictUndefined)
-        self.env.filters.update({"ternary": ternary, "all": all, "any": any})
+        self.env, self._compiled = _template_environment()
 
     def __call__(self, value, variables=None, fail_on_undefined=True):
         variables = variables or {}
@@ -687,7 +711,7 @@ class Template:
             return value
 
         try:
-            value = self.env.from_string(value).render(variables)
+            value = self.render_string(value, variables)
         except UndefinedError:
             if not fail_on_undefined:
                 return None
@@ -701,6 +725,39 @@ class Template:
         else:
             return None
 
+    def render_string(self, value, variables):
+        """Render template source to text.
+
+        Plain variable substitutions are looked up directly; anything else
+        is compiled once and then served from the shared cache.
+        """
+        match = SIMPLE_VARIABLE_RE.match(value)
+        if match:
+            found = self._lookup(match.group(1), variables)
+            if found is not _MISSING:
+                return str(found)
+
+        shared_env, compiled = _template_environment()
+        if self.env is not shared_env:
+            return self.env.from_string(value).render(variables)
+        tmpl = compiled.get(value)
+        if tmpl is None:
+            tmpl = compiled[value] = self.env.from_string(value)
+        return tmpl.render(variables)
+
+    def _lookup(self, path, variables):
+        # Same resolution as Jinja (Environment.getattr: attribute, then
+        # item); anything it can't resolve goes through Jinja itself
+        name, _, attrs = path.partition(".")
+        if name not in variables:
+            return _MISSING
+        obj = variables[name]
+        for attr in attrs.split(".") if attrs else ():
+            obj = self.env.getattr(obj, attr)
+            if isinstance(obj, Undefined):
+                return _MISSING
+        return obj
+
     def contains_vars(self, data):
         if isinstance(data, string_types):
             for marker in (
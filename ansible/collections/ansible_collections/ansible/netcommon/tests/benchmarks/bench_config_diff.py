@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""NetworkConfig.difference() benchmark on a synthetic IOS config.
+
+    python tests/benchmarks/bench_config_diff.py [--lines 20000] [--repeat 3]
+
+Diffs a candidate (the running config with lines changed, dropped and
+added) against the running config, the way ios_config and the ios
+cliconf get_diff() do, with the list-membership engine (before) and the
+keyed one (after), and checks both give the same commands. The old
+engine is quadratic: it takes minutes on 20000 lines, so it is timed once.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+import argparse
+import time
+
+import ios_workload
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common import config
+
+
+def _scan_obj_to_block(objects, visited=None):
+    items = list()
+    for o in objects:
+        if o not in items:
+            items.append(o)
+            for child in o._children:
+                if child not in items:
+                    items.append(child)
+    return config._obj_to_raw(items)
+
+
+class ScanNetworkConfig(config.NetworkConfig):
+    """NetworkConfig with the list-membership diff"""
+
+    def _expand_block(self, configobj, S=None):
+        if S is None:
+            S = list()
+        S.append(configobj)
+        for child in configobj._children:
+            if child in S:
+                continue
+            self._expand_block(child, S)
+        return S
+
+    def _diff_line(self, other):
+        updates = list()
+        for item in self.items:
+            if item not in other:
+                updates.append(item)
+        return updates
+
+    def difference(self, other, match="line", path=None, replace=None):
+        if path and match != "line":
+            try:
+                other = other.get_block(path)
+            except ValueError:
+                other = list()
+        else:
+            other = other.items
+
+        meth = getattr(self, "_diff_%s" % match)
+        updates = meth(other)
+
+        if replace == "block":
+            parents = list()
+            for item in updates:
+                if not item.has_parents:
+                    parents.append(item)
+                else:
+                    for p in item._parents:
+                        if p not in parents:
+                            parents.append(p)
+
+            updates = list()
+            for item in parents:
+                updates.extend(self._expand_block(item))
+
+        visited = set()
+        expanded = list()
+
+        for curr_elem in updates:
+            add_parents = False
+            if expanded:
+                last_elem = expanded[-1]
+                if (
+                    all([curr_elem.has_parents, last_elem.has_parents])
+                    and curr_elem.parents[0] != last_elem.parents[0]
+                ):
+                    add_parents = True
+                if last_elem.has_children and last_elem.children[0] != curr_elem.text:
+                    add_parents = True
+            for p in curr_elem._parents:
+                if p.line not in visited or add_parents:
+                    visited.add(p.line)
+                    expanded.append(p)
+            expanded.append(curr_elem)
+            visited.add(curr_elem.line)
+
+        return expanded
+
+
+def candidate_config(running):
+    """running with every 25th line changed, every 40th dropped and a new
+    block after every 500th"""
+    lines = []
+    for index, line in enumerate(running.split("\n")):
+        if index % 40 == 7 and line.startswith(" "):
+            continue
+        if index % 25 == 3 and line.startswith(" "):
+            line += " 1"
+        lines.append(line)
+        if index % 500 == 499:
+            lines.extend(["interface Loopback{0}".format(index), " description added"])
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=20000, help="size of the running config")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    running = ios_workload.synthetic_config(args.lines)
+    candidate = candidate_config(running)
+    print(
+        "running {0} lines, candidate {1} lines".format(
+            len(running.split("\n")), len(candidate.split("\n"))
+        )
+    )
+
+    cases = (
+        ("match=line", dict(match="line")),
+        ("match=line replace=block", dict(match="line", replace="block")),
+        ("match=strict", dict(match="strict")),
+        ("match=exact", dict(match="exact")),
+    )
+    engines = (
+        ("before", ScanNetworkConfig, _scan_obj_to_block),
+        ("after", config.NetworkConfig, config._obj_to_block),
+    )
+    obj_to_block = config._obj_to_block
+    for name, kwargs in cases:
+        results = {}
+        times = {}
+        for label, cls, to_block in engines:
+            config._obj_to_block = to_block
+            have = cls(indent=1, contents=running)
+            want = cls(indent=1, contents=candidate)
+
+            def run():
+                diff = want.difference(have, **kwargs)
+                return config.dumps(diff, "commands"), config.dumps(diff, "block")
+
+            start = time.perf_counter()
+            results[label] = run()
+            times[label] = time.perf_counter() - start
+            if label == "after":
+                times[label] = min(times[label], ios_workload.timed(run, args.repeat))
+        config._obj_to_block = obj_to_block
+        print(
+            "{0:<26} before {1:8.3f}s   after {2:8.3f}s   {3:7.1f}x   {4} commands".format(
+                name,
+                times["before"],
+                times["after"],
+                times["before"] / times["after"],
+                len(results["after"][0].split("\n")) if results["after"][0] else 0,
+            )
+        )
+        assert results["before"] == results["after"], "{0}: the diff changed".format(name)
+
+
+if __name__ == "__main__":
+    main()
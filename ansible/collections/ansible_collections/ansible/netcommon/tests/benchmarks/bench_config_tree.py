@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""NetworkConfig memory / parse-time benchmark on a synthetic IOS config.
+
+    python tests/benchmarks/bench_config_tree.py [--lines 20000] [--repeat 3]
+
+Parses the config into ConfigLines with a __dict__ and their own copy of
+the ancestor list (before) and into the __slots__ / parent pointer ones
+(after), and reports the memory the parsed tree holds, the parse time,
+the time to build every line's .line and .path (twice: the second time
+they are cached) and a diff against a modified copy. Checks both trees
+give the same lines, paths and diff.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+import argparse
+import gc
+import re
+import time
+import tracemalloc
+
+import bench_config_diff
+import ios_workload
+
+from ansible.module_utils.common.text.converters import to_native
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common import config
+
+
+class DictConfigLine(object):
+    def __init__(self, raw):
+        self.text = str(raw).strip()
+        self.raw = raw
+        self._children = list()
+        self._parents = list()
+
+    def __str__(self):
+        return self.raw
+
+    def __eq__(self, other):
+        return self.line == other.line
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    @property
+    def line(self):
+        line = self.parents
+        line.append(self.text)
+        return " ".join(line)
+
+    @property
+    def children(self):
+        return config._obj_to_text(self._children)
+
+    @property
+    def parents(self):
+        return config._obj_to_text(self._parents)
+
+    @property
+    def path(self):
+        lines = config._obj_to_raw(self._parents)
+        lines.append(self.raw)
+        return "\n".join(lines)
+
+    @property
+    def has_children(self):
+        return len(self._children) > 0
+
+    @property
+    def has_parents(self):
+        return len(self._parents) > 0
+
+    def add_child(self, obj):
+        self._children.append(obj)
+
+
+class DictNetworkConfig(config.NetworkConfig):
+    """NetworkConfig parsing into DictConfigLines"""
+
+    def parse(self, lines):
+        toplevel = re.compile(r"\S")
+        childline = re.compile(r"^\s*(.+)$")
+        entry_reg = re.compile(r"([{};])")
+
+        ancestors = list()
+        config_lines = list()
+
+        indents = [0]
+
+        for linenum, line in enumerate(to_native(lines, errors="surrogate_or_strict").split("\n")):
+            text = entry_reg.sub("", line).strip()
+
+            cfg = DictConfigLine(line)
+
+            if not text or config.ignore_line(text, self.comment_tokens):
+                continue
+
+            if toplevel.match(line):
+                ancestors = [cfg]
+                indents = [0]
+            else:
+                match = childline.match(line)
+                line_indent = match.start(1)
+
+                if line_indent < indents[-1]:
+                    while indents[-1] > line_indent:
+                        indents.pop()
+
+                if line_indent > indents[-1]:
+                    indents.append(line_indent)
+
+                curlevel = len(indents) - 1
+                parent_level = curlevel - 1
+
+                cfg._parents = ancestors[:curlevel]
+
+                if curlevel > len(ancestors):
+                    config_lines.append(cfg)
+                    continue
+
+                for i in range(curlevel, len(ancestors)):
+                    ancestors.pop()
+
+                ancestors.append(cfg)
+                ancestors[parent_level].add_child(cfg)
+
+            config_lines.append(cfg)
+
+        return config_lines
+
+
+def held(build):
+    """(object built, bytes it holds on to)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=20000, help="size of the config")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    running = ios_workload.synthetic_config(args.lines)
+    candidate = bench_config_diff.candidate_config(running)
+    print("config {0} lines".format(len(running.split("\n"))))
+
+    results = {}
+    for label, cls in (("before", DictNetworkConfig), ("after", config.NetworkConfig)):
+        # the tree only: the source text is kept by both alike
+        tree, memory = held(lambda: cls(indent=1).parse(running))
+        parse = ios_workload.timed(lambda: cls(indent=1).parse(running), args.repeat)
+
+        have = cls(indent=1, contents=running)
+        start = time.perf_counter()
+        paths = [(item.line, item.path) for item in have.items]
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        [(item.line, item.path) for item in have.items]
+        again = time.perf_counter() - start
+
+        want = cls(indent=1, contents=candidate)
+        diff = ios_workload.timed(lambda: want.difference(have), args.repeat)
+        results[label] = (paths, config.dumps(want.difference(have), "commands"))
+        print(
+            "{0:<7} tree {1:7.2f} MiB ({2:4.0f} B/line)   parse {3:6.3f}s   "
+            "line+path {4:6.3f}s, again {5:6.3f}s   diff {6:6.3f}s".format(
+                label,
+                memory / 2.0**20,
+                memory / float(len(tree)),
+                parse,
+                first,
+                again,
+                diff,
+            )
+        )
+    assert results["before"] == results["after"], "the compact tree changed lines, paths or diff"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""NetworkTemplate.parse() benchmark over the cisco.ios rm_templates.
+
+    python tests/benchmarks/bench_parse.py [--scale 5] [--repeat 3]
+
+Parses the fixture config (see ios_workload.py) with every line tried
+against every parser and the result templated through _deepformat
+(before) and with the compiled parse plan (after), per template and in
+total, and checks both give the same facts.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+import argparse
+
+import ios_workload
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base.network_template import (
+    NetworkTemplate,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=5, help="copies of the fixture config")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    parser.add_argument("--top", type=int, default=10, help="templates listed, slowest first")
+    args = parser.parse_args()
+
+    templates = ios_workload.ios_templates()
+    config = ios_workload.parse_plan(templates, ios_workload.ios_config_lines(args.scale))
+    lines = sum(len(plan) for plan in config.values())
+    print("{0} templates, {1} lines parsed".format(len(templates), lines))
+
+    def run(method):
+        return dict((name, method(cls(lines=config[name]))) for name, cls in templates.items())
+
+    per_template = {}
+    totals = {}
+    results = {}
+    methods = (("before", NetworkTemplate._parse_lines), ("after", NetworkTemplate.parse))
+    for label, method in methods:
+        run(method)  # compile the plans / warm the template cache
+        for name, cls in templates.items():
+            seconds = ios_workload.timed(lambda: method(cls(lines=config[name])), args.repeat)
+            per_template.setdefault(name, {})[label] = seconds
+        totals[label] = ios_workload.timed(lambda: run(method), args.repeat)
+        results[label] = run(method)
+        print(
+            "{0:<7} parse {1:8.3f}s {2:10.0f} lines/s".format(
+                label, totals[label], lines / totals[label]
+            )
+        )
+    print("speedup {0:.1f}x".format(totals["before"] / totals["after"]))
+
+    slowest = sorted(per_template.items(), key=lambda item: -item[1]["before"])[: args.top]
+    for name, seconds in slowest:
+        print(
+            "  {0:<24} {1:8.3f}s -> {2:8.3f}s  {3:5.1f}x".format(
+                name, seconds["before"], seconds["after"], seconds["before"] / seconds["after"]
+            )
+        )
+    assert results["before"] == results["after"], "the parse plan changed the parsed facts"
+
+
+if __name__ == "__main__":
+    main()
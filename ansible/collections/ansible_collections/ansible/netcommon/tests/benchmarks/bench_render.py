@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Parser lookup benchmark over the cisco.ios rm_templates.
+
+    python tests/benchmarks/bench_render.py [--scale 20] [--repeat 3]
+
+  render:   the render workload of ios_workload.py
+  compare:  ResourceModule.compare() with every parser of the template,
+            each parsed entry as want against nothing, and the reverse
+
+Parsed facts don't grow with copies of the same config, so both run
+--scale times over them instead, standing in for that many neighbors,
+ACEs, interfaces...
+
+with get_parser() scanning PARSERS on every call and compare() splitting
+compval each time (before) and with the parser index (after).
+"""
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+import argparse
+
+import ios_workload
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base.network_template import (
+    NetworkTemplate,
+)
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base.resource_module import (
+    ResourceModule,
+)
+
+
+def _scan_get_parser(self, name):
+    res = [p for p in self._tmplt.PARSERS if p["name"] == name]
+    return res[0]
+
+
+def _scan_render(self, data, parser_name, negate=False):
+    if negate:
+        tmplt = self.get_parser(parser_name).get("remval") or self.get_parser(parser_name)["setval"]
+    else:
+        tmplt = self.get_parser(parser_name)["setval"]
+    return self._render(tmplt, data, negate)
+
+
+def _scan_compval_keys(self, name):
+    return self.get_parser(name).get("compval") or name
+
+
+class Comparer(ResourceModule):
+    """ResourceModule.compare() without a module behind it"""
+
+    def __init__(self, tmplt):  # pylint: disable=W0231
+        self._tmplt = tmplt
+        self.want = {}
+        self.have = {}
+        self.commands = []
+
+
+def compare_plan(template_cls, parsed):
+    """[entry] ResourceModule.compare gets handed as want or have"""
+    entries = [data for data in ios_workload._candidates(parsed) if data]
+    names = [parser["name"] for parser in template_cls.PARSERS if "setval" in parser]
+    return names, entries
+
+
+def run_compare(templates, plans):
+    commands = []
+    for name, (parsers, entries) in plans.items():
+        comparer = Comparer(templates[name]())
+        for entry in entries:
+            for want, have in ((entry, {}), ({}, entry)):
+                try:
+                    comparer.compare(parsers, want, have)
+                except Exception:
+                    pass
+        commands.extend(comparer.commands)
+    return commands
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=20, help="runs over the parsed facts")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    templates = ios_workload.ios_templates()
+    config = ios_workload.parse_plan(templates, ios_workload.ios_config_lines())
+    parsed = ios_workload.run_parse(templates, config)
+    renders = dict(
+        (name, ios_workload.render_plan(templates[name], facts) * args.scale)
+        for name, facts in parsed.items()
+    )
+    compares = {}
+    for name, facts in parsed.items():
+        parsers, entries = compare_plan(templates[name], facts)
+        compares[name] = (parsers, entries * args.scale)
+    print(
+        "{0} templates, {1} renders, {2} compare() calls".format(
+            len(templates),
+            sum(len(plan) for plan in renders.values()),
+            2 * sum(len(entries) for _parsers, entries in compares.values()),
+        )
+    )
+
+    indexed = (NetworkTemplate.get_parser, NetworkTemplate.render, NetworkTemplate.compval_keys)
+    scan = (_scan_get_parser, _scan_render, _scan_compval_keys)
+    results = {}
+    for label, impl in (("before", scan), ("after", indexed)):
+        NetworkTemplate.get_parser, NetworkTemplate.render, NetworkTemplate.compval_keys = impl
+        render = ios_workload.timed(
+            lambda: ios_workload.run_render(templates, renders), args.repeat
+        )
+        compare = ios_workload.timed(lambda: run_compare(templates, compares), args.repeat)
+        results[label] = (
+            ios_workload.run_render(templates, renders),
+            run_compare(templates, compares),
+        )
+        print("{0:<7} render {1:8.3f}s   compare {2:8.3f}s".format(label, render, compare))
+    NetworkTemplate.get_parser, NetworkTemplate.render, NetworkTemplate.compval_keys = indexed
+    assert results["before"] == results["after"], "the parser index changed the commands"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Template renderer micro-benchmark over the cisco.ios rm_templates.
+
+    python tests/benchmarks/bench_template.py [--scale 5] [--repeat 3]
+
+Runs the parse and render workloads (see ios_workload.py) with
+utils.Template compiling every string from scratch (before) and with the
+compiled-template cache and the "{{ var }}" fast path (after).
+"""
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+import argparse
+
+import ios_workload
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common import utils
+
+
+def _uncached(self, value, variables):
+    return self.env.from_string(value).render(variables)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=5, help="copies of the fixture config")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    templates = ios_workload.ios_templates()
+    config = ios_workload.parse_plan(templates, ios_workload.ios_config_lines(args.scale))
+    parsed = ios_workload.run_parse(templates, config)
+    plans = dict(
+        (name, ios_workload.render_plan(templates[name], facts)) for name, facts in parsed.items()
+    )
+    lines = sum(len(plan) for plan in config.values())
+    renders = sum(len(plan) for plan in plans.values())
+    print("{0} templates, {1} lines parsed, {2} renders".format(len(templates), lines, renders))
+
+    cached = utils.Template.render_string
+    results = {}
+    for label, impl in (("before", _uncached), ("after", cached)):
+        utils.Template.render_string = impl
+        parse = ios_workload.timed(lambda: ios_workload.run_parse(templates, config), args.repeat)
+        render = ios_workload.timed(lambda: ios_workload.run_render(templates, plans), args.repeat)
+        results[label] = (
+            ios_workload.run_parse(templates, config),
+            ios_workload.run_render(templates, plans),
+        )
+        print(
+            "{0:<7} parse {1:8.3f}s {2:10.0f} lines/s   render {3:8.3f}s {4:10.0f} renders/s".format(
+                label, parse, lines / parse, render, renders / render
+            )
+        )
+    utils.Template.render_string = cached
+    assert results["before"] == results["after"], "cached rendering changed the output"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Shared workload for the NetworkTemplate benchmarks: every cisco.ios
+rm_template, fed the running-config fixtures of the cisco.ios unit tests.
+
+  parse:   NetworkTemplate.parse() of the whole config, per template
+  render:  what ResourceModule.compare() does with the parsed facts, i.e.
+           render()/negated render() of every parser whose compval is set
+
+plus synthetic_config(), a running-config of any size for NetworkConfig.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+import importlib
+import os
+import pkgutil
+import sys
+import time
+
+
+COLLECTIONS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir] * 5))
+if COLLECTIONS_ROOT not in sys.path:
+    sys.path.insert(0, COLLECTIONS_ROOT)
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base.network_template import (  # noqa: E402
+    NetworkTemplate,
+)
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import (  # noqa: E402
+    get_from_dict,
+)
+
+
+IOS_ROOT = os.path.join(COLLECTIONS_ROOT, "ansible_collections", "cisco", "ios")
+IOS_FIXTURES = os.path.join(IOS_ROOT, "tests", "unit", "modules", "network", "ios", "fixtures")
+IOS_RM_TEMPLATES = "ansible_collections.cisco.ios.plugins.module_utils.network.ios.rm_templates"
+
+
+def ios_templates():
+    """{name: NetworkTemplate subclass} for every cisco.ios rm_template"""
+    package = importlib.import_module(IOS_RM_TEMPLATES)
+    templates = {}
+    for info in pkgutil.iter_modules(package.__path__):
+        module = importlib.import_module("{0}.{1}".format(IOS_RM_TEMPLATES, info.name))
+        for obj in vars(module).values():
+            if (
+                isinstance(obj, type)
+                and issubclass(obj, NetworkTemplate)
+                and obj is not NetworkTemplate
+                and getattr(obj, "PARSERS", None)
+            ):
+                templates[info.name] = obj
+    return dict(sorted(templates.items()))
+
+
+def ios_config_lines(scale=1):
+    """All running-config style fixtures (*.cfg) of the cisco.ios unit
+    tests, repeated `scale` times"""
+    lines = []
+    for name in sorted(os.listdir(IOS_FIXTURES)):
+        if name.endswith(".cfg"):
+            with open(os.path.join(IOS_FIXTURES, name)) as f:
+                lines.extend(line.rstrip() for line in f if line.strip() and line.strip() != "!")
+    return lines * scale
+
+
+def parse_plan(templates, lines):
+    """{name: lines} for each template: the config, minus lines its parse
+    can't take out of context (a key templated from a value captured by
+    an earlier "shared" line of another section)"""
+    plan = {}
+    for name, cls in templates.items():
+        try:
+            cls(lines=lines).parse()
+            plan[name] = lines
+        except Exception:
+            plan[name] = [line for line in lines if _parses(cls, line)]
+    return plan
+
+
+def _parses(cls, line):
+    try:
+        cls(lines=[line]).parse()
+    except Exception:
+        return False
+    return True
+
+
+def _candidates(data, depth=0):
+    # the dicts compare() would be handed: the facts and their entries
+    if isinstance(data, dict):
+        yield data
+        values = data.values()
+    elif isinstance(data, list):
+        values = data
+    else:
+        return
+    if depth < 4:
+        for value in values:
+            for candidate in _candidates(value, depth + 1):
+                yield candidate
+
+
+def render_plan(template_cls, parsed):
+    """[(data, parser name, negate)] the way ResourceModule.compare picks them"""
+    plan = []
+    for data in _candidates(parsed):
+        for parser in template_cls.PARSERS:
+            compval = parser.get("compval") or parser["name"]
+            try:
+                value = get_from_dict(data, compval)
+            except (TypeError, IndexError):
+                continue
+            if value is not None:
+                plan.append((data, parser["name"], False))
+                plan.append((data, parser["name"], True))
+    return plan
+
+
+def synthetic_config(size, seed=0):
+    """An IOS style running-config of about `size` lines: interfaces,
+    ACLs, route-maps and a BGP process with its neighbors"""
+    lines = ["version 15.6", "hostname bench-{0}".format(seed)]
+    block = 0
+    while len(lines) < size:
+        n = block + seed * 100000
+        kind = block % 4
+        if kind == 0:
+            lines.extend(
+                [
+                    "interface GigabitEthernet{0}/{1}".format(n // 48, n % 48),
+                    " description uplink {0}".format(n),
+                    " ip address 10.{0}.{1}.1 255.255.255.0".format(n // 256 % 256, n % 256),
+                    " ip ospf 1 area 0",
+                    " no shutdown",
+                ]
+            )
+        elif kind == 1:
+            lines.append("ip access-list extended ACL-{0}".format(n))
+            lines.extend(
+                " {0} permit tcp any host 192.0.2.{1} eq {2}".format(seq * 10, seq, 1000 + seq)
+                for seq in range(1, 9)
+            )
+        elif kind == 2:
+            lines.extend(
+                [
+                    "route-map RM-{0} permit 10".format(n),
+                    " match ip address ACL-{0}".format(n - 1),
+                    " set local-preference {0}".format(100 + n % 50),
+                ]
+            )
+        else:
+            lines.append("router bgp {0}".format(64512 + n % 1000))
+            lines.append(" address-family ipv4 vrf V{0}".format(n))
+            for peer in range(1, 5):
+                address = "198.51.{0}.{1}".format(n % 256, peer)
+                lines.append("  neighbor {0} remote-as {1}".format(address, 65000 + peer))
+                lines.append("  neighbor {0} activate".format(address))
+            lines.append(" exit-address-family")
+        lines.append("!")
+        block += 1
+    return "\n".join(lines)
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_parse(templates, plan):
+    return dict((name, cls(lines=plan[name]).parse()) for name, cls in templates.items())
+
+
+def run_render(templates, plans):
+    rendered = 0
+    for name, plan in plans.items():
+        tmplt = templates[name]()
+        for data, parser, negate in plan:
+            try:
+                if tmplt.render(data, parser, negate):
+                    rendered += 1
+            except Exception:
+                pass
+    return rendered
@@ -172,3 +172,193 @@ def test_updates_repeat_parents():
     for generated_diff_line, candidate_diff_line in zip(diff_list, expected_diff):
         print(generated_diff_line, candidate_diff_line)
         assert generated_diff_line == candidate_diff_line.strip()
+
+
+RUNNING_3 = """interface GigabitEthernet0/1
+ description uplink
+ ip address 192.0.2.1 255.255.255.0
+!
+router bgp 65000
+ neighbor 198.51.100.1 remote-as 65001
+ address-family ipv4
+  neighbor 198.51.100.1 activate
+ exit-address-family
+!
+ip access-list extended ACL-1
+ 10 permit ip any any
+"""
+
+CANDIDATE_3 = """interface GigabitEthernet0/1
+ description core uplink
+ ip address 192.0.2.1 255.255.255.0
+!
+router bgp 65000
+ neighbor 198.51.100.1 remote-as 65001
+ neighbor 198.51.100.2 remote-as 65002
+ address-family ipv4
+  neighbor 198.51.100.1 activate
+  neighbor 198.51.100.2 activate
+ exit-address-family
+!
+ip access-list extended ACL-1
+ 10 permit ip any any
+ 20 deny ip any any log
+"""
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        (
+            dict(match="line"),
+            [
+                "interface GigabitEthernet0/1",
+                "description core uplink",
+                "router bgp 65000",
+                "neighbor 198.51.100.2 remote-as 65002",
+                "address-family ipv4",
+                "neighbor 198.51.100.2 activate",
+                "ip access-list extended ACL-1",
+                "20 deny ip any any log",
+            ],
+        ),
+        (
+            dict(match="line", replace="block"),
+            [
+                "interface GigabitEthernet0/1",
+                "description core uplink",
+                "ip address 192.0.2.1 255.255.255.0",
+                "router bgp 65000",
+                "neighbor 198.51.100.1 remote-as 65001",
+                "neighbor 198.51.100.2 remote-as 65002",
+                "address-family ipv4",
+                "neighbor 198.51.100.1 activate",
+                "neighbor 198.51.100.2 activate",
+                "exit-address-family",
+                "address-family ipv4",
+                "neighbor 198.51.100.1 activate",
+                "neighbor 198.51.100.2 activate",
+                "ip access-list extended ACL-1",
+                "10 permit ip any any",
+                "20 deny ip any any log",
+            ],
+        ),
+    ],
+)
+def test_difference(kwargs, expected):
+    candidate = config.NetworkConfig(indent=1, contents=CANDIDATE_3)
+    running = config.NetworkConfig(indent=1, contents=RUNNING_3)
+
+    diff = candidate.difference(running, **kwargs)
+    assert config.dumps(diff, "commands").split("\n") == expected
+
+
+def test_difference_equal_lines():
+    # lines compare by their full path ("parents... text"), not by object
+    candidate = config.NetworkConfig(indent=1, contents="a\n b c\n  d")
+    running = config.NetworkConfig(indent=1, contents="a b\n c\n  d\nx")
+    assert [o.line for o in candidate.difference(running)] == ["a"]
+    assert [o.line for o in running.difference(candidate)] == ["a b", "x"]
+
+
+def test_dumps_block_dedupes():
+    net_config = config.NetworkConfig(indent=1, contents=RUNNING_3)
+    block = net_config.get_block(["router bgp 65000"])
+    assert config.dumps(block + block[:2], "block").split("\n") == [
+        "router bgp 65000",
+        " neighbor 198.51.100.1 remote-as 65001",
+        " address-family ipv4",
+        " exit-address-family",
+        "  neighbor 198.51.100.1 activate",
+        "end",
+    ]
+
+
+def test_add_global_lines():
+    net_config = config.NetworkConfig(indent=1, contents=RUNNING_3)
+    count = len(net_config.items)
+    net_config.add(["hostname r1", "hostname r1", "router bgp 65000"])
+    assert len(net_config.items) == count + 1
+    assert net_config.items[-1].text == "hostname r1"
+
+
+def test_config_line_tree():
+    net_config = config.NetworkConfig(indent=1, contents=RUNNING_3)
+    activate = net_config.get_object(
+        ["router bgp 65000", "address-family ipv4", "neighbor 198.51.100.1 activate"]
+    )
+    assert not hasattr(activate, "__dict__")
+    assert activate.parents == ["router bgp 65000", "address-family ipv4"]
+    assert [p.text for p in activate._parents] == activate.parents
+    assert activate._parents[-1].child_objs == [activate]
+    assert activate.line == "router bgp 65000 address-family ipv4 neighbor 198.51.100.1 activate"
+    assert activate.path == "\n".join(
+        ["router bgp 65000", " address-family ipv4", "  neighbor 198.51.100.1 activate"]
+    )
+    assert activate.has_parents and not activate.has_children
+    assert activate.children == []
+
+
+def test_config_line_cache():
+    parent = config.ConfigLine("interface Loopback0")
+    child = config.ConfigLine("description old")
+    child._parents = [parent]
+    parent.add_child(child)
+    assert child.path == "interface Loopback0\ndescription old"
+    child.raw = " description old"
+    assert child.path == "interface Loopback0\n description old"
+    assert child.line == "interface Loopback0 description old"
+    child._parents = []
+    assert child.line == "description old"
+    assert not child.has_parents
+
+
+def test_config_line_follows_ancestors():
+    top = config.ConfigLine("router bgp 65000")
+    family = config.ConfigLine(" address-family ipv4")
+    family._parents = [top]
+    line = config.ConfigLine("  neighbor 198.51.100.1 activate")
+    line._parents = [top, family]
+    assert line.line == "router bgp 65000 address-family ipv4 neighbor 198.51.100.1 activate"
+    assert line.path == "router bgp 65000\n address-family ipv4\n  neighbor 198.51.100.1 activate"
+
+    top.raw = "router bgp 65000 "
+    assert line.path.startswith("router bgp 65000 \n")
+    # the middle line moves under another parent: its children follow
+    family._parents = [config.ConfigLine("router bgp 65001")]
+    assert line.line == "router bgp 65001 address-family ipv4 neighbor 198.51.100.1 activate"
+    assert line.path == "router bgp 65001\n address-family ipv4\n  neighbor 198.51.100.1 activate"
+    family._parents = []
+    assert line.line == "address-family ipv4 neighbor 198.51.100.1 activate"
+
+
+def test_config_line_parents_cached():
+    first = config.ConfigLine("interface Gi0/1")
+    second = config.ConfigLine("interface Gi0/2")
+    service = config.ConfigLine(" service-policy input QOS")
+    service._parents = [first]
+    line = config.ConfigLine("  description edge")
+    line._parents = [first, service]
+    assert line._parents == [first, service]
+    assert line._ancestor_chain() is line._ancestor_chain()
+    # the list handed out is a copy
+    line._parents.append(second)
+    assert line._parents == [first, service]
+
+    # moved to a sibling with the same (empty) chain, the way parsing sets it
+    service._parent = second
+    assert line._parents == [second, service]
+    assert line.parents == ["interface Gi0/2", "service-policy input QOS"]
+
+
+def test_config_line_parents_not_a_chain():
+    # _parents set to objects that don't point at each other: kept as given
+    top = config.ConfigLine("router bgp 65000")
+    other_top = config.ConfigLine("router bgp 65000")
+    family = config.ConfigLine(" address-family ipv4")
+    family._parents = [other_top]
+    line = config.ConfigLine("  neighbor 198.51.100.1 activate")
+    line._parents = [top, family]
+    assert line._parents[0] is top
+    assert line._parents[1] is family
+    assert line.line == "router bgp 65000 address-family ipv4 neighbor 198.51.100.1 activate"
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+#
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Make coding more python3-ish
+from __future__ import absolute_import, division, print_function
+
+
+__metaclass__ = type
+
+import re
+
+from copy import deepcopy
+
+import pytest
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.cli_parser.cli_parsertemplate import (
+    CliParserTemplate,
+)
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base import (
+    network_template,
+)
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.rm_base.network_template import (
+    NetworkTemplate,
+)
+
+
+class BgpTemplate(NetworkTemplate):
+    def __init__(self, lines=None, module=None):
+        super(BgpTemplate, self).__init__(lines=lines, tmplt=self, module=module)
+
+    PARSERS = [
+        {
+            "name": "as_number",
+            "getval": re.compile(
+                r"""
+                ^router\sbgp\s(?P<as_number>\S+)
+                $""",
+                re.VERBOSE,
+            ),
+            "result": {"as_number": "{{ as_number }}", "enabled": True},
+            "shared": True,
+        },
+        {
+            # optional leading word: in the "no" and "description" buckets
+            "name": "description",
+            "getval": r"\s+(?P<negate>no\s)?description\s(?P<text>.+)$",
+            "result": {"description": "{{ text }}", "negated": "{{ not not negate }}"},
+        },
+        {
+            "name": "neighbor.remote_as",
+            "getval": re.compile(
+                r"""
+                \s+neighbor\s(?P<neighbor>\S+)
+                \sremote-as\s(?P<remote_as>\d+)  # the peer's AS
+                $""",
+                re.VERBOSE,
+            ),
+            "result": {
+                "neighbors": {
+                    "{{ neighbor }}": {
+                        "neighbor": "{{ neighbor }}",
+                        "remote_as": "{{ remote_as }}",
+                        "local_as": "{{ as_number }}",
+                        "flags": [],
+                    },
+                },
+            },
+        },
+        {
+            "name": "neighbor.shutdown",
+            "getval": r"\s+(?P<negate>no\s)?neighbor\s(?P<neighbor>\S+)\sshutdown$",
+            "result": {
+                "neighbors": {
+                    "{{ neighbor }}": {"shutdown": "{{ negate is undefined }}", "tags": ["x", 1]},
+                },
+            },
+        },
+        {
+            # same groups as the parser above: must not get mixed up
+            "name": "neighbor",
+            "getval": r"\s+neighbor\s(?P<neighbor>\S+)\s(?P<option>\S+)$",
+            "result": {"options": [{"neighbor": "{{ neighbor }}", "option": "{{ option }}"}]},
+        },
+        {
+            "name": "ipv6",
+            "getval": r"\s+ip(?P<v6>v6)?\sunicast-routing$",
+            "result": {"unicast": {"{{ 'ipv6' if v6 is defined else 'ipv4' }}": "on"}},
+        },
+        {
+            "name": "bgp.either",
+            "getval": r"\s+bgp\s(?:log-neighbor-changes|(?P<router_id>router-id\s\S+))$",
+            "result": {
+                "bgp": {"router_id": "{{ router_id }}", "log": "{{ router_id is undefined }}"},
+            },
+        },
+        {
+            "name": "timers",
+            "getval": r"\s+timers\sbgp\s(?P<keepalive>\d+)\s(?P<holdtime>\d+)$",
+            "result": {"timers": {"keepalive": "{{ keepalive }}", "holdtime": "{{ holdtime }}"}},
+        },
+    ]
+
+
+CONFIG = [
+    "router bgp 65000",
+    " bgp router-id 192.0.2.1",
+    " bgp log-neighbor-changes",
+    " description core uplink",
+    " no description trailing",
+    " neighbor 198.51.100.1 remote-as 65001",
+    " neighbor 198.51.100.1 shutdown",
+    " no neighbor 198.51.100.2 shutdown",
+    " neighbor 198.51.100.2 remote-as 65002",
+    " neighbor 198.51.100.3 activate",
+    " neighbor 198.51.100.3 description",
+    " ip unicast-routing",
+    " ipv6 unicast-routing",
+    " timers bgp 10 30",
+    "neighbor 198.51.100.4 remote-as 65004",
+    " timers bgp ten 30",
+    "",
+    "!",
+]
+
+
+def test_parse_matches_every_line_every_parser():
+    assert BgpTemplate(lines=CONFIG).parse() == BgpTemplate(lines=CONFIG)._parse_lines()
+
+
+def test_parse():
+    parsed = BgpTemplate(lines=CONFIG).parse()
+    assert parsed["as_number"] == 65000
+    assert parsed["enabled"] is True
+    assert parsed["bgp"] == {"router_id": "router-id 192.0.2.1", "log": True}
+    assert parsed["description"] == "trailing"
+    assert parsed["negated"] is True
+    assert parsed["neighbors"]["198.51.100.1"] == {
+        "neighbor": "198.51.100.1",
+        "remote_as": 65001,
+        "local_as": 65000,
+        "flags": [],
+        "shutdown": True,
+        "tags": ["x", 1],
+    }
+    assert parsed["neighbors"]["198.51.100.2"]["shutdown"] is False
+    assert "198.51.100.4" not in parsed["neighbors"]
+    assert sorted(o["option"] for o in parsed["options"]) == ["activate", "description"]
+    assert parsed["unicast"] == {"ipv4": "on", "ipv6": "on"}
+    assert parsed["timers"] == {"keepalive": 10, "holdtime": 30}
+
+
+@pytest.mark.parametrize("line", CONFIG + [" no neighbor 198.51.100.2 remote-as 1", "ipv6"])
+def test_parse_plan_first_match(line):
+    plan = network_template._parse_plan(BgpTemplate, BgpTemplate()._template)
+    expected = None
+    for parser in BgpTemplate.PARSERS:
+        cap = re.match(parser["getval"], line)
+        if cap:
+            groups = dict((k, v) for k, v in cap.groupdict().items() if v is not None)
+            expected = (parser["name"], groups)
+            break
+    found = plan.match(line)
+    assert (found and (found[0].parser["name"], found[1])) == expected
+
+
+def test_parse_plan_shared():
+    first = network_template._parse_plan(BgpTemplate, BgpTemplate()._template)
+    BgpTemplate(lines=CONFIG).parse()
+    assert network_template._parse_plan(BgpTemplate, BgpTemplate()._template) is first
+
+
+def test_parse_plan_per_class():
+    class Narrow(BgpTemplate):
+        PARSERS = BgpTemplate.PARSERS[:1]
+
+    BgpTemplate(lines=CONFIG).parse()
+    assert Narrow(lines=CONFIG).parse() == {"as_number": 65000, "enabled": True}
+    assert vars(Narrow)[network_template._PLAN_ATTR].size == 1
+    assert vars(BgpTemplate)[network_template._PLAN_ATTR].size == len(BgpTemplate.PARSERS)
+
+
+def test_parse_plan_entry_edited_in_place():
+    class Edited(BgpTemplate):
+        PARSERS = deepcopy(BgpTemplate.PARSERS)
+
+    assert Edited(lines=CONFIG).parse()["description"] == "trailing"
+    Edited.PARSERS[1]["result"]["description"] = "{{ text | upper }}"
+    assert Edited(lines=CONFIG).parse()["description"] == "TRAILING"
+    Edited.PARSERS[1]["getval"] = r"\s+description\s(?P<text>.+)$"
+    assert Edited(lines=CONFIG).parse()["description"] == "CORE UPLINK"
+
+
+def test_cli_parse_plan_per_instance():
+    # the native / content_templates cli_parse parsers set PARSERS on a
+    # new CliParserTemplate for every call
+    for word in ("description", "timers"):
+        parser = CliParserTemplate(lines=CONFIG)
+        parser.PARSERS = [p for p in deepcopy(BgpTemplate.PARSERS) if p["name"].startswith(word)]
+        parsed = parser.parse()
+        assert list(parsed) == (["description", "negated"] if word == "description" else ["timers"])
+        assert vars(parser)[network_template._PLAN_ATTR].parsers is parser.PARSERS
+    assert network_template._PLAN_ATTR not in vars(CliParserTemplate)
+    assert not hasattr(network_template, "_PARSE_PLANS")
+
+
+def test_parse_plan_buckets():
+    plan = network_template._parse_plan(BgpTemplate, BgpTemplate()._template)
+    words = dict((entry.parser["name"], entry.words) for entry in plan.entries)
+    assert words["as_number"] == set(["router"])
+    assert words["description"] == set(["no", "description"])
+    assert words["neighbor.shutdown"] == set(["no", "neighbor"])
+    assert words["ipv6"] == set(["ip"])
+    assert words["bgp.either"] == set(["bgp"])
+    # "neighbor" lines never try the timers parser
+    assert "timers" not in [e.parser["name"] for e in plan._route("neighbor").entries]
+    assert all(m.regex is not None for m in plan._matchers.values() if m.entries)
+
+
+def test_parse_own_deepformat():
+    class Upper(BgpTemplate):
+        def _deepformat(self, tmplt, data):
+            res = super(Upper, self)._deepformat(tmplt, data)
+            return res.upper() if isinstance(res, str) else res
+
+    parsed = Upper(lines=[" description core uplink"]).parse()
+    assert parsed["description"] == "CORE UPLINK"
+
+
+def test_parse_without_sre_parse(monkeypatch):
+    expected = BgpTemplate(lines=CONFIG).parse()
+    monkeypatch.setattr(network_template, "sre_parse", None)
+    assert BgpTemplate(lines=CONFIG).parse() == expected
+
+
+class RenderTemplate(NetworkTemplate):
+    def __init__(self, lines=None, module=None):
+        super(RenderTemplate, self).__init__(lines=lines, tmplt=self, module=module)
+
+    PARSERS = [
+        {"name": "hostname", "setval": "hostname {{ hostname }}"},
+        {
+            "name": "timers.keepalive",
+            "setval": "timers keepalive {{ timers.keepalive }}",
+            "remval": "timers keepalive",
+        },
+        {
+            "name": "timers.holdtime",
+            "setval": lambda data: "timers holdtime {0}".format(data["timers"]["holdtime"]),
+            "compval": "timers.hold",
+        },
+        {"name": "hostname", "setval": "never used"},
+        {"name": "nothing"},
+    ]
+
+
+def test_get_parser():
+    tmplt = RenderTemplate()
+    assert tmplt.get_parser("hostname") is RenderTemplate.PARSERS[0]
+    assert tmplt.get_parser("timers.holdtime")["compval"] == "timers.hold"
+    with pytest.raises(IndexError):
+        tmplt.get_parser("missing")
+
+
+def test_compval_keys():
+    tmplt = RenderTemplate()
+    assert tmplt.compval_keys("hostname") == ("hostname",)
+    assert tmplt.compval_keys("timers.keepalive") == ("timers", "keepalive")
+    assert tmplt.compval_keys("timers.holdtime") == ("timers", "hold")
+    with pytest.raises(IndexError):
+        tmplt.compval_keys("missing")
+
+
+def test_render():
+    tmplt = RenderTemplate()
+    data = {"hostname": "r1", "timers": {"keepalive": 10, "holdtime": 30}}
+    assert tmplt.render(data, "hostname") == "hostname r1"
+    assert tmplt.render(data, "hostname", True) == "no hostname r1"
+    assert tmplt.render(data, "timers.keepalive") == "timers keepalive 10"
+    assert tmplt.render(data, "timers.keepalive", True) == "no timers keepalive"
+    assert tmplt.render(data, "timers.holdtime", True) == "no timers holdtime 30"
+    assert tmplt.render({}, "timers.holdtime") is None
+    with pytest.raises(KeyError):
+        tmplt.render(data, "nothing")
+    with pytest.raises(IndexError):
+        tmplt.render(data, "missing")
+
+
+def test_parser_index_shared():
+    index = network_template._parser_index(RenderTemplate)
+    RenderTemplate().render({"hostname": "r1"}, "hostname")
+    RenderTemplate().get_parser("hostname")
+    assert network_template._parser_index(RenderTemplate) is index
+
+
+def test_parser_index_entry_edited_in_place():
+    class Edited(RenderTemplate):
+        PARSERS = deepcopy(RenderTemplate.PARSERS)
+
+    tmplt = Edited()
+    assert tmplt.render({"hostname": "r1"}, "hostname") == "hostname r1"
+    Edited.PARSERS[0]["setval"] = "host-name {{ hostname }}"
+    assert tmplt.render({"hostname": "r1"}, "hostname") == "host-name r1"
+    Edited.PARSERS[1]["compval"] = "timers.ka"
+    assert tmplt.compval_keys("timers.keepalive") == ("timers", "ka")
+    Edited.PARSERS[0] = {"name": "domain", "setval": "ip domain-name {{ domain }}"}
+    assert tmplt.render({"domain": "example.net"}, "domain") == "ip domain-name example.net"
+    # the second "hostname" is the first one now
+    assert tmplt.render({"hostname": "r1"}, "hostname") == "never used"
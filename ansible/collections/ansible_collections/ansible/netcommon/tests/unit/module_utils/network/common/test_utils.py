@@ -349,6 +349,15 @@ def test_dict_merge_src_unchanged():
     assert other == othercp
 
 
+def test_get_from_dict():
+    data = {"timers": {"keepalive": 10}, "name": "r1"}
+    assert utils.get_from_dict(data, "timers.keepalive") == 10
+    assert utils.get_from_dict(data, ("timers", "keepalive")) == 10
+    assert utils.get_from_dict(data, ["name"]) == "r1"
+    assert utils.get_from_dict(data, "timers.holdtime") is None
+    assert utils.get_from_dict(data, ("bgp", "as_number")) is None
+
+
 def test_conditional():
     assert utils.conditional(10, 10)
     assert utils.conditional("10", "10")
@@ -404,6 +413,49 @@ def test_template():
     assert "foo" == tmpl("{{ test }}", {"test": "foo"})
 
 
+@pytest.mark.parametrize(
+    "value,variables",
+    [
+        ("{{ vlan }}", {"vlan": "10"}),
+        ("{{ vlan }}", {"vlan": 10}),
+        ("{{ name }}", {"name": "[1, 2]"}),
+        ("{{ name }}", {"name": ""}),
+        ("{{ name }}", {"name": None}),
+        ("{{ neighbor.address }}", {"neighbor": {"address": "10.0.0.1"}}),
+        ("{{ neighbor.items }}", {"neighbor": {"items": "1"}}),
+        ("{{neighbor.remote_as}}", {"neighbor": {"remote_as": "65000"}}),
+        ("{{ missing }}", {}),
+        ("{{ neighbor.missing }}", {"neighbor": {}}),
+        ("{{ True if shutdown is defined }}", {"shutdown": "shutdown"}),
+        ("{{ 'no ' if negate|d(False) }}description {{ description }}", {"description": "x y"}),
+    ],
+)
+def test_template_matches_jinja(value, variables):
+    """Cached and fast-path rendering give what a fresh Jinja render gives"""
+    tmpl = utils.Template()
+    env = utils.Environment(undefined=utils.StrictUndefined)
+    env.filters.update(tmpl.env.filters)
+    try:
+        expected = env.from_string(value).render(variables)
+    except utils.UndefinedError:
+        assert tmpl(value, variables, fail_on_undefined=False) is None
+        with pytest.raises(utils.UndefinedError):
+            tmpl(value, variables)
+        return
+    assert tmpl.render_string(value, variables) == expected
+
+
+def test_template_compiles_once():
+    tmpl = utils.Template()
+    source = "{{ 'ip address ' + address if address is defined }}"
+    tmpl(source, {"address": "10.0.0.1"})
+    compiled = tmpl._compiled.get(source)
+    assert compiled is not None
+    assert "ip address 10.0.0.2" == tmpl(source, {"address": "10.0.0.2"})
+    assert tmpl._compiled.get(source) is compiled
+    assert utils.Template()._compiled is tmpl._compiled
+
+
 def test_to_masklen():
     assert 24 == to_masklen("255.255.255.0")
 
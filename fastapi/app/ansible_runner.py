@@ -1,12 +1,22 @@
 # fastapi/app/ansible_runner.py
 
+import json
 import os
 import signal
+import shutil
 import subprocess
 import shlex
 import re
+import tempfile
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from app.ansible_worker import READ_CHUNK, get_warm_pool
+from app.core import metrics
+from app.core.settings import get_settings
 
 # ROOT directory of the whole project
 ROOT = Path(__file__).resolve().parents[2]
@@ -16,6 +26,15 @@ ANSIBLE_DIR = ROOT / "ansible"
 PLAYBOOKS = ANSIBLE_DIR / "playbooks"
 INVENTORY = ANSIBLE_DIR / "inventories" / "devices.yml"
 
+# Log file names: to the microsecond, so two runs on one host in the same
+# second (a fast failing uptime then a backup, a native ping during an
+# ansible one) never share a file; see device_log_path()
+LOG_TS_FORMAT = "%Y-%m-%d_%H-%M-%S_%f"
+
+# json_events stdout callback: one JSON line per play/task/host event
+CALLBACK_PLUGINS = ANSIBLE_DIR / "callback_plugins"
+STDOUT_CALLBACK = "json_events"
+
 # Playbooks
 # Generic playbook for ping test
 PING_PLAYBOOK = PLAYBOOKS / "ping_test.yml"
@@ -76,58 +95,608 @@ def _mask_sensitive(cmd: str) -> str:
     )
     return cmd
 
-def run_playbook(playbook_path, limit_name, vendor, timeout_sec: int = 90):
-    """
-    Generic runner for any playbook, with hard timeout + safe logging.
-    """
+def _log_type(playbook_path) -> str:
+    return "ping_history" if playbook_path == PING_PLAYBOOK else "backup"
+
 
-    # Determine log folder
-    log_type = "ping_history" if playbook_path == PING_PLAYBOOK else "backup"
-    LOGS_DIR = ROOT / "logs" / log_type
+def _operation(playbook_path) -> str:
+    # ping_test.yml -> ping, backup_cisco.yml -> backup ... (metrics label)
+    return Path(playbook_path).stem.split("_")[0]
 
+
+def _build_cmd(playbook_path, limit: str, vendor: str, forks: int | None = None) -> str:
     vendor_vars = VENDOR_CONFIG.get(vendor, {})
 
     # Build -e "key=value ..." string
     extra_vars = " ".join([f"{k}={v}" for k, v in vendor_vars.items()])
 
-    cmd = f'ansible-playbook -i {INVENTORY} {playbook_path} --limit {limit_name} -e "{extra_vars}"'
+    cmd = f'ansible-playbook -i {INVENTORY} {playbook_path} --limit {limit} -e "{extra_vars}"'
+    if forks:
+        cmd += f" --forks {forks}"
+    return cmd
+
+
+def _ansible_env() -> dict:
+    """
+    Environment for ansible-playbook: switch stdout to the json_events callback.
+    """
+    env = os.environ.copy()
+    plugin_paths = [str(CALLBACK_PLUGINS)]
+    if env.get("ANSIBLE_CALLBACK_PLUGINS"):
+        plugin_paths.append(env["ANSIBLE_CALLBACK_PLUGINS"])
+    env["ANSIBLE_CALLBACK_PLUGINS"] = os.pathsep.join(plugin_paths)
+    env["ANSIBLE_STDOUT_CALLBACK"] = STDOUT_CALLBACK
+    env["ANSIBLE_NOCOLOR"] = "1"
+    return env
+
+
+TIMEOUT_MESSAGE = "❌ TIMEOUT: ansible-playbook exceeded {timeout}s and was killed."
+NO_RECAP_MESSAGE = "❌ No PLAY RECAP for {host}: the playbook never reported on this host."
+OUTPUT_LIMIT_MESSAGE = "❌ OUTPUT LIMIT: ansible-playbook printed more than {limit} bytes and was killed."
+
+
+class OutputLimitExceeded(Exception):
+    pass
+
+
+class OutputBudget:
+    """
+    Byte budget for one playbook run's output (runner.max_output_bytes),
+    spent by the stdout and stderr readers alike. 0 = unlimited.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def spend(self, n: int) -> bool:
+        """
+        Count n more bytes; False once the budget is exceeded.
+        """
+        with self._lock:
+            self.used += n
+            return not self.max_bytes or self.used <= self.max_bytes
+
+    def charge(self, n: int):
+        """
+        spend() that raises OutputLimitExceeded past the budget.
+        """
+        if not self.spend(n):
+            raise OutputLimitExceeded(OUTPUT_LIMIT_MESSAGE.format(limit=self.max_bytes))
+
+
+def _execute(cmd: str, timeout_sec: int, collector: "RunCollector", budget: OutputBudget):
+    """
+    Run ansible-playbook with a hard timeout and output budget, handing each
+    stdout line (collector.feed) and stderr line (collector.add_extra) over
+    as soon as it is printed (json_events flushes per event). Nothing is
+    accumulated here.
+    Returns (success, note): note says why the run was killed, if it was
+    (collector.outcome says the same as a metrics label).
+    """
     print("Running:", _mask_sensitive(cmd))
 
     process = subprocess.Popen(
         shlex.split(cmd),
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
+        env=_ansible_env(),
         start_new_session=True,  # important so we can kill child processes too
     )
+    collector.mark("spawn")
+
+    killed = []
+
+    def _kill(outcome: str, message: str):
+        if not killed:
+            killed.append((outcome, message))
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def _read(stream, on_line):
+        # At most READ_CHUNK bytes at a time, each charged to the budget
+        # before it is kept: a huge line without a newline (-vvvv JSON)
+        # gets the run killed instead of being buffered whole
+        pending = []
+        while True:
+            piece = stream.readline(READ_CHUNK)
+            if not piece:
+                break
+            if not budget.spend(len(piece)):
+                _kill("output_limit", OUTPUT_LIMIT_MESSAGE.format(limit=budget.max_bytes))
+                return
+            if not piece.endswith(b"\n"):
+                pending.append(piece)
+                continue
+            if pending:
+                piece = b"".join(pending) + piece
+                pending = []
+            on_line(piece.decode(errors="replace").rstrip("\r\n"))
+        if pending:
+            on_line(b"".join(pending).decode(errors="replace").rstrip("\r"))
+
+    # stderr is drained on its own thread so a chatty stderr can't block stdout
+    stderr_reader = threading.Thread(target=_read, args=(process.stderr, collector.add_extra), daemon=True)
+    stderr_reader.start()
+
+    watchdog = threading.Timer(timeout_sec, _kill, args=("timeout", TIMEOUT_MESSAGE.format(timeout=timeout_sec)))
+    watchdog.start()
+    try:
+        _read(process.stdout, collector.feed)
+        process.wait()
+    finally:
+        watchdog.cancel()
+        stderr_reader.join(timeout=5)
 
+    if killed:
+        collector.outcome, note = killed[0]
+        return False, note
+    return process.returncode == 0, ""
+
+
+def warm_pool():
+    """
+    The warm worker pool (started on first call), or None if disabled.
+    Called from app startup so workers are warm before the first click.
+    """
+    return get_warm_pool(INVENTORY, CALLBACK_PLUGINS, _ansible_env())
+
+
+def _run_ansible(playbook_path, limit: str, vendor: str, timeout_sec: int, collector, forks: int | None = None):
+    """
+    Run a playbook on a warm worker if one is free, else via the CLI.
+    Both paths stream output lines to the collector as they arrive and
+    return (success, note), note being the reason for a killed run.
+    """
+    budget = OutputBudget(get_settings()["runner"]["max_output_bytes"])
+    pool = warm_pool()
+    worker = pool.acquire() if pool else None
+    if worker is None:
+        collector.mode = "cli"
+        return _execute(_build_cmd(playbook_path, limit, vendor, forks=forks), timeout_sec, collector, budget)
+
+    print(f"Running (warm): {playbook_path.name} --limit {limit}")
+    collector.mode = "warm"
+    collector.mark("spawn")
     try:
-        stdout, stderr = process.communicate(timeout=timeout_sec)
-        success = (process.returncode == 0)
-        output = stdout.decode(errors="replace") + "\n" + stderr.decode(errors="replace")
-
-    except subprocess.TimeoutExpired:
-        os.killpg(process.pid, signal.SIGKILL)
-        success = False
-        output = f"❌ TIMEOUT: ansible-playbook exceeded {timeout_sec}s and was killed.\n"
-
-    # ------------------------
-    # Save log
-    # ------------------------
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    device_log_dir = LOGS_DIR / vendor / limit_name
+        rc = worker.run(
+            playbook_path, limit, VENDOR_CONFIG.get(vendor, {}), forks or 5, timeout_sec,
+            collector.feed, on_extra=collector.add_extra, on_bytes=budget.charge,
+        )
+        return rc == 0, ""
+    except TimeoutError:
+        collector.outcome = "timeout"
+        return False, TIMEOUT_MESSAGE.format(timeout=timeout_sec)
+    except OutputLimitExceeded as exc:
+        worker.kill()  # still mid-run: not reusable
+        collector.outcome = "output_limit"
+        return False, str(exc)
+    except RuntimeError as exc:
+        collector.outcome = "error"
+        return False, f"❌ {exc}"
+    finally:
+        pool.release(worker)
+
+
+_last_log_time = None
+_log_time_lock = threading.Lock()
+
+
+def _log_time() -> datetime:
+    # strictly increasing within the process, even within one clock tick
+    global _last_log_time
+    with _log_time_lock:
+        now = datetime.now()
+        if _last_log_time is not None and now <= _last_log_time:
+            now = _last_log_time + timedelta(microseconds=1)
+        _last_log_time = now
+        return now
+
+
+def device_log_path(log_type: str, vendor: str, host: str, suffix: str = ".log") -> Path:
+    """
+    logs/<log_type>/<vendor>/<host>/<timestamp><suffix> (directory created).
+    The timestamp is unique within the process.
+    """
+    timestamp = _log_time().strftime(LOG_TS_FORMAT)
+    device_log_dir = ROOT / "logs" / log_type / vendor / host
     device_log_dir.mkdir(parents=True, exist_ok=True)
+    return device_log_dir / f"{timestamp}{suffix}"
 
-    log_file = device_log_dir / f"{timestamp}.log"
+
+def write_device_log(log_type: str, vendor: str, host: str, text: str, suffix: str = ".log") -> Path:
+    """
+    Save text under logs/<log_type>/<vendor>/<host>/<timestamp><suffix>.
+    """
+    log_file = device_log_path(log_type, vendor, host, suffix)
     with open(log_file, "w") as f:
-        f.write(output)
-
-    # Print a useful failure summary to terminal
-    if not success:
-        print(f"❌ Playbook failed: vendor={vendor} host={limit_name}")
-        print(f"📄 Log saved: {log_file}")
-        tail = "\n".join(output.splitlines()[-80:])
-        print("---- last log lines ----")
-        print(tail)
-        print("------------------------")
-
-    return success, output, str(log_file)
\ No newline at end of file
+        f.write(text)
+    return log_file
+
+
+def _print_failure(vendor: str, host: str, output: str, log_file):
+    print(f"❌ Playbook failed: vendor={vendor} host={host}")
+    print(f"📄 Log saved: {log_file}")
+    tail = "\n".join(output.splitlines()[-80:])
+    print("---- last log lines ----")
+    print(tail)
+    print("------------------------")
+
+
+# -----------------------------------------------------
+# Structured results (json_events callback)
+# -----------------------------------------------------
+
+RESULT_LABELS = {
+    "ok": "ok: [{host}]",
+    "changed": "changed: [{host}]",
+    "skipped": "skipping: [{host}]",
+    "failed": "fatal: [{host}]: FAILED!",
+    "ignored": "fatal: [{host}]: FAILED! (ignored)",
+    "unreachable": "fatal: [{host}]: UNREACHABLE!",
+}
+
+RECAP_FIELDS = (
+    ("ok", "ok"), ("changed", "changed"), ("unreachable", "unreachable"),
+    ("failed", "failures"), ("skipped", "skipped"), ("rescued", "rescued"),
+    ("ignored", "ignored"),
+)
+
+
+def _banner(text: str) -> str:
+    return f"{text} " + "*" * max(3, 79 - len(text))
+
+
+def _result_lines(event: dict) -> list[str]:
+    result = event.get("result") or {}
+    label = RESULT_LABELS.get(event.get("status"), "{status}: [{host}]").format(
+        host=event.get("host"), status=event.get("status")
+    )
+    shown = {k: v for k, v in result.items() if k not in ("changed", "ansible_facts")}
+    if shown and event.get("status") != "skipped":
+        label += " => " + json.dumps(shown, indent=4, default=str)
+    return label.splitlines()
+
+
+def _recap_line(host: str, summary: dict) -> str:
+    counts = " ".join(f"{label}={summary.get(key, 0)}" for label, key in RECAP_FIELDS)
+    return f"{host:<26} : {counts}"
+
+
+def render_event(event: dict) -> list[str]:
+    """
+    Readable text for one event (what the default callback would print).
+    """
+    kind = event.get("event")
+    if kind == "play_start":
+        return ["", _banner(f"PLAY [{event.get('play')}]")]
+    if kind == "task_start":
+        return ["", _banner(f"TASK [{event.get('task')}]")]
+    if kind == "result":
+        return _result_lines(event)
+    if kind == "stats":
+        return ["", _banner("PLAY RECAP")] + [_recap_line(h, s) for h, s in event.get("hosts", {}).items()]
+    if kind == "error":
+        return [f"❌ {event.get('message')}"]
+    return []
+
+
+def parse_event(line: str) -> dict | None:
+    """
+    One stdout line -> event dict, or None for non-event lines
+    (warnings, -v debug output, another callback's text ...).
+    """
+    if not line.startswith("{"):
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) and "event" in event else None
+
+
+def _tail_lines() -> int:
+    return get_settings()["runner"]["tail_lines"]
+
+
+class OutputSpill:
+    """
+    A run's output that isn't a json_events event (warnings, -v debug lines,
+    stderr): the last `tail_lines` lines in memory, all of it in a temp file
+    that stays in memory up to SPOOL_BYTES and then spills to disk. The
+    file is only created by the first line.
+    Lines may come from the stdout and stderr reader threads at once.
+    """
+
+    SPOOL_BYTES = 1024 * 1024
+
+    def __init__(self, tail_lines: int):
+        self.tail = deque(maxlen=tail_lines)
+        self.count = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def add(self, line: str):
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_BYTES, mode="w+", errors="replace")
+            self.tail.append(line)
+            self.count += 1
+            self._file.write(line + "\n")
+
+    def copy_to(self, f):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.seek(0)
+            shutil.copyfileobj(self._file, f)
+            self._file.seek(0, os.SEEK_END)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class HostRun:
+    """
+    What one host did in a playbook run.
+
+      success     - no failed/unreachable tasks in PLAY RECAP
+      registered  - {register_name: task result}, e.g. registered["ping_output"]["stdout"]
+      facts       - facts set during the run (set_fact), e.g. facts["uptime_line"]
+      output      - the last runner.tail_lines lines of this host's log text
+      logfile     - where the full text is written; lines are appended as
+                    events arrive, not at the end of the run (the file is
+                    created by the first line)
+    """
+
+    def __init__(self, host: str, vendor: str, logfile: Path | None = None, tail_lines: int | None = None):
+        self.host = host
+        self.vendor = vendor
+        self.success = False
+        self.registered = {}
+        self.facts = {}
+        self.stats = None
+        self.output = ""
+        self.logfile = str(logfile) if logfile else None
+        self._log = None
+        self._log_done = False  # closed by finish()/close(): never reopened
+        self._lines = deque(maxlen=tail_lines or _tail_lines())
+        self._play = None
+        self._task = None
+        self.timings = {}  # seconds from run start: first_result, recap
+
+    def _log_file(self):
+        if self._log is None and self.logfile and not self._log_done:
+            self._log = open(self.logfile, "w")
+        return self._log
+
+    def _write(self, lines: list[str]):
+        self._lines.extend(lines)
+        log = self._log_file()
+        if log:
+            log.write("\n".join(lines) + "\n")
+            log.flush()
+
+    def add_result(self, event: dict):
+        """
+        Record one json_events "result" event for this host.
+        """
+        header = []
+        if event.get("play") != self._play:
+            self._play, self._task = event.get("play"), None
+            header.extend(["", _banner(f"PLAY [{self._play}]")])
+        if event.get("task") != self._task:
+            self._task = event.get("task")
+            header.extend(["", _banner(f"TASK [{self._task}]")])
+        self._write(header + _result_lines(event))
+
+        result = event.get("result") or {}
+        if event.get("register"):
+            self.registered[event["register"]] = result
+        self.facts.update(result.get("ansible_facts") or {})
+
+    def set_stats(self, summary: dict):
+        self.stats = summary
+        self.success = summary.get("failures", 0) == 0 and summary.get("unreachable", 0) == 0
+        self._write(["", _banner("PLAY RECAP"), _recap_line(self.host, summary)])
+
+    def finish(self, extra: OutputSpill | None = None):
+        """
+        Close out the log: anything that wasn't an event (warnings, stderr,
+        timeout message) goes at the end, copied from the spill file.
+        """
+        if extra is not None and extra.count:
+            self._lines.extend([""] + list(extra.tail))
+            log = self._log_file()
+            if log:
+                log.write("\n")
+                extra.copy_to(log)
+        self.close()
+        self.output = "\n".join(self._lines).strip() + "\n"
+
+    def close(self):
+        if self._log:
+            self._log.close()
+        self._log = None
+        self._log_done = True
+
+    def value(self, path: str, default=None):
+        """
+        Typed lookup by dotted path, the same way the playbooks reference it:
+          value("ping_output.stdout")  -> registered["ping_output"]["stdout"]
+          value("uptime_line")         -> facts["uptime_line"]
+        """
+        head, *rest = path.split(".")
+        if head in self.registered:
+            node = self.registered[head]
+        elif head in self.facts:
+            node = self.facts[head]
+        else:
+            return default
+        for key in rest:
+            if not isinstance(node, dict) or key not in node:
+                return default
+            node = node[key]
+        return node
+
+
+class RunCollector:
+    """
+    Demultiplexes a run's json_events stream into {host: HostRun} while the
+    run is still going, and forwards readable lines to on_line (live view).
+    Non-event stdout lines and stderr are shared "extra" output (OutputSpill).
+
+    Also keeps the run's timings (seconds since start): spawn, first_output,
+    first_result, completion; plus first_result / recap per host.
+    """
+
+    def __init__(self, runs: dict, on_line=None, tail_lines: int | None = None):
+        self.runs = runs
+        self.on_line = on_line
+        self.extra = OutputSpill(tail_lines or _tail_lines())
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.mode = None
+        self.outcome = None  # set when the run was killed / broke
+
+    def mark(self, phase: str, run: HostRun | None = None) -> float:
+        """
+        Record when a phase was first reached (run-wide or for one host).
+        """
+        elapsed = round(time.perf_counter() - self.started, 3)
+        target = run.timings if run is not None else self.timings
+        target.setdefault(phase, elapsed)
+        return elapsed
+
+    def _stream(self, lines: list[str]):
+        if self.on_line:
+            for line in lines:
+                self.on_line(line)
+
+    def add_extra(self, line: str):
+        """
+        One line of non-event output (also called from the stderr reader thread).
+        """
+        if line.strip():
+            self.extra.add(line)
+            self._stream([line])
+
+    def feed(self, line: str):
+        if "first_output" not in self.timings:
+            self.mark("first_output")
+        event = parse_event(line)
+        if event is None:
+            self.add_extra(line)
+            return
+
+        if event["event"] == "error":
+            self.extra.add(f"❌ {event.get('message')}")
+        elif event["event"] == "result" and event.get("host") in self.runs:
+            run = self.runs[event["host"]]
+            self.mark("first_result")
+            self.mark("first_result", run)
+            run.add_result(event)
+        elif event["event"] == "stats":
+            for host, summary in event.get("hosts", {}).items():
+                if host in self.runs:
+                    self.mark("recap", self.runs[host])
+                    self.runs[host].set_stats(summary)
+        self._stream(render_event(event))
+
+    def finish(self, note: str = ""):
+        self.mark("completion")
+        if note:
+            self.add_extra(note)
+        phase_timing = get_settings()["runner"]["phase_timing"]
+        for run in self.runs.values():
+            # no PLAY RECAP for the host (timeout, bad inventory, host not
+            # matched, no events at all ...): it never ran, whatever the rc
+            if run.stats is None:
+                run.success = False
+                run._write(["", NO_RECAP_MESSAGE.format(host=run.host)])
+            if phase_timing:
+                run._write(["", self._timing_line(run)])
+            run.finish(self.extra)
+            if not run.success:
+                _print_failure(run.vendor, run.host, run.output, run.logfile)
+        self.extra.close()
+
+    def close(self):
+        """
+        Release the log files and spill file of a run that never finished
+        (e.g. ansible-playbook could not be started).
+        """
+        for run in self.runs.values():
+            run.close()
+        self.extra.close()
+
+    def _timing_line(self, run: HostRun) -> str:
+        phases = {**self.timings, **{f"host_{k}": v for k, v in run.timings.items()}}
+        return f"⏱  timing ({self.mode}): " + " ".join(f"{k}={v:.2f}s" for k, v in phases.items())
+
+    def record_metrics(self, playbook_path, vendor: str, success: bool):
+        operation = _operation(playbook_path)
+        outcome = self.outcome or ("success" if success else "failed")
+        metrics.PLAYBOOK_RUNS.inc(vendor=vendor, operation=operation, outcome=outcome)
+        metrics.PLAYBOOK_DURATION.observe(self.timings["completion"], vendor=vendor, operation=operation, mode=self.mode)
+        for run in self.runs.values():
+            metrics.PLAYBOOK_HOSTS.inc(vendor=vendor, operation=operation, status="success" if run.success else "fail")
+        if get_settings()["runner"]["phase_timing"]:
+            for phase, seconds in self.timings.items():
+                metrics.PLAYBOOK_PHASE.observe(seconds, vendor=vendor, operation=operation, phase=phase)
+
+
+def _run(playbook_path, hosts: list[str], vendor, timeout_sec: int, forks: int | None, on_line) -> dict:
+    log_type = _log_type(playbook_path)
+    tail_lines = _tail_lines()
+    runs = {h: HostRun(h, vendor, device_log_path(log_type, vendor, h), tail_lines) for h in hosts}
+    collector = RunCollector(runs, on_line, tail_lines)
+
+    try:
+        success, note = _run_ansible(playbook_path, ",".join(hosts), vendor, timeout_sec, collector, forks=forks)
+    except BaseException:
+        collector.close()
+        raise
+    collector.finish(note)
+    # rc 0 without a recap for every host still means hosts were missed
+    success = success and all(run.stats is not None for run in runs.values())
+    collector.record_metrics(playbook_path, vendor, success)
+    return runs
+
+
+def run_playbook(playbook_path, limit_name, vendor, timeout_sec: int = 90, on_line=None) -> HostRun:
+    """
+    Generic runner for any playbook, with hard timeout + safe logging.
+
+    on_line(text) is called with each readable output line as it happens
+    (used to stream a job's output to the browser).
+    """
+    return _run(playbook_path, [limit_name], vendor, timeout_sec, None, on_line)[limit_name]
+
+
+# -----------------------------------------------------
+# Batch runs: one ansible-playbook for many hosts
+# -----------------------------------------------------
+
+def run_playbook_batch(playbook_path, hosts: list[str], vendor, timeout_sec: int = 90, forks: int = 20, on_line=None) -> dict:
+    """
+    Run one playbook for many hosts of the same vendor in a single
+    ansible-playbook process (--limit h1,h2,... --forks N). json_events
+    results are split per host and saved in the normal per-device log layout.
+
+    timeout_sec is per "wave" of hosts: the hard timeout is scaled by how
+    many rounds of `forks` hosts the run needs.
+
+    Returns {host: HostRun}.
+    """
+    if not hosts:
+        return {}
+
+    forks = max(1, min(forks, len(hosts)))
+    waves = -(-len(hosts) // forks)
+    return _run(playbook_path, hosts, vendor, timeout_sec * waves, forks, on_line)
@@ -0,0 +1,379 @@
+# fastapi/app/ansible_worker.py
+#
+# Warm Ansible workers.
+#
+# Every ansible-playbook CLI run re-imports Ansible, re-scans
+# collections_paths and re-parses the inventory before it touches a device.
+# A warm worker is a long-lived child process that does all of that once and
+# then runs playbooks through the Python API (PlaybookExecutor) on request.
+#
+# The worker is a plain subprocess (python -m app.ansible_worker), not a
+# multiprocessing child: Ansible forks its own WorkerProcesses, which a
+# daemonic multiprocessing process is not allowed to do. Its stdout is the
+# json_events stdout callback, loaded by name like the CLI does, so the
+# runner handles warm and CLI runs the same way. If no warm worker is free
+# (or Ansible can't be imported) the runner just falls back to the CLI.
+
+import json
+import os
+import queue
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from app.core.settings import get_settings
+
+# The fastapi/ folder, so the worker can import app.ansible_worker
+APP_DIR = Path(__file__).resolve().parents[1]
+
+# One JSON object per line both ways:
+#   stdin  (parent -> worker): {"playbook", "limit", "extra_vars", "forks"}; EOF = stop
+#   stdout (worker -> parent): the json_events lines of each run, plus the
+#                              control lines {"event": "worker_ready"},
+#                              {"event": "worker_error", "message"} and
+#                              {"event": "worker_done", "rc"} (end of a run)
+#   stderr: Ansible warnings/errors, handed to the run as extra output
+CONTROL_PREFIX = '{"event": "worker_'
+
+# Bytes read from a playbook run's pipes at a time (warm worker and CLI);
+# output is charged to the run's budget before it is buffered, so a line
+# without a newline can't grow past it
+READ_CHUNK = 64 * 1024
+
+
+def _control(event: str, **fields):
+    sys.stdout.write(json.dumps({"event": f"worker_{event}", **fields}) + "\n")
+    sys.stdout.flush()
+
+
+def _worker_main(inventory_path: str, callback_dir: str) -> int:
+    """
+    The worker process: load Ansible once, then run one playbook per
+    request line on stdin until EOF.
+    """
+    try:
+        from ansible import constants as C
+        from ansible import context
+        from ansible.executor.playbook_executor import PlaybookExecutor
+        from ansible.inventory.manager import InventoryManager
+        from ansible.module_utils.common.collections import ImmutableDict
+        from ansible.parsing.dataloader import DataLoader
+        from ansible.plugins.loader import callback_loader, init_plugin_loader
+        from ansible.vars.manager import VariableManager
+
+        # Load collections (netcommon, cisco.ios, panos ...) once
+        init_plugin_loader(C.COLLECTIONS_PATHS)
+        callback_loader.add_directory(callback_dir)
+        # The TaskQueueManager loads the stdout callback by this name
+        # (ANSIBLE_STDOUT_CALLBACK): make sure it is there before going ready
+        if callback_loader.get(C.DEFAULT_STDOUT_CALLBACK, class_only=True) is None:
+            raise RuntimeError(f"stdout callback {C.DEFAULT_STDOUT_CALLBACK!r} not found in {callback_dir}")
+
+        loader = DataLoader()
+        inventory = InventoryManager(loader=loader, sources=[inventory_path])
+        inventory_mtime = os.stat(inventory_path).st_mtime
+    except Exception as exc:
+        _control("error", message=f"{type(exc).__name__}: {exc}")
+        return 1
+
+    _control("ready")
+
+    for raw in sys.stdin:
+        request = json.loads(raw)
+        rc = 1
+        try:
+            # Inventory only gets re-parsed when devices.yml changed
+            mtime = os.stat(inventory_path).st_mtime
+            if mtime != inventory_mtime:
+                inventory.refresh_inventory()
+                inventory_mtime = mtime
+
+            context.CLIARGS = ImmutableDict(
+                connection="smart", module_path=None, forks=request["forks"],
+                become=None, become_method=None, become_user=None,
+                check=False, diff=False, verbosity=0, syntax=False,
+                start_at_task=None, listhosts=False, listtasks=False, listtags=False,
+                tags=["all"], skip_tags=[], extra_vars=(),
+            )
+            variable_manager = VariableManager(loader=loader, inventory=inventory)
+            variable_manager._extra_vars = dict(request["extra_vars"])
+            inventory.subset(request["limit"])
+
+            pbex = PlaybookExecutor(
+                playbooks=[request["playbook"]],
+                inventory=inventory,
+                variable_manager=variable_manager,
+                loader=loader,
+                passwords={},
+            )
+            rc = pbex.run()
+        except Exception as exc:
+            sys.stdout.write(json.dumps({"event": "error", "message": f"{type(exc).__name__}: {exc}"}) + "\n")
+        finally:
+            inventory.subset(None)
+        sys.stderr.flush()
+        _control("done", rc=rc)
+    return 0
+
+
+class WarmWorker:
+    """
+    Parent-side handle for one warm worker process. Runs one playbook at a time.
+    """
+
+    def __init__(self, inventory_path, callback_dir, env: dict):
+        env = dict(env)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (str(APP_DIR), env.get("PYTHONPATH")) if p)
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "app.ansible_worker", str(inventory_path), str(callback_dir)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            # Own process group, so a timeout can kill the worker
+            start_new_session=True,
+        )
+        # stderr first: what the worker printed there before a control
+        # line on stdout belongs to the run that line ends
+        self._stdout_fd = self._process.stdout.fileno()
+        self._fds = [self._process.stderr.fileno(), self._stdout_fd]
+        self._buffers = {fd: bytearray() for fd in self._fds}
+        self._stderr_tail = deque(maxlen=20)
+        self.state = "starting"  # starting | ready | dead
+        self.error = None
+
+    def _read(self, timeout: float, on_bytes=None) -> list[tuple[bool, str]]:
+        """
+        Whole lines that arrived within timeout, as (from_stdout, text).
+        on_bytes(n) is called for every chunk before it is buffered (and
+        may raise to stop the run).
+        """
+        if not self._fds:
+            return []
+        ready, _, _ = select.select(self._fds, [], [], max(timeout, 0))
+        lines = []
+        for fd in [fd for fd in self._fds if fd in ready]:
+            from_stdout = fd == self._stdout_fd
+            chunk = os.read(fd, READ_CHUNK)
+            buffer = self._buffers[fd]
+            if not chunk:
+                # EOF: the worker is gone (or going)
+                self._fds.remove(fd)
+                if buffer:
+                    lines.append((from_stdout, buffer.decode(errors="replace")))
+                continue
+            if on_bytes:
+                on_bytes(len(chunk))
+            buffer += chunk
+            *complete, rest = buffer.split(b"\n")
+            self._buffers[fd] = bytearray(rest)
+            lines.extend((from_stdout, line.decode(errors="replace").rstrip("\r")) for line in complete)
+        return lines
+
+    @property
+    def _exited(self) -> bool:
+        return self._stdout_fd not in self._fds
+
+    def poll_ready(self) -> bool:
+        if self.state == "starting":
+            for from_stdout, line in self._read(0):
+                if not from_stdout or not line.startswith(CONTROL_PREFIX):
+                    self._stderr_tail.append(line)
+                    continue
+                event = json.loads(line)
+                if event["event"] == "worker_ready":
+                    self.state = "ready"
+                elif event["event"] == "worker_error":
+                    self.state, self.error = "dead", event["message"]
+            if self.state == "starting" and self._exited:
+                self._process.wait()
+                self.state = "dead"
+                self.error = f"worker exited during startup (exit code {self._process.returncode})"
+                if self._stderr_tail:
+                    self.error += ": " + " | ".join(self._stderr_tail)
+        if self.state == "ready" and self._process.poll() is not None:
+            self.state = "dead"
+        return self.state == "ready"
+
+    def run(self, playbook, limit: str, extra_vars: dict, forks: int, timeout_sec: int, on_line,
+            on_extra=None, on_bytes=None):
+        """
+        Streams the run's stdout lines to on_line, its stderr lines to
+        on_extra (default on_line), charges on_bytes with every chunk read
+        and returns the playbook rc.
+        Raises TimeoutError (the worker is killed then) or RuntimeError
+        if the worker dies mid-run.
+        """
+        request = {"playbook": str(playbook), "limit": limit, "extra_vars": extra_vars, "forks": forks}
+        try:
+            self._process.stdin.write((json.dumps(request) + "\n").encode())
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.kill()
+            raise RuntimeError("warm worker died before the run")
+
+        on_extra = on_extra or on_line
+        deadline = time.monotonic() + timeout_sec
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.kill()
+                raise TimeoutError(f"warm worker exceeded {timeout_sec}s and was killed")
+            for from_stdout, line in self._read(remaining, on_bytes):
+                if not from_stdout:
+                    on_extra(line)
+                elif line.startswith(CONTROL_PREFIX):
+                    event = json.loads(line)
+                    if event["event"] == "worker_done":
+                        return event["rc"]
+                else:
+                    on_line(line)
+            if self._exited:
+                self.kill()
+                raise RuntimeError("warm worker died mid-run")
+
+    def kill(self):
+        self.state = "dead"
+        try:
+            os.killpg(self._process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        self._close()
+
+    def stop(self):
+        try:
+            # EOF on stdin ends the worker's request loop
+            self._process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.kill()
+        self.state = "dead"
+        self._close()
+
+    def _close(self):
+        self._fds = []
+        for stream in (self._process.stdin, self._process.stdout, self._process.stderr):
+            try:
+                stream.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+
+class WarmPool:
+    """
+    A few warm workers. acquire() never waits: if every worker is busy (or
+    still starting) it returns None and the caller uses the CLI instead.
+    Dead workers (timeout, crash) are replaced on the next acquire().
+    """
+
+    def __init__(self, size: int, inventory_path, callback_dir, env: dict):
+        self._size = size
+        self._args = (inventory_path, callback_dir, env)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+        self.disabled_reason = None
+
+    def start(self):
+        with self._lock:
+            while len(self._workers) < self._size:
+                worker = WarmWorker(*self._args)
+                self._workers.append(worker)
+                self._idle.put(worker)
+
+    def acquire(self) -> WarmWorker | None:
+        if self.disabled_reason:
+            return None
+
+        self._replace_dead()
+        for _ in range(self._idle.qsize()):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if worker.poll_ready():
+                return worker
+            if worker.state == "dead":
+                if worker.error:
+                    # Ansible can't even be imported here: stop trying
+                    self.disabled_reason = worker.error
+                    print(f"⚠️  Warm ansible workers disabled, using CLI: {worker.error}")
+                    return None
+                continue  # dropped; _replace_dead() starts a fresh one
+            self._idle.put(worker)
+        return None
+
+    def release(self, worker: WarmWorker):
+        self._idle.put(worker)
+
+    def _replace_dead(self):
+        with self._lock:
+            for i, worker in enumerate(self._workers):
+                if worker.state == "dead" and not worker.error:
+                    fresh = WarmWorker(*self._args)
+                    self._workers[i] = fresh
+                    self._idle.put(fresh)
+
+    def status(self) -> dict:
+        return {
+            "size": self._size,
+            "disabled": self.disabled_reason,
+            "workers": [w.state for w in self._workers],
+        }
+
+    def stop(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_warm_pool(inventory_path, callback_dir, env: dict) -> WarmPool | None:
+    """
+    Process-wide pool, started on first use. None when runner.warm_workers is 0.
+    """
+    global _pool
+    size = get_settings()["runner"]["warm_workers"]
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = WarmPool(size, inventory_path, callback_dir, env)
+            _pool.start()
+    return _pool
+
+
+def warm_pool_status() -> dict | None:
+    """
+    The running pool's status() without starting one (None if not started).
+    """
+    pool = _pool
+    return pool.status() if pool else None
+
+
+def shutdown_warm_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.stop()
+            _pool = None
+
+
+if __name__ == "__main__":
+    sys.exit(_worker_main(*sys.argv[1:3]))
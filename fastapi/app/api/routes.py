@@ -5,6 +5,12 @@ from .routes_devices import router as devices_router
 from .routes_ping import router as ping_router
 from .routes_backup import router as  backup_router
 from .routes_restart import router as restart_router
+from .routes_jobs import router as jobs_router
+from .routes_schedules import router as schedules_router
+from .routes_history import router as history_router
+from .routes_compliance import router as compliance_router
+from .routes_bulk import router as bulk_router
+from .routes_metrics import router as metrics_router
 
 api_router = APIRouter()
 
@@ -13,6 +19,12 @@ api_router.include_router(devices_router, prefix="/devices", tags=["Devices"])
 api_router.include_router(ping_router, prefix="/ping", tags=["Ping"])
 api_router.include_router(backup_router, prefix="/backup", tags=["Backup"])
 api_router.include_router(restart_router, prefix="/restart", tags=["Restart"])
+api_router.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
+api_router.include_router(schedules_router, prefix="/schedules", tags=["Schedules"])
+api_router.include_router(history_router, prefix="/history", tags=["History"])
+api_router.include_router(compliance_router, prefix="/compliance", tags=["Compliance"])
+api_router.include_router(bulk_router, prefix="/bulk", tags=["Bulk"])
+api_router.include_router(metrics_router, tags=["Metrics"])
 
 
 
@@ -1,62 +1,49 @@
 from fastapi import APIRouter
-from app.core.devices_loader import load_devices
-from app.ansible_runner import (
-    run_playbook,
-    JUNIPER_BACKUP,
-    CISCO_BACKUP,
-    PALO_BACKUP,
-)
-from pathlib import Path
+from app.core.devices_loader import find_device, select_devices
+from app.core.operations import BACKUP_PLAYBOOKS, backup_job
+from app.core.jobs import get_job_manager, job_response
+from app.core.history import since_days
+from app.core.backup_store import resolve_config_dir, sync_device
+from app.core.config_diff import ConfigDiff, page_lines
+from app.core.changes import changed_hosts, detect_change, get_change, query_changes
+from app.core.bulk import ERROR, start_bulk
+from app.api.schemas import DeviceSelection
 from datetime import datetime
-import difflib
+import asyncio
 
 router = APIRouter()
 
-BACKUP_PLAYBOOKS = {
-    "Juniper": JUNIPER_BACKUP,
-    "Cisco": CISCO_BACKUP,
-    "PaloAlto": PALO_BACKUP,
-}
-
-# Project root: .../device_assurance
-PROJECT_ROOT = Path(__file__).resolve().parents[3]
-CONFIG_ROOT = PROJECT_ROOT / "ansible" / "configs"
-DIFF_LOG_ROOT = PROJECT_ROOT / "logs" / "diff"
-
-def _find_device(device_id: str):
-    branches, cores = load_devices()
-    return (
-        next((d for d in branches if d["id"] == device_id), None)
-        or next((d for d in cores if d["id"] == device_id), None)
-    )
-
-def _resolve_config_dir(vendor: str, device_id: str) -> Path | None:
+
+def _read_diff_page(path, offset: int, max_lines: int) -> tuple[list[str], int]:
+    """
+    A page of a stored diff log (see app/core/changes.py): (lines, total).
+    """
+    with open(path, errors="ignore") as f:
+        return page_lines((line.rstrip("\n") for line in f), offset, max_lines)
+
+
+@router.post("/run-batch", name="backup_batch")
+async def run_backup_batch(selection: DeviceSelection, background: bool = False):
     """
-    Your backup folders are not 100% consistent across vendors yet.
-    Try common patterns:
-      - ansible/configs/<Vendor>/<device_id>        (Cisco style)
-      - ansible/configs/<device_id>                (Juniper old style)
-      - ansible/configs/<vendor_lower>/<device_id> (just in case)
+    Back up many devices as a bulk run (see POST /bulk/backup) and wait for
+    it; background=1 returns the bulk_id to follow instead.
     """
-    candidates = [
-        CONFIG_ROOT / vendor / device_id,
-        CONFIG_ROOT / vendor.lower() / device_id,
-        CONFIG_ROOT / device_id,
-    ]
-    for p in candidates:
-        if p.exists() and p.is_dir():
-            return p
-    return None
-
-def _latest_two_files(dirpath: Path):
-    files = [p for p in dirpath.iterdir() if p.is_file()]
-    files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-    return files[:2]
+    devices, unknown = select_devices(selection.hosts, selection.vendor, selection.group)
+    if not devices:
+        return {"status": "notfound", "unknown": unknown, "results": {}}
+
+    run = start_bulk("backup", devices, selection.model_dump())
+    if background:
+        return {**run.to_dict(since=None), "status": "queued", "unknown": unknown}
+    await run.wait()
+    if run.status == ERROR:
+        return {"status": "error", "bulk_id": run.id, "message": run.error, "unknown": unknown, "results": run.results}
+    return {**run.summary(), "unknown": unknown}
 
 
 @router.post("/run/{device_id}/", name="backup_device")
-async def run_backup(device_id: str):
-    device = _find_device(device_id)
+async def run_backup(device_id: str, background: bool = False):
+    device = find_device(device_id)
     if not device:
         return {"status": "notfound", "logfile": None}
 
@@ -69,28 +56,100 @@ async def run_backup(device_id: str):
             "message": f"No backup playbook for vendor '{vendor}'",
         }
 
-    success, output, logfile = run_playbook(playbook, device_id, vendor)
+    job = get_job_manager().submit("backup", device_id, vendor, backup_job, device_id, vendor)
+    return await job_response(job, background)
+
+def _pick_revisions(store, from_rev, to_rev, since, until):
+    """
+    (old, new) revisions for a diff request, or (None, message).
+      new: to_rev, else the config as of `until`, else the latest
+      old: from_rev, else the config as of `since`, else the one before new
+    """
+    if to_rev is not None:
+        new = store.get(to_rev)
+    elif until is not None:
+        new = store.at(until)
+    else:
+        new = (store.latest(1) or [None])[0]
+    if new is None:
+        return None, "No backup revision matches the requested end point"
+
+    if from_rev is not None:
+        old = store.get(from_rev)
+    elif since is not None:
+        # as of `since`, or the first backup if `since` predates them all
+        old = store.at(since) or store.get(1)
+    else:
+        old = store.get(new.rev - 1)
+    if old is None:
+        return None, "No backup revision matches the requested start point"
+    return old, new
 
+
+@router.get("/revisions/{device_id}/", name="backup_revisions")
+async def list_revisions(device_id: str, limit: int = 100, changed_only: bool = False):
+    """
+    Stored backups for a device, newest first.
+    """
+    device = find_device(device_id)
+    if not device:
+        return {"status": "notfound", "revisions": []}
+
+    store = await asyncio.to_thread(sync_device, device["vendor"], device_id)
+    if not store:
+        return {"status": "no_backups", "revisions": []}
+
+    revisions = [r for r in reversed(store.revisions()) if r.changed or not changed_only][:limit]
     return {
-        "status": "success" if success else "fail",
-        "logfile": logfile,
-        "vendor": vendor,
+        "status": "success",
+        "vendor": device["vendor"],
         "device_id": device_id,
+        "total": len(store.index["revisions"]),
+        "revisions": [r.to_dict() for r in revisions],
     }
 
+
+@router.get("/revisions/{device_id}/{rev}/", name="backup_revision")
+async def get_revision(device_id: str, rev: int):
+    device = find_device(device_id)
+    if not device:
+        return {"status": "notfound", "config": ""}
+
+    store = await asyncio.to_thread(sync_device, device["vendor"], device_id)
+    revision = store.get(rev) if store else None
+    if not revision:
+        return {"status": "notfound", "config": "", "message": f"No revision {rev} for {device_id}"}
+
+    return {**revision.to_dict(), "status": "success", "config": await asyncio.to_thread(revision.read_text)}
+
+
 @router.post("/diff/{device_id}/", name="diff_latest_backup")
-async def diff_latest_backup(device_id: str, max_lines: int = 400):
+async def diff_latest_backup(
+    device_id: str,
+    max_lines: int = 400,
+    offset: int = 0,
+    from_rev: int | None = None,
+    to_rev: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
     """
-    Compare latest 2 backups for this device and return unified diff.
-    max_lines limits UI output (full diff is still saved to log file).
+    Compare two backups for this device, section by section
+    (see app/core/config_diff.py). Latest 2 by default; pick others with
+    from_rev/to_rev (see /backup/revisions/<id>/) or a since/until time range.
+    max_lines/offset page the UI output.
+
+    The latest change is diffed and logged once, as a change event
+    (app/core/changes.py), and served from its diff log. Other ranges are
+    diffed in memory: no log file, no history row.
     """
-    device = _find_device(device_id)
+    device = find_device(device_id)
     if not device:
         return {"status": "notfound", "diff": "", "logfile": None}
 
     vendor = device["vendor"]
 
-    cfg_dir = _resolve_config_dir(vendor, device_id)
+    cfg_dir = resolve_config_dir(vendor, device_id)
     if not cfg_dir:
         return {
             "status": "no_backups",
@@ -99,44 +158,47 @@ async def diff_latest_backup(device_id: str, max_lines: int = 400):
             "message": f"No backup folder found for {vendor}/{device_id}",
         }
 
-    latest = _latest_two_files(cfg_dir)
-    if len(latest) < 2:
-        return {
-            "status": "not_enough_backups",
-            "diff": "",
-            "logfile": None,
-            "message": f"Need at least 2 backup files in {cfg_dir}",
-        }
-
-    new_file, old_file = latest[0], latest[1]
-
-    old_text = old_file.read_text(errors="ignore").splitlines()
-    new_text = new_file.read_text(errors="ignore").splitlines()
+    store = await asyncio.to_thread(sync_device, vendor, device_id)
+    latest = store.latest(2)
+    if from_rev is None and to_rev is None and since is None and until is None:
+        if len(latest) < 2:
+            return {
+                "status": "not_enough_backups",
+                "diff": "",
+                "logfile": None,
+                "message": f"Need at least 2 backup files in {cfg_dir}",
+            }
+        new_file, old_file = latest[0], latest[1]
+    else:
+        old_file, new_file = _pick_revisions(store, from_rev, to_rev, since, until)
+        if old_file is None:
+            return {"status": "notfound", "diff": "", "logfile": None, "message": new_file}
 
-    diff_lines = list(
-        difflib.unified_diff(
-            old_text,
-            new_text,
-            fromfile=str(old_file.name),
-            tofile=str(new_file.name),
-            lineterm="",
-        )
-    )
+    def _diff():
+        if new_file.rev == latest[0].rev and old_file.rev == new_file.rev - 1:
+            # recorded when the backup was stored (or now, if it wasn't yet)
+            change = detect_change(vendor, device_id, new_file)
+            if change is None:
+                diff = ConfigDiff(vendor, None, None)  # nothing changed: zero stats
+                return diff.mode, diff.stats, [], 0, None
+            try:
+                shown, total = _read_diff_page(change["diff_path"], offset, max_lines)
+            except OSError as exc:
+                print(f"⚠️  Diff log of change {change['id']} unreadable, diffing again: {exc}")
+            else:
+                return change["mode"], change["summary"], shown, total, change["diff_path"]
 
-    diff_text_full = "\n".join(diff_lines) if diff_lines else "NO_CHANGES"
+        diff = ConfigDiff.between(vendor, old_file, new_file)
+        lines = diff.lines(fromfile=str(old_file.name), tofile=str(new_file.name))
+        shown, total = page_lines(lines, offset, max_lines)
+        return diff.mode, diff.stats, shown, total, None
 
-    # Save full diff to log
-    ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    diff_dir = DIFF_LOG_ROOT / vendor / device_id
-    diff_dir.mkdir(parents=True, exist_ok=True)
-    diff_file = diff_dir / f"{ts}.diff"
-    diff_file.write_text(diff_text_full, errors="ignore")
+    mode, summary, shown, total, diff_file = await asyncio.to_thread(_diff)
 
     # Limit what UI shows
-    if diff_lines:
-        shown = diff_lines[:max_lines]
-        if len(diff_lines) > max_lines:
-            shown.append(f"... (truncated, total lines: {len(diff_lines)}; see log file)")
+    if total:
+        if offset + max_lines < total:
+            shown.append(f"... (truncated, total lines: {total}; use offset={offset + max_lines})")
         diff_text_ui = "\n".join(shown)
     else:
         diff_text_ui = "NO_CHANGES"
@@ -147,10 +209,61 @@ async def diff_latest_backup(device_id: str, max_lines: int = 400):
         "device_id": device_id,
         "from": old_file.name,
         "to": new_file.name,
+        "from_rev": old_file.rev,
+        "to_rev": new_file.rev,
+        "mode": mode,
+        "summary": summary,
+        "total_lines": total,
+        "offset": offset,
         "diff": diff_text_ui,
-        "logfile": str(diff_file),
+        "logfile": str(diff_file) if diff_file else None,
     }
 
+
+@router.get("/changes/", name="backup_changes")
+async def list_changes(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    days: float = 1,
+    host: str | None = None,
+    vendor: str | None = None,
+    limit: int = 200,
+    offset: int = 0,
+):
+    """
+    What changed: one entry per backup whose config differed from the
+    previous one, newest first. Defaults to the last `days` (1) of backups.
+    """
+    since = since or since_days(days)
+    changes, total = await asyncio.to_thread(query_changes, since, until, host, vendor, limit, offset)
+    by_vendor = await asyncio.to_thread(changed_hosts, since, vendor)
+    return {
+        "status": "success",
+        "since": since.isoformat(timespec="seconds"),
+        "total": total,
+        "hosts_changed": sum(by_vendor.values()),
+        "hosts_by_vendor": by_vendor,
+        "changes": changes,
+    }
+
+
+@router.get("/changes/{change_id}/", name="backup_change")
+async def get_change_diff(change_id: int, max_lines: int = 400, offset: int = 0):
+    """
+    One change event with (a page of) its stored diff.
+    """
+    change = await asyncio.to_thread(get_change, change_id)
+    if not change:
+        return {"status": "notfound", "diff": ""}
+
+    try:
+        shown, total = await asyncio.to_thread(_read_diff_page, change["diff_path"], offset, max_lines)
+    except OSError as exc:
+        return {**change, "status": "error", "diff": "", "message": f"Diff log unreadable: {exc}"}
+    if offset + max_lines < total:
+        shown.append(f"... (truncated, total lines: {total}; use offset={offset + max_lines})")
+    return {**change, "status": "success", "total_lines": total, "offset": offset, "diff": "\n".join(shown)}
+
 # @router.post("/run/{device_id}/", name="backup_device")
 # async def run_backup(device_id: str):
 
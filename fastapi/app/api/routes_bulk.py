@@ -0,0 +1,72 @@
+# fastapi/app/api/routes_bulk.py
+
+import json
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from app.api.schemas import DeviceSelection
+from app.core.bulk import OPERATIONS, get_bulk, recent_bulks, start_bulk
+from app.core.devices_loader import select_devices
+
+router = APIRouter()
+
+
+@router.get("/", name="list_bulk")
+async def list_bulk(limit: int = 20):
+    return {"status": "success", "runs": [r.to_dict(since=None) for r in recent_bulks(limit)]}
+
+
+@router.post("/{operation}", name="bulk_start")
+async def bulk_start(operation: str, selection: DeviceSelection, fresh: bool = False):
+    """
+    Start ping / uptime / backup over a vendor, group or list of hosts and
+    return straight away with the bulk_id. Follow it with
+    GET /bulk/<bulk_id>/?since=<next> or GET /bulk/<bulk_id>/stream.
+    """
+    if operation not in OPERATIONS:
+        return {"status": "unsupported_operation", "operation": operation, "supported": sorted(OPERATIONS)}
+
+    devices, unknown = select_devices(selection.hosts, selection.vendor, selection.group)
+    if not devices:
+        return {"status": "notfound", "unknown": unknown}
+
+    run = start_bulk(operation, devices, selection.model_dump(), fresh=fresh)
+    return {**run.to_dict(since=None), "unknown": unknown}
+
+
+@router.get("/{bulk_id}/", name="bulk_status")
+async def bulk_status(bulk_id: str, since: int = 0):
+    """
+    Progress (done / succeeded / failed / pending) plus the per-device
+    results after the first `since` ones; pass the returned "next" as
+    `since` on the next poll to get only what's new.
+    """
+    run = get_bulk(bulk_id)
+    if not run:
+        return {"status": "notfound", "bulk_id": bulk_id}
+    return run.to_dict(since=since)
+
+
+@router.get("/{bulk_id}/stream", name="bulk_stream")
+async def bulk_stream(bulk_id: str):
+    """
+    Server-Sent Events: `event: result` per device ({device_id, result,
+    progress}) as results come in, then one `event: done` with the run.
+    """
+    run = get_bulk(bulk_id)
+
+    async def events():
+        if not run:
+            yield f"event: done\ndata: {json.dumps({'status': 'notfound', 'bulk_id': bulk_id})}\n\n"
+            return
+        async for host, result in run.follow():
+            data = {"device_id": host, "result": result, "progress": run.progress()}
+            yield f"event: result\ndata: {json.dumps(data, default=str)}\n\n"
+        yield f"event: done\ndata: {json.dumps(run.to_dict(since=None), default=str)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
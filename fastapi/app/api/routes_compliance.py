@@ -0,0 +1,56 @@
+# fastapi/app/api/routes_compliance.py
+
+import asyncio
+
+from fastapi import APIRouter
+
+from app.core import compliance
+
+router = APIRouter()
+
+
+@router.post("/scan", name="compliance_scan")
+async def compliance_scan(vendor: str | None = None, group: str | None = None):
+    """
+    Check the latest backup of every device (optionally one vendor/group)
+    against config/compliance.yml. Devices whose config hash is unchanged
+    since the last scan come from the cache.
+    """
+    try:
+        return await asyncio.to_thread(compliance.scan, vendor, group)
+    except (OSError, ValueError) as exc:
+        return {"status": "error", "message": f"{type(exc).__name__}: {exc}"}
+
+
+@router.get("/report", name="compliance_report")
+async def compliance_report(
+    rule: str | None = None,
+    vendor: str | None = None,
+    non_compliant: bool = False,
+    include_results: bool = True,
+):
+    """
+    Last scan report, optionally filtered to one rule / vendor / failing devices.
+    """
+    report = await asyncio.to_thread(compliance.last_report)
+    if not report:
+        return {"status": "notfound", "message": "No compliance scan yet (POST /compliance/scan)"}
+
+    results = report["results"]
+    if rule:
+        results = {h: r for h, r in results.items() if any(f["rule"] == rule for f in r["failed"])}
+    if vendor:
+        results = {h: r for h, r in results.items() if r["vendor"] == vendor}
+    if non_compliant:
+        results = {h: r for h, r in results.items() if not r["compliant"]}
+
+    return {**report, "results": results if include_results else {}, "matching": len(results)}
+
+
+@router.get("/devices/{device_id}", name="compliance_device")
+async def compliance_device(device_id: str):
+    report = await asyncio.to_thread(compliance.last_report)
+    result = (report or {}).get("results", {}).get(device_id)
+    if not result:
+        return {"status": "notfound", "device_id": device_id}
+    return {"status": "success", "device_id": device_id, "generated_at": report["generated_at"], **result}
@@ -0,0 +1,60 @@
+# fastapi/app/api/routes_history.py
+#
+# Run history from the indexed store (app/core/history.py).
+# `days` = how far back to look.
+
+import asyncio
+from datetime import datetime
+
+from fastapi import APIRouter
+
+from app.core import history
+
+router = APIRouter()
+
+
+@router.get("/runs", name="history_runs")
+async def history_runs(
+    type: str | None = None,
+    host: str | None = None,
+    vendor: str | None = None,
+    status: str | None = None,
+    days: float = 7,
+    until: datetime | None = None,
+    limit: int = 200,
+):
+    runs = await asyncio.to_thread(
+        history.query_runs, type, host, vendor, status, history.since_days(days), until, limit
+    )
+    return {"status": "success", "count": len(runs), "runs": runs}
+
+
+@router.get("/hosts/{host}", name="history_host")
+async def history_host(host: str, type: str | None = None, days: float = 30, limit: int = 200):
+    runs = await asyncio.to_thread(
+        history.query_runs, type, host, None, None, history.since_days(days), None, limit
+    )
+    return {"status": "success", "host": host, "count": len(runs), "runs": runs}
+
+
+@router.get("/trend", name="history_trend")
+async def history_trend(
+    type: str = "ping",
+    bucket: str = "hour",
+    host: str | None = None,
+    vendor: str | None = None,
+    days: float = 7,
+):
+    if bucket not in history.TREND_BUCKETS:
+        return {"status": "error", "message": f"bucket must be one of {list(history.TREND_BUCKETS)}"}
+    points = await asyncio.to_thread(history.trend, type, bucket, host, vendor, history.since_days(days))
+    return {"status": "success", "type": type, "bucket": bucket, "points": points}
+
+
+@router.get("/packet-loss", name="history_packet_loss")
+async def history_packet_loss(days: float = 7, vendor: str | None = None, min_loss: float = 0.0):
+    """
+    Which hosts dropped pings in the last `days`, worst first.
+    """
+    hosts = await asyncio.to_thread(history.packet_loss, history.since_days(days), vendor, min_loss)
+    return {"status": "success", "days": days, "count": len(hosts), "hosts": hosts}
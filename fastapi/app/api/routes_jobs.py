@@ -0,0 +1,122 @@
+# fastapi/app/api/routes_jobs.py
+
+import asyncio
+import json
+import re
+from datetime import datetime
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from app.core.jobs import get_job_manager
+from app.core.result_cache import get_result_cache
+from app.core.results import query_jobs
+
+router = APIRouter()
+
+# SSE ends a field at CR, LF or CRLF: device output (Cisco / Junos) has bare
+# CRs inside lines
+SSE_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+def sse_event(event: str, text: str) -> str:
+    """
+    One SSE event carrying `text` as-is: each of its lines goes out as its
+    own data: field, which EventSource joins back with newlines.
+    """
+    data = "".join(f"data: {part}\n" for part in SSE_LINE_BREAK.split(text))
+    return f"event: {event}\n{data}\n"
+
+
+@router.get("/", name="list_jobs")
+async def list_jobs(limit: int = 100):
+    manager = get_job_manager()
+    return {
+        "status": "success",
+        "counts": manager.stats(),
+        "jobs": [j.to_dict(include_result=False) for j in manager.recent(limit)],
+    }
+
+
+@router.get("/history", name="job_history")
+async def job_history(
+    kind: str | None = None,
+    device_id: str | None = None,
+    vendor: str | None = None,
+    status: str | None = None,
+    source: str | None = None,
+    since: datetime | None = None,
+    limit: int = 100,
+    include_result: bool = False,
+):
+    """
+    Finished jobs from the results store (survives restarts, unlike /jobs/).
+    source: "api", "scheduler" or "scheduler:<name>".
+    """
+    jobs = await asyncio.to_thread(
+        query_jobs, kind, device_id, vendor, status, source, since, limit, include_result
+    )
+    return {"status": "success", "jobs": jobs}
+
+
+@router.get("/devices", name="job_devices")
+async def job_devices():
+    """
+    Device locks: which job holds each busy device and which jobs are
+    queued behind it.
+    """
+    locks = get_job_manager().device_locks
+    return {
+        "status": "success",
+        "operations": sorted(locks.operations),
+        "on_conflict": locks.on_conflict,
+        "max_queue": locks.max_queue,
+        "devices": locks.state(),
+    }
+
+
+@router.get("/cache", name="job_cache")
+async def job_cache():
+    """
+    Result cache for read-only operations (uptime, ping): TTLs, entries,
+    hits / misses / expirations per operation.
+    """
+    return {"status": "success", **get_result_cache().stats()}
+
+
+@router.delete("/cache", name="job_cache_clear")
+async def job_cache_clear():
+    get_result_cache().clear()
+    return {"status": "success"}
+
+
+@router.get("/{job_id}/", name="job_status")
+async def job_status(job_id: str):
+    job = get_job_manager().get(job_id)
+    if not job:
+        return {"status": "notfound", "job_id": job_id}
+    return job.to_dict()
+
+
+@router.get("/{job_id}/stream", name="job_stream")
+async def job_stream(job_id: str):
+    """
+    Server-Sent Events: every output line as `event: line`, then one
+    `event: done` carrying the job (status + result) as JSON.
+    Late subscribers get the lines so far first, then the live tail.
+    """
+    job = get_job_manager().get(job_id)
+
+    async def events():
+        if not job:
+            yield f"event: done\ndata: {json.dumps({'status': 'notfound', 'job_id': job_id})}\n\n"
+            return
+        async for line in job.follow():
+            yield sse_event("line", line)
+        yield f"event: done\ndata: {json.dumps(job.to_dict(), default=str)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,23 @@
+# fastapi/app/api/routes_metrics.py
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", name="metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint: playbook durations / outcomes, job engine,
+    device locks, inventory, caches and warm workers.
+
+    Async on purpose: the collectors walk the job engine's and device
+    locks' dicts, which only the event loop changes. Rendering on the loop
+    (it takes well under a millisecond) means they never change mid-scrape.
+    """
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
@@ -1,52 +1,90 @@
-import re
+import asyncio
+import time
+
 from fastapi import APIRouter, Request
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
-from app.core.devices_loader import load_devices
-from app.ansible_runner import run_playbook, PING_PLAYBOOK
+from app.core.devices_loader import find_device, get_inventory, select_devices
+from app.core.bulk import ERROR, start_bulk
+from app.core.reachability import sweep
+from app.core.settings import get_settings
+from app.core.operations import ping_job, ping_sweep, probe_kwargs, save_native_pings
+from app.core.jobs import get_job_manager, job_response
+from app.core.result_cache import get_result_cache
+from app.api.schemas import DeviceSelection
 
 router = APIRouter()
-PING_STDOUT_REGEX = re.compile(r'"ping_output\.stdout":\s*"([^"]+)"')
-templates = Jinja2Templates(directory="app/templates")
 
-def extract_ping_stdout(ansible_output: str) -> str:
+PING_ENGINES = ("native", "ansible")
+
+@router.post("/all", name="ping_all")
+async def ping_all(vendor: str | None = None, group: str | None = None):
     """
-    Try to extract only the ping_output.stdout part
-    from the Ansible text output.
-    If not found, return the original output.
+    Sweep the whole inventory (optionally one vendor/group) with the native engine.
     """
-    m = PING_STDOUT_REGEX.search(ansible_output)
-    if not m:
-        return ansible_output.strip()
+    if vendor or group:
+        devices, _ = select_devices(vendor=vendor, group=group)
+    else:
+        devices = get_inventory().devices
 
-    raw = m.group(1)  # the quoted string with \n inside
-    # Unescape \n etc.
-    return bytes(raw, "utf-8").decode("unicode_escape").strip()
+    start = time.perf_counter()
+    results = await ping_sweep(devices)
 
-@router.post("/{device_id}/", name="ping_device")
-async def ping(device_id: str):
+    reachable = sum(1 for r in results.values() if r["status"] == "success")
+    return {
+        "status": "success",
+        "total": len(results),
+        "reachable": reachable,
+        "unreachable": len(results) - reachable,
+        "duration_ms": round((time.perf_counter() - start) * 1000),
+        "results": results,
+    }
 
-    branches, cores = load_devices()
+@router.post("/run-batch", name="ping_batch")
+async def ping_batch(selection: DeviceSelection, background: bool = False):
+    """
+    Ping many devices as a bulk run (see POST /bulk/ping) and wait for it;
+    background=1 returns the bulk_id to follow instead.
+    """
+    devices, unknown = select_devices(selection.hosts, selection.vendor, selection.group)
+    if not devices:
+        return {"status": "notfound", "unknown": unknown, "results": {}}
 
-    # Find device
-    device = next((d for d in branches if d["id"] == device_id), None)
-    if not device:
-        device = next((d for d in cores if d["id"] == device_id), None)
+    run = start_bulk("ping", devices, selection.model_dump())
+    if background:
+        return {**run.to_dict(since=None), "status": "queued", "unknown": unknown}
+    await run.wait()
+    if run.status == ERROR:
+        return {"status": "error", "bulk_id": run.id, "message": run.error, "unknown": unknown, "results": run.results}
+    return {**run.summary(), "unknown": unknown}
 
+@router.post("/{device_id}/", name="ping_device")
+async def ping(device_id: str, background: bool = False, engine: str | None = None, fresh: bool = False):
+    """
+    engine: "native" (default, see settings ping.engine) probes straight from
+    the app and answers in about a second; "ansible" runs ping_test.yml as a job.
+    A ping less than cache.ttl.ping seconds old is reused unless fresh=1 or
+    background=1, or it came from another engine than the one asked for.
+    """
+    if engine is not None and engine not in PING_ENGINES:
+        return {"status": "unsupported_engine", "engine": engine, "supported": list(PING_ENGINES), "logfile": None}
+
+    device = find_device(device_id)
     if not device:
         return {"status": "notfound", "logfile": None}
 
     hostname = device["id"]
     vendor = device["vendor"]
 
-    # Run playbook
-    success, output, logfile = run_playbook(PING_PLAYBOOK, hostname, vendor)
-    clean_output = extract_ping_stdout(output)
+    if not fresh and not background:
+        cached = get_result_cache().get("ping", hostname)
+        if cached and (engine is None or cached.get("engine") == engine):
+            return cached
 
-    return {
-        "status": "success" if success else "fail",
-        "logfile": logfile,
-        "output": clean_output,
-        "vendor": vendor,
-        "device_id": hostname,
-    }
+    if (engine or get_settings()["ping"]["engine"]) == "native":
+        stats = await sweep({hostname: device["ip"]}, **probe_kwargs())
+        results = await asyncio.to_thread(save_native_pings, [device], stats)
+        return results[hostname]
+
+    # Run playbook (off the event loop)
+    job = get_job_manager().submit("ping", hostname, vendor, ping_job, hostname, vendor)
+    return await job_response(job, background)
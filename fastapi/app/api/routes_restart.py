@@ -1,34 +1,18 @@
 from fastapi import APIRouter
-from app.core.devices_loader import load_devices
-from app.ansible_runner import run_playbook, CISCO_RESTART, JUNIPER_RESTART, CISCO_UPTIME, JUNIPER_UPTIME
-import re
+from app.core.devices_loader import find_device
+from app.core.jobs import get_job_manager, job_response
+from app.core.operations import UPTIME_PLAYBOOKS, RESTART_PLAYBOOKS, uptime_job, restart_job
+from app.core.result_cache import get_result_cache
 
 router = APIRouter()
 
-UPTIME_PLAYBOOKS = {
-    "Juniper": JUNIPER_UPTIME,
-    "Cisco": CISCO_UPTIME,
-}
-
-def extract_uptime(output: str) -> str | None:
-    if not output:
-        return None
-
-    # Find "UPTIME: <one line>" anywhere in output
-    m = re.search(r"UPTIME:\s*([^\r\n]+)", output)
-    return m.group(1).strip() if m else None
-
-RESTART_PLAYBOOKS = {
-    "Cisco": CISCO_RESTART,
-    "Juniper": JUNIPER_RESTART,
-    # "Sophos": SOPHOS_RESTART,
-}
-
 @router.post("/uptime/{device_id}/", name="device_uptime")
-async def device_uptime(device_id: str):
-    branches, cores = load_devices()
-    device = next((d for d in branches if d["id"] == device_id), None) or \
-             next((d for d in cores if d["id"] == device_id), None)
+async def device_uptime(device_id: str, background: bool = False, fresh: bool = False):
+    """
+    Uptime from the result cache if it is recent (settings cache.ttl.uptime),
+    else from the device. fresh=1 always asks the device.
+    """
+    device = find_device(device_id)
 
     if not device:
         return {"status": "notfound", "uptime": None}
@@ -38,25 +22,18 @@ async def device_uptime(device_id: str):
     if not playbook:
         return {"status": "unsupported_vendor", "uptime": None, "vendor": vendor}
 
-    success, output, logfile = run_playbook(playbook, device_id, vendor, timeout_sec=45)
+    if not fresh:
+        cached = get_result_cache().get("uptime", device_id)
+        if cached:
+            return cached
 
-    uptime = extract_uptime(output)
-    return {
-        "status": "success" if uptime else "fail",
-        "uptime": uptime,
-        "logfile": logfile,
-        "vendor": vendor,
-        "device_id": device_id,
-    }
+    # the job's result reaches the cache through the job listener
+    job = get_job_manager().submit("uptime", device_id, vendor, uptime_job, device_id, vendor)
+    return await job_response(job, background)
 
 @router.post("/run/{device_id}/", name="restart_device")
-async def run_restart(device_id: str):
-    branches, cores = load_devices()
-
-    device = next((d for d in branches if d["id"] == device_id), None)
-    if not device:
-        device = next((d for d in cores if d["id"] == device_id), None)
-
+async def run_restart(device_id: str, background: bool = False):
+    device = find_device(device_id)
     if not device:
         return {"status": "notfound", "output": "", "logfile": None}
 
@@ -71,12 +48,5 @@ async def run_restart(device_id: str):
             "device_id": device_id,
         }
 
-    success, output, logfile = run_playbook(playbook, device_id, vendor)
-
-    return {
-        "status": "success" if success else "fail",
-        "output": output,
-        "logfile": logfile,
-        "vendor": vendor,
-        "device_id": device_id,
-    }
+    job = get_job_manager().submit("restart", device_id, vendor, restart_job, device_id, vendor)
+    return await job_response(job, background)
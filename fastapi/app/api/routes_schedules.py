@@ -0,0 +1,37 @@
+# fastapi/app/api/routes_schedules.py
+
+import asyncio
+
+from fastapi import APIRouter
+
+from app.core.scheduler import get_scheduler
+from app.core.results import query_schedule_runs
+
+router = APIRouter()
+
+
+@router.get("/", name="list_schedules")
+async def list_schedules():
+    scheduler = get_scheduler()
+    return {
+        "status": "success",
+        "running": scheduler.started,
+        "schedules": [s.to_dict() for s in scheduler.schedules.values()],
+    }
+
+
+@router.get("/runs", name="schedule_runs")
+async def schedule_runs(name: str | None = None, limit: int = 50):
+    runs = await asyncio.to_thread(query_schedule_runs, name, limit)
+    return {"status": "success", "runs": runs}
+
+
+@router.post("/{name}/run", name="run_schedule")
+async def run_schedule(name: str):
+    """
+    Fire a schedule now (same overlap rule as the cron trigger).
+    """
+    scheduler = get_scheduler()
+    if name not in scheduler.schedules:
+        return {"status": "notfound", "schedule": name}
+    return scheduler.trigger(name, trigger="manual")
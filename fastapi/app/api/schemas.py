@@ -0,0 +1,15 @@
+# fastapi/app/api/schemas.py
+
+from pydantic import BaseModel
+
+
+class DeviceSelection(BaseModel):
+    """
+    Body for batch endpoints. Any combination of:
+      {"hosts": ["achham", "baitadi"]}
+      {"vendor": "Cisco"}
+      {"group": "branch", "vendor": "Juniper"}
+    """
+    hosts: list[str] = []
+    vendor: str | None = None
+    group: str | None = None
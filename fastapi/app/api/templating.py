@@ -0,0 +1,34 @@
+# fastapi/app/api/templating.py
+#
+# The Jinja environment shared by every HTML route (one compiled-template
+# cache instead of one per routes_*.py).
+#
+#   development: a template is re-read when its file changes
+#   production:  each template is compiled once per process and never
+#                stat()ed again; the compiled bytecode is kept under
+#                <server.cache_dir>/jinja so other workers and restarts
+#                skip the compile
+
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+
+from app.core.settings import cache_dir, production
+
+TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "templates"
+
+
+templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+
+
+def configure_templates():
+    """
+    Apply the launch mode (called at app startup, once it is known).
+    """
+    if production():
+        templates.env.auto_reload = False
+        templates.env.bytecode_cache = FileSystemBytecodeCache(str(cache_dir("jinja")))
+    else:
+        templates.env.auto_reload = True
+        templates.env.bytecode_cache = None
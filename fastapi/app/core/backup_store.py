@@ -0,0 +1,511 @@
+# fastapi/app/core/backup_store.py
+#
+# Content-addressed config backup store.
+#
+# The backup playbooks still write a full <timestamp>.cfg / .set file under
+# ansible/configs/<Vendor>/<host>/ on every run. After each backup the file
+# is ingested here:
+#
+#   - the config is normalized (line endings, trailing blanks, volatile
+#     header lines) and hashed; an unchanged config adds a revision that
+#     points at the existing object, nothing new is stored
+#   - if the raw file is byte-identical to the previous one it is replaced
+#     by a hard link to it, so unchanged nightly backups cost no disk space
+#   - a changed config is stored as a gzip'd line delta against the device's
+#     current keyframe; a fresh keyframe (full gzip'd text) is cut every
+#     `keyframe_every` changes or when the delta stops paying off
+#
+# Deltas are always against a keyframe, never against the previous delta,
+# so reading any revision decompresses at most two objects.
+#
+# Layout (data/backups by default):
+#   <vendor>/<host>/index.json          revisions + object table
+#   <vendor>/<host>/objects/<sha>.gz    keyframe or delta, named by content hash
+#   <vendor>/<host>/.lock               flock'd while a process ingests
+#
+# The import / backfill / compliance CLIs write the store while the app is
+# running: ingesting holds the device's .lock, so two processes never hand
+# out the same rev or drop each other's index entries.
+#
+# Existing backups can be imported with:
+#   cd fastapi && python -m app.core.backup_store import
+
+import argparse
+import bisect
+import difflib
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from app.core.devices_loader import find_device
+from app.core.settings import ROOT_DIR, get_settings
+
+CONFIG_ROOT = ROOT_DIR / "ansible" / "configs"
+SNAPSHOT_TS_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+# Lines that change without a config change (ignored for the hash)
+VOLATILE_LINES = {
+    "Cisco": [
+        r"^! Last configuration change at ",
+        r"^! NVRAM config last updated at ",
+        r"^! No configuration change since last restart",
+        r"^Current configuration : \d+ bytes",
+        r"^Building configuration",
+        r"^ntp clock-period ",
+    ],
+    "Juniper": [
+        r"^## Last commit: ",
+        r"^## Last changed: ",
+        r"^## Image name: ",
+    ],
+}
+
+_volatile_re = {vendor: re.compile("|".join(p)) for vendor, p in VOLATILE_LINES.items()}
+_device_locks = {}
+_device_locks_guard = threading.Lock()
+_stores = {}  # (vendor, host) -> DeviceStore, i.e. the in-memory revision indexes
+
+
+def store_root() -> Path:
+    return ROOT_DIR / get_settings()["backups"]["store"]
+
+
+def resolve_config_dir(vendor: str, device_id: str) -> Path | None:
+    """
+    Your backup folders are not 100% consistent across vendors yet.
+    Try common patterns:
+      - ansible/configs/<Vendor>/<device_id>        (Cisco style)
+      - ansible/configs/<device_id>                (Juniper old style)
+      - ansible/configs/<vendor_lower>/<device_id> (just in case)
+    """
+    candidates = [
+        CONFIG_ROOT / vendor / device_id,
+        CONFIG_ROOT / vendor.lower() / device_id,
+        CONFIG_ROOT / device_id,
+    ]
+    for p in candidates:
+        if p.exists() and p.is_dir():
+            return p
+    return None
+
+
+def normalize_config(text: str) -> str:
+    """
+    What gets stored: LF line endings, no trailing whitespace or trailing blank lines.
+    """
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def volatile_pattern(vendor: str):
+    """
+    Compiled regex matching the vendor's volatile lines, or None.
+    """
+    return _volatile_re.get(vendor)
+
+
+def config_hash(vendor: str, text: str) -> str:
+    """
+    sha256 of the normalized config without the vendor's volatile lines:
+    same hash = same config.
+    """
+    volatile = volatile_pattern(vendor)
+    lines = normalize_config(text).splitlines()
+    if volatile:
+        lines = [line for line in lines if not volatile.match(line)]
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()
+
+
+def _snapshot_time(path: Path) -> datetime:
+    try:
+        return datetime.strptime(path.stem, SNAPSHOT_TS_FORMAT)
+    except ValueError:
+        return datetime.fromtimestamp(path.stat().st_mtime)
+
+
+@contextmanager
+def _device_lock(vendor: str, host: str):
+    """
+    Exclusive access to one device's store: against other threads, then
+    against other processes (flock on its .lock file, released on close).
+    """
+    with _device_locks_guard:
+        lock = _device_locks.setdefault((vendor, host), threading.Lock())
+    with lock:
+        path = store_root() / vendor / host
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+
+# ---------------------------
+# Deltas
+# ---------------------------
+
+def make_delta(base: list[str], new: list[str]) -> list:
+    """
+    Line delta: ["c", i, j] copies base[i:j], ["a", [lines]] adds lines.
+    """
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append(["a", new[j1:j2]])
+    return ops
+
+
+def apply_delta(base: list[str], ops: list) -> list[str]:
+    out = []
+    for op in ops:
+        if op[0] == "c":
+            out.extend(base[op[1]:op[2]])
+        else:
+            out.extend(op[1])
+    return out
+
+
+# ---------------------------
+# Per-device store
+# ---------------------------
+
+class Revision:
+    """
+    One stored backup. Quacks like the Path objects the diff route used to
+    get: .name and .read_text().
+    """
+
+    def __init__(self, store: "DeviceStore", entry: dict):
+        self._store = store
+        self.rev = entry["rev"]
+        self.name = entry["source"]
+        self.hash = entry["hash"]
+        self.changed = entry["changed"]
+        self.time = datetime.fromisoformat(entry["ts"])
+        self.entry = entry
+
+    def read_text(self, errors=None) -> str:
+        return self._store.read_object(self.hash)
+
+    def to_dict(self) -> dict:
+        return {
+            "rev": self.rev,
+            "name": self.name,
+            "time": self.entry["ts"],
+            "hash": self.hash,
+            "changed": self.changed,
+            "lines": self.entry["lines"],
+            "size": self.entry["size"],
+        }
+
+
+class DeviceStore:
+    def __init__(self, vendor: str, host: str, root: Path | None = None):
+        self.vendor = vendor
+        self.host = host
+        self.path = (root or store_root()) / vendor / host
+        self.index_file = self.path / "index.json"
+        self.objects_dir = self.path / "objects"
+        self._index = None
+        self._index_mtime = None  # index.json mtime when loaded/saved
+        self._synced_mtime = None  # raw folder mtime at the last sync()
+        self._times = None        # revision timestamps, for at()
+
+    # -- index --
+
+    @property
+    def index(self) -> dict:
+        """
+        Kept in memory; re-read only if another process rewrote index.json.
+        """
+        try:
+            mtime = self.index_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._index is None or mtime != self._index_mtime:
+            if mtime is not None:
+                self._index = json.loads(self.index_file.read_text())
+            else:
+                self._index = {"vendor": self.vendor, "host": self.host, "revisions": [], "objects": {}}
+            self._index_mtime = mtime
+            self._times = None
+        return self._index
+
+    def _save_index(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=self.path, suffix=".tmp", delete=False) as tmp:
+            tmp.write(json.dumps(self._index, indent=1))
+        os.replace(tmp.name, self.index_file)
+        self._index_mtime = self.index_file.stat().st_mtime_ns
+        self._times = None
+
+    def revisions(self) -> list[Revision]:
+        return [Revision(self, e) for e in self.index["revisions"]]
+
+    def latest(self, n: int = 2) -> list[Revision]:
+        """
+        Newest first, like the old _latest_two_files().
+        """
+        return [Revision(self, e) for e in reversed(self.index["revisions"][-n:])]
+
+    def get(self, rev: int) -> Revision | None:
+        revisions = self.index["revisions"]
+        if 1 <= rev <= len(revisions):  # revs are numbered 1..n in order
+            return Revision(self, revisions[rev - 1])
+        return None
+
+    def at(self, when: datetime) -> Revision | None:
+        """
+        The config as it was at `when`: newest revision taken at or before it.
+        """
+        revisions = self.index["revisions"]
+        if self._times is None:
+            self._times = [e["ts"] for e in revisions]
+        i = bisect.bisect_right(self._times, when.isoformat(timespec="seconds"))
+        return Revision(self, revisions[i - 1]) if i else None
+
+    # -- objects --
+
+    def _object_path(self, sha: str) -> Path:
+        return self.objects_dir / f"{sha}.gz"
+
+    def _load(self, sha: str):
+        return json.loads(gzip.decompress(self._object_path(sha).read_bytes()))
+
+    def read_object(self, sha: str) -> str:
+        """
+        Full config text for a hash: the keyframe itself, or keyframe + one delta.
+        """
+        meta = self.index["objects"][sha]
+        if meta["kind"] == "key":
+            lines = self._load(sha)
+        else:
+            lines = apply_delta(self._load(meta["base"]), self._load(sha))
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _write_object(self, sha: str, payload) -> int:
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        data = gzip.compress(json.dumps(payload, separators=(",", ":")).encode(), 6)
+        self._object_path(sha).write_bytes(data)
+        return len(data)
+
+    def _store_object(self, sha: str, lines: list[str]):
+        cfg = get_settings()["backups"]
+        objects = self.index["objects"]
+        key = self.index.get("keyframe")
+
+        if key and self.index.get("deltas_since_key", 0) < cfg["keyframe_every"]:
+            ops = make_delta(self._load(key), lines)
+            delta = gzip.compress(json.dumps(ops, separators=(",", ":")).encode(), 6)
+            full_estimate = objects[key]["stored"] or 1
+            if len(delta) <= cfg["max_delta_ratio"] * full_estimate:
+                self.objects_dir.mkdir(parents=True, exist_ok=True)
+                self._object_path(sha).write_bytes(delta)
+                objects[sha] = {"kind": "delta", "base": key, "stored": len(delta)}
+                self.index["deltas_since_key"] = self.index.get("deltas_since_key", 0) + 1
+                return
+
+        stored = self._write_object(sha, lines)
+        objects[sha] = {"kind": "key", "stored": stored}
+        self.index["keyframe"] = sha
+        self.index["deltas_since_key"] = 0
+
+    # -- ingest --
+
+    def ingest(self, raw_file: Path) -> Revision:
+        """
+        Add one raw backup file as the newest revision.
+        """
+        raw = raw_file.read_bytes()
+        text = normalize_config(raw.decode(errors="ignore"))
+        sha = config_hash(self.vendor, text)
+        raw_sha = hashlib.sha256(raw).hexdigest()
+
+        revisions = self.index["revisions"]
+        prev = revisions[-1] if revisions else None
+
+        if sha not in self.index["objects"]:
+            self._store_object(sha, text.splitlines())
+
+        if prev and prev["raw_sha"] == raw_sha and get_settings()["backups"]["hardlink_unchanged"]:
+            _hardlink_over(raw_file.parent / prev["source"], raw_file)
+
+        entry = {
+            "rev": prev["rev"] + 1 if prev else 1,
+            "ts": _snapshot_time(raw_file).isoformat(timespec="seconds"),
+            "source": raw_file.name,
+            "hash": sha,
+            "raw_sha": raw_sha,
+            "changed": prev is None or prev["hash"] != sha,
+            "lines": text.count("\n"),
+            "size": len(raw),
+        }
+        revisions.append(entry)
+        self._save_index()
+        return Revision(self, entry)
+
+    def sync(self, config_dir: Path) -> list[Revision]:
+        """
+        Ingest raw files in config_dir that are newer than the last stored revision.
+        The folder is only listed when its mtime changed (a file was added).
+        """
+        mtime = config_dir.stat().st_mtime_ns
+        if mtime == self._synced_mtime:
+            return []
+        self._synced_mtime = mtime
+
+        revisions = self.index["revisions"]
+        last = revisions[-1]["source"] if revisions else ""
+        new_files = sorted(
+            (p for p in config_dir.iterdir() if p.is_file() and p.name > last),
+            key=lambda p: p.name,  # timestamped names sort by time
+        )
+        return [self.ingest(p) for p in new_files]
+
+
+def _hardlink_over(existing: Path, target: Path):
+    """
+    Replace target with a hard link to existing (same bytes), atomically.
+    """
+    if not existing.exists() or existing.samefile(target):
+        return
+    tmp = target.with_name(target.name + ".lnk")
+    try:
+        os.link(existing, tmp)
+        os.replace(tmp, target)
+    except OSError:
+        tmp.unlink(missing_ok=True)  # different filesystem / no hard links: keep the copy
+
+
+# ---------------------------
+# Module API
+# ---------------------------
+
+def get_store(vendor: str, host: str) -> DeviceStore:
+    """
+    The process-wide DeviceStore for a device (its index stays in memory).
+    """
+    with _device_locks_guard:
+        store = _stores.get((vendor, host))
+        if store is None:
+            store = _stores[(vendor, host)] = DeviceStore(vendor, host)
+        return store
+
+
+def _sync(vendor: str, host: str) -> tuple[DeviceStore | None, list[Revision]]:
+    config_dir = resolve_config_dir(vendor, host)
+    if not config_dir:
+        return None, []
+    store = get_store(vendor, host)
+    with _device_lock(vendor, host):
+        return store, store.sync(config_dir)
+
+
+def sync_device(vendor: str, host: str) -> DeviceStore | None:
+    """
+    Bring the store up to date with the device's raw backup folder.
+    Returns None if the device has no backup folder.
+    """
+    return _sync(vendor, host)[0]
+
+
+def latest_revisions(vendor: str, host: str, n: int = 2) -> list[Revision]:
+    store = sync_device(vendor, host)
+    return store.latest(n) if store else []
+
+
+def ingest_new(vendor: str, host: str) -> list[Revision] | None:
+    """
+    Called after a backup run: store whatever the playbook just wrote.
+    Returns the revisions this added, oldest first (several if backups
+    piled up since the last sync), or None when nothing new was stored.
+    """
+    _, revisions = _sync(vendor, host)
+    return revisions or None
+
+
+def _device_dirs(config_root: Path):
+    """
+    (vendor, host, folder) for every device folder under config_root:
+      - <Vendor>/<host>/ (and <vendor_lower>/<host>/)
+      - <host>/ holding the backups directly (Juniper old style); the
+        vendor comes from the inventory, vendor None if it isn't there
+    """
+    for top in sorted(p for p in config_root.iterdir() if p.is_dir()):
+        children = list(top.iterdir())
+        subdirs = sorted(p for p in children if p.is_dir())
+        if subdirs or not children:
+            for host_dir in subdirs:
+                yield top.name, host_dir.name, host_dir
+            continue
+        device = find_device(top.name)
+        yield (device["vendor"] if device else None), top.name, top
+
+
+def import_all(config_root: Path = CONFIG_ROOT) -> dict:
+    """
+    Ingest every device folder under ansible/configs (see _device_dirs).
+    Old-style folders of hosts not in the inventory are skipped.
+    """
+    devices = revisions = 0
+    skipped = []
+    if not config_root.is_dir():
+        return {"devices": 0, "revisions": 0, "skipped": skipped}
+    for vendor, host, folder in _device_dirs(config_root):
+        if vendor is None:
+            skipped.append(host)
+            continue
+        with _device_lock(vendor, host):
+            revisions += len(get_store(vendor, host).sync(folder))
+        devices += 1
+    return {"devices": devices, "revisions": revisions, "skipped": skipped}
+
+
+def _dir_bytes(path: Path) -> int:
+    seen, total = set(), 0
+    for p in path.rglob("*"):
+        if p.is_file():
+            st = p.stat()
+            if (st.st_dev, st.st_ino) not in seen:  # count hard links once
+                seen.add((st.st_dev, st.st_ino))
+                total += st.st_size
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.backup_store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="ingest existing ansible/configs backups")
+    imp.add_argument("--configs", type=Path, default=CONFIG_ROOT)
+    sub.add_parser("stats", help="raw tree vs store size")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        if not args.configs.is_dir():
+            print(f"⚠️  No backup folder at {args.configs}")
+            return
+        stats = import_all(args.configs.resolve())
+        print(f"📦 Imported {stats['revisions']} new revisions from {stats['devices']} devices")
+        if stats["skipped"]:
+            print(f"⚠️  Not in the inventory (vendor unknown), skipped: {', '.join(stats['skipped'])}")
+    elif args.command == "stats":
+        raw = _dir_bytes(CONFIG_ROOT) if CONFIG_ROOT.is_dir() else 0
+        stored = _dir_bytes(store_root()) if store_root().is_dir() else 0
+        print(f"raw backups (hard links counted once): {raw:,} bytes")
+        print(f"store (index + objects):               {stored:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
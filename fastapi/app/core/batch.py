@@ -0,0 +1,50 @@
+# fastapi/app/core/batch.py
+
+from app.core.jobs import ERROR, REJECTED
+from app.core.settings import get_settings
+
+
+def forks_for(vendor: str) -> int:
+    cfg = get_settings()["batch"]
+    return cfg["vendor_forks"].get(vendor, cfg["forks"])
+
+
+def group_by_vendor(devices: list[dict]) -> dict:
+    by_vendor = {}
+    for d in devices:
+        by_vendor.setdefault(d["vendor"], []).append(d["id"])
+    return dict(sorted(by_vendor.items()))
+
+
+def summarize(results: dict) -> dict:
+    """
+    Overall status/counts for {host: result_dict}: success only if every host succeeded.
+    """
+    succeeded = sum(1 for r in results.values() if r.get("status") == "success")
+    if results and succeeded == len(results):
+        status = "success"
+    elif succeeded:
+        status = "partial"
+    else:
+        status = "fail"
+    return {
+        "status": status,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+    }
+
+
+def job_results(job) -> dict:
+    """
+    {host: result_dict} of a finished batch job. A job that raised or was
+    rejected (device busy) gives every one of its hosts that error.
+    """
+    if job.status in (ERROR, REJECTED):
+        status = "error" if job.status == ERROR else "busy"
+        return {
+            host: {"status": status, "message": job.error, "vendor": job.vendor, "device_id": host}
+            for host in job.device_id.split(",")
+        }
+    return job.result
+
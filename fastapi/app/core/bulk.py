@@ -0,0 +1,262 @@
+# fastapi/app/core/bulk.py
+#
+# Bulk runs: one operation (ping / uptime / backup) over a vendor, a group or
+# an explicit selection of devices. This is the one fan-out path: the
+# devices page (POST /bulk/<operation>), POST /ping/run-batch and
+# /backup/run-batch, and the scheduler all start bulk runs.
+#
+#   - each vendor's devices are split into chunks of bulk.chunk_size hosts;
+#     a chunk is one batch job in the job engine (one ansible-playbook run),
+#     with at most bulk.parallel chunks of a bulk run in flight, vendors
+#     taking turns
+#   - results are recorded per device as their chunk finishes, so
+#     GET /bulk/<id>/?since=N (polling) and /bulk/<id>/stream (SSE) show
+#     progress while the rest of the selection is still running
+#   - ping with the native engine runs as sweeps of bulk.chunk_size hosts,
+#     as many at once as ping.concurrency allows, so it reports progress
+#     per chunk too; uptime / ping results still fresh in the result cache
+#     are reused unless fresh=1
+
+import asyncio
+import itertools
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from app.core.batch import forks_for, group_by_vendor, job_results, summarize
+from app.core.jobs import get_job_manager
+from app.core.operations import (
+    BACKUP_PLAYBOOKS,
+    UPTIME_PLAYBOOKS,
+    backup_batch_job,
+    ping_batch_job,
+    ping_sweep,
+    uptime_batch_job,
+)
+from app.core.result_cache import get_result_cache
+from app.core.settings import get_settings
+
+# operation -> (batch job function, vendors it supports or None for all)
+OPERATIONS = {
+    "ping": (ping_batch_job, None),
+    "uptime": (uptime_batch_job, UPTIME_PLAYBOOKS),
+    "backup": (backup_batch_job, BACKUP_PLAYBOOKS),
+}
+
+# Bulk run states
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+
+class BulkRun:
+    """
+    One operation over many devices. `results` fills up per device
+    (in completion order, see `order`) while the run goes on.
+    """
+
+    def __init__(self, operation: str, devices: list[dict], scope: dict, source: str = "api"):
+        self.id = uuid.uuid4().hex[:12]
+        self.operation = operation
+        self.scope = scope  # the selection it was started with
+        self.source = source
+        self.status = RUNNING
+        self.created_at = datetime.now()
+        self.finished_at = None
+        self.error = None
+        self.devices = {d["id"]: d["vendor"] for d in devices}
+        self.unsupported = []
+        self.jobs = []  # job ids of the chunks
+        self.results = {}
+        self.order = []  # hosts in the order their results came in
+        self._changed = asyncio.Event()
+        self._task = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, ERROR)
+
+    def add(self, results: dict):
+        for host, result in results.items():
+            if host in self.devices and host not in self.results:
+                self.results[host] = result
+                self.order.append(host)
+        self._notify()
+
+    def _notify(self):
+        # Wake every follower: set the current event and start a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def progress(self) -> dict:
+        done = len(self.results)
+        succeeded = sum(1 for r in self.results.values() if r.get("status") == "success")
+        total = len(self.devices)
+        return {
+            "total": total,
+            "done": done,
+            "succeeded": succeeded,
+            "failed": done - succeeded,
+            "pending": total - done,
+            "percent": round(100 * done / total) if total else 100,
+        }
+
+    async def follow(self):
+        """
+        Yield (host, result) from the first result on, then live, until the
+        run finishes.
+        """
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < len(self.order):
+                host = self.order[sent]
+                sent += 1
+                yield host, self.results[host]
+            if self.finished:
+                return
+            await changed.wait()
+
+    async def wait(self):
+        """
+        Wait until the run is over, however it ends.
+        """
+        await asyncio.wait({self._task})
+
+    def summary(self) -> dict:
+        """
+        Batch-style summary of a finished run: status/total/succeeded/failed
+        plus bulk_id, jobs, unsupported and all the results.
+        """
+        return {
+            **summarize(self.results),
+            "bulk_id": self.id,
+            "jobs": self.jobs,
+            "unsupported": self.unsupported,
+            "results": self.results,
+        }
+
+    def to_dict(self, since: int | None = 0) -> dict:
+        """
+        since: include the results after the first `since` ones (cursor:
+        "next" of the previous poll); None leaves the results out.
+        """
+        data = {
+            "bulk_id": self.id,
+            "operation": self.operation,
+            "scope": self.scope,
+            "source": self.source,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(timespec="seconds"),
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+            "progress": self.progress(),
+            "unsupported": self.unsupported,
+            "jobs": self.jobs,
+            "next": len(self.order),
+        }
+        if self.finished:
+            data["outcome"] = summarize(self.results)["status"]
+            data["error"] = self.error
+        if since is not None:
+            data["results"] = {host: self.results[host] for host in self.order[since:]}
+        return data
+
+
+def _chunks(by_vendor: dict, size: int) -> list[tuple[str, list[str]]]:
+    # round-robin over vendors so one big vendor doesn't hold the others back
+    per_vendor = [
+        [(vendor, hosts[i:i + size]) for i in range(0, len(hosts), size)]
+        for vendor, hosts in by_vendor.items()
+    ]
+    return [c for c in itertools.chain.from_iterable(itertools.zip_longest(*per_vendor)) if c]
+
+
+async def _execute(run: BulkRun, devices: list[dict], fresh: bool):
+    cfg = get_settings()["bulk"]
+    try:
+        if run.operation in ("ping", "uptime") and not fresh:
+            cache = get_result_cache()
+            cached = {d["id"]: cache.get(run.operation, d["id"]) for d in devices}
+            run.add({host: result for host, result in cached.items() if result})
+            devices = [d for d in devices if d["id"] not in run.results]
+
+        size = cfg["chunk_size"]
+        if run.operation == "ping" and get_settings()["ping"]["engine"] == "native":
+            # no playbook, no vendor split: the sweeps share ping.concurrency
+            limit = asyncio.Semaphore(max(1, get_settings()["ping"]["concurrency"] // size))
+
+            async def sweep(chunk: list[dict]):
+                async with limit:
+                    run.add(await ping_sweep(chunk, source=run.source))
+
+            await asyncio.gather(*(sweep(devices[i:i + size]) for i in range(0, len(devices), size)))
+        else:
+            batch_fn, _ = OPERATIONS[run.operation]
+            manager = get_job_manager()
+            limit = asyncio.Semaphore(cfg["parallel"])
+
+            async def chunk(vendor: str, hosts: list[str]):
+                async with limit:
+                    job = manager.submit(
+                        f"{run.operation}_batch", ",".join(hosts), vendor,
+                        batch_fn, hosts, vendor, forks_for(vendor), source=run.source,
+                    )
+                    run.jobs.append(job.id)
+                    await job.wait()
+                run.add(job_results(job))
+
+            chunks = _chunks(group_by_vendor(devices), size)
+            await asyncio.gather(*(chunk(vendor, hosts) for vendor, hosts in chunks))
+        run.status = DONE
+    except asyncio.CancelledError:
+        run.status = ERROR
+        run.error = "cancelled (app shutting down)"
+        raise
+    except Exception as exc:
+        run.status = ERROR
+        run.error = f"{type(exc).__name__}: {exc}"
+        print(f"❌ Bulk {run.operation} {run.id} failed: {run.error}")
+    finally:
+        run.finished_at = datetime.now()
+        run._notify()
+        p = run.progress()
+        print(f"📦 Bulk {run.operation} {run.id}: {p['succeeded']}/{p['total']} succeeded")
+
+
+# ---------------------------
+# Registry
+# ---------------------------
+
+_runs = OrderedDict()
+
+
+def _prune():
+    keep = get_settings()["bulk"]["keep_finished"]
+    finished = [bid for bid, r in _runs.items() if r.finished]
+    for bid in finished[: max(0, len(finished) - keep)]:
+        del _runs[bid]
+
+
+def start_bulk(operation: str, devices: list[dict], scope: dict, fresh: bool = False, source: str = "api") -> BulkRun:
+    """
+    Start a bulk run in the background (call from the event loop).
+    Devices of vendors the operation has no playbook for are listed in
+    `unsupported` and not counted.
+    """
+    _, supported = OPERATIONS[operation]
+    run_devices = [d for d in devices if supported is None or d["vendor"] in supported]
+    run = BulkRun(operation, run_devices, scope, source)
+    run.unsupported = [d["id"] for d in devices if d not in run_devices]
+
+    _prune()
+    _runs[run.id] = run
+    run._task = asyncio.get_running_loop().create_task(_execute(run, run_devices, fresh))
+    return run
+
+
+def get_bulk(bulk_id: str) -> BulkRun | None:
+    return _runs.get(bulk_id)
+
+
+def recent_bulks(limit: int = 20) -> list[BulkRun]:
+    return list(reversed(_runs.values()))[:limit]
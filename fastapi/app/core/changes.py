@@ -0,0 +1,228 @@
+# fastapi/app/core/changes.py
+#
+# Config change events.
+#
+# When a backup is stored, its normalized hash (backup_store.config_hash:
+# volatile header lines dropped) is compared with the previous revision's.
+# Only when it differs is a change event emitted:
+#   - the diff goes to logs/diff/<vendor>/<host>/<backup timestamp>.diff
+#   - a row goes to the `changes` table (app/db.py), one per revision
+# so a nightly fleet backup leaves a compact "what changed" feed
+# (GET /backup/changes/) instead of needing a diff call per device.
+#
+# Changes between revisions that were stored before this existed:
+#   cd fastapi && python -m app.core.changes backfill [--days 30]
+
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from app.core.backup_store import get_store, import_all, store_root
+from app.core.config_diff import ConfigDiff, DiffFile, page_lines
+from app.core.history import LOG_TS_FORMAT, LOGS_ROOT, record_runs
+from app.db import ChangeRecord, get_session
+
+DIFF_LOG_ROOT = LOGS_ROOT / "diff"
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat(timespec="seconds") if value else None
+
+
+def change_to_dict(rec: ChangeRecord) -> dict:
+    return {
+        "id": rec.id,
+        "host": rec.host,
+        "vendor": rec.vendor,
+        "detected_at": _iso(rec.detected_at),
+        "backup_time": _iso(rec.backup_time),
+        "from_rev": rec.from_rev,
+        "to_rev": rec.to_rev,
+        "from_backup": rec.from_backup,
+        "to_backup": rec.to_backup,
+        "from_hash": rec.from_hash,
+        "to_hash": rec.to_hash,
+        "mode": rec.mode,
+        "summary": {
+            "sections_added": rec.sections_added,
+            "sections_removed": rec.sections_removed,
+            "sections_changed": rec.sections_changed,
+            "lines_added": rec.lines_added,
+            "lines_removed": rec.lines_removed,
+        },
+        "diff_path": rec.diff_path,
+        "source": rec.source,
+    }
+
+
+def _find(session, vendor: str, host: str, rev: int) -> ChangeRecord | None:
+    return session.query(ChangeRecord).filter_by(vendor=vendor, host=host, to_rev=rev).first()
+
+
+# ---------------------------
+# Detection
+# ---------------------------
+
+def emit_change(vendor: str, host: str, old, new, source: str = "api") -> dict | None:
+    """
+    Diff two stored revisions (backup_store.Revision) and record the change.
+    Returns the change, or None when nothing but ordering / volatile lines
+    differ. Already recorded revisions are returned as they are.
+    """
+    with get_session() as session:
+        existing = _find(session, vendor, host, new.rev)
+        if existing:
+            return change_to_dict(existing)
+
+    diff = ConfigDiff.between(vendor, old, new)
+    diff_path = DIFF_LOG_ROOT / vendor / host / f"{new.time.strftime(LOG_TS_FORMAT)}.diff"
+    with DiffFile(diff_path) as sink:
+        _, total = page_lines(diff.lines(fromfile=old.name, tofile=new.name), 0, 0, sink=sink)
+    if not total:
+        return None
+
+    row = {
+        "host": host,
+        "vendor": vendor,
+        "detected_at": datetime.now(),
+        "backup_time": new.time,
+        "from_rev": old.rev,
+        "to_rev": new.rev,
+        "from_hash": old.hash,
+        "to_hash": new.hash,
+        "from_backup": old.name,
+        "to_backup": new.name,
+        "mode": diff.mode,
+        "diff_path": str(diff_path),
+        "source": source,
+        **diff.stats,
+    }
+    with get_session() as session:
+        # a concurrent detection of the same revision wins: keep its row
+        # (a Core insert on the table: ORM inserts don't report a rowcount)
+        inserted = session.execute(
+            insert(ChangeRecord.__table__).on_conflict_do_nothing(index_elements=["vendor", "host", "to_rev"]), row
+        ).rowcount
+        session.commit()
+        rec = _find(session, vendor, host, new.rev)
+    if not inserted:
+        return change_to_dict(rec)
+
+    record_runs("diff", [{
+        "status": "changes",
+        "vendor": vendor,
+        "device_id": host,
+        "logfile": rec.diff_path,
+        "message": f"{old.name} -> {new.name}",
+    }], started_at=new.time, source=source)
+    print(f"📝 Config change on {vendor}/{host}: r{old.rev} -> r{new.rev} ({total} diff lines)")
+    return change_to_dict(rec)
+
+
+def detect_change(vendor: str, host: str, revision, source: str = "api") -> dict | None:
+    """
+    Called after a backup is stored: emit a change event if the revision's
+    hash differs from the one before it (never for a device's first backup).
+    """
+    if not revision.changed or revision.rev == 1:
+        return None
+    previous = get_store(vendor, host).get(revision.rev - 1)
+    if previous is None:
+        return None
+    return emit_change(vendor, host, previous, revision, source)
+
+
+def backfill(since: datetime | None = None) -> dict:
+    """
+    Emit the change events for every stored changed revision (taken at or
+    after `since`). Raw backups not in the store yet are imported first.
+    """
+    import_all()
+    devices = changes = 0
+    root = store_root()
+    if not root.exists():
+        return {"devices": 0, "changes": 0}
+    for vendor_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        for host_dir in sorted(p for p in vendor_dir.iterdir() if p.is_dir()):
+            vendor, host = vendor_dir.name, host_dir.name
+            revisions = get_store(vendor, host).revisions()
+            with get_session() as session:
+                recorded = {rev for (rev,) in session.query(ChangeRecord.to_rev).filter_by(vendor=vendor, host=host)}
+            devices += 1
+            for old, new in zip(revisions, revisions[1:]):
+                if not new.changed or new.rev in recorded or (since and new.time < since):
+                    continue
+                if emit_change(vendor, host, old, new, source="backfill"):
+                    changes += 1
+    return {"devices": devices, "changes": changes}
+
+
+# ---------------------------
+# Feed
+# ---------------------------
+
+def query_changes(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    host: str | None = None,
+    vendor: str | None = None,
+    limit: int = 200,
+    offset: int = 0,
+) -> tuple[list[dict], int]:
+    """
+    Changes by backup time, newest first: (page, total matching).
+    """
+    with get_session() as session:
+        q = session.query(ChangeRecord)
+        if since:
+            q = q.filter(ChangeRecord.backup_time >= since)
+        if until:
+            q = q.filter(ChangeRecord.backup_time < until)
+        if host:
+            q = q.filter(ChangeRecord.host == host)
+        if vendor:
+            q = q.filter(ChangeRecord.vendor == vendor)
+        total = q.count()
+        rows = q.order_by(ChangeRecord.backup_time.desc(), ChangeRecord.id.desc()).offset(offset).limit(limit).all()
+        return [change_to_dict(r) for r in rows], total
+
+
+def changed_hosts(since: datetime | None = None, vendor: str | None = None) -> dict:
+    """
+    {vendor: number of distinct hosts that changed} for the feed summary.
+    """
+    with get_session() as session:
+        q = session.query(ChangeRecord.vendor, func.count(func.distinct(ChangeRecord.host)))
+        if since:
+            q = q.filter(ChangeRecord.backup_time >= since)
+        if vendor:
+            q = q.filter(ChangeRecord.vendor == vendor)
+        return dict(q.group_by(ChangeRecord.vendor).all())
+
+
+def get_change(change_id: int) -> dict | None:
+    with get_session() as session:
+        rec = session.get(ChangeRecord, change_id)
+        return change_to_dict(rec) if rec else None
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.changes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bf = sub.add_parser("backfill", help="record change events for revisions already in the backup store")
+    bf.add_argument("--days", type=float, help="only backups from the last N days")
+    args = parser.parse_args(argv)
+
+    since = datetime.now() - timedelta(days=args.days) if args.days else None
+    result = backfill(since)
+    print(f"✅ {result['changes']} change events recorded over {result['devices']} devices")
+
+
+if __name__ == "__main__":
+    main()
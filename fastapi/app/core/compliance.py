@@ -0,0 +1,351 @@
+# fastapi/app/core/compliance.py
+#
+# Fleet-wide compliance / drift scan over the latest backup of every device.
+#
+#   - rules come from config/compliance.yml (required / forbidden regex,
+#     section-scoped checks, golden templates)
+#   - the latest revision of each device comes from the backup store; its
+#     config hash is the cache key, so a device whose config didn't change
+#     since the last scan isn't even decompressed, let alone re-evaluated
+#   - the remaining devices are evaluated on a process pool (spawned, never
+#     forked from the threaded app process); the rules go to each worker
+#     once, through the pool initializer
+#   - the cache keeps the results the last scan of each device used, nothing
+#     older; it and the last report live under data/compliance/, shared by
+#     the API and the CLI:
+#       cd fastapi && python -m app.core.compliance scan [--vendor Cisco]
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import yaml
+
+from app.core.backup_store import sync_device, volatile_pattern
+from app.core.config_diff import PARSERS
+from app.core.devices_loader import get_inventory, select_devices
+from app.core.settings import ROOT_DIR, get_settings
+
+CONFIG_DIR = ROOT_DIR / "config"
+SEVERITIES = ("critical", "warning", "info")
+
+_lock = threading.Lock()
+_last_report = None
+
+
+def _settings() -> dict:
+    return get_settings()["compliance"]
+
+
+def _data_dir():
+    path = ROOT_DIR / _settings()["data_dir"]
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+# ---------------------------
+# Rules
+# ---------------------------
+
+def load_rules(path=None) -> list[dict]:
+    """
+    Rules from compliance.yml, checked and with golden templates read in
+    (so workers get everything they need when they start).
+    """
+    path = path or ROOT_DIR / _settings()["rules"]
+    with open(path, "r") as f:
+        data = yaml.safe_load(f) or {}
+
+    rules = []
+    for rule in data.get("rules", []):
+        if "id" not in rule:
+            raise ValueError(f"{path}: every rule needs an id ({rule})")
+        if not any(k in rule for k in ("require", "forbid", "golden")):
+            raise ValueError(f"{path}: rule {rule['id']} has nothing to check")
+        rule = dict(rule)
+        rule.setdefault("severity", "warning")
+        if rule["severity"] not in SEVERITIES:
+            raise ValueError(f"{path}: rule {rule['id']} severity must be one of {SEVERITIES}")
+        for pattern in _as_list(rule.get("require")) + _as_list(rule.get("forbid")) + _as_list(rule.get("section")):
+            re.compile(pattern)  # fail on load, not in a worker
+        if rule.get("golden"):
+            rule["golden_text"] = (CONFIG_DIR / rule["golden"]).read_text()
+        rules.append(rule)
+    return rules
+
+
+def rules_digest(rules: list[dict]) -> str:
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
+
+# ---------------------------
+# Evaluation (runs in the worker processes)
+# ---------------------------
+
+def _config_lines(vendor: str, text: str) -> list[str]:
+    volatile = volatile_pattern(vendor)
+    lines = []
+    for line in text.splitlines():
+        if volatile and volatile.match(line):
+            continue
+        line = line.strip()
+        if line and not line.startswith(("!", "#")):
+            lines.append(line)
+    return lines
+
+
+def _check(rule: dict, lines: list[str], where: str = "") -> list[dict]:
+    failures = []
+    for pattern in _as_list(rule.get("require")):
+        regex = re.compile(pattern)
+        if not any(regex.search(line) for line in lines):
+            failures.append({"check": "require", "pattern": pattern, "where": where})
+    for pattern in _as_list(rule.get("forbid")):
+        regex = re.compile(pattern)
+        found = [line for line in lines if regex.search(line)]
+        if found:
+            failures.append({"check": "forbid", "pattern": pattern, "where": where, "lines": found[:5]})
+    return failures
+
+
+def _check_golden(vendor: str, rule: dict, sections: dict) -> list[dict]:
+    parser = PARSERS.get(vendor)
+    missing = []
+    if parser:
+        for section, entries in parser(rule["golden_text"], vendor).items():
+            have = sections.get(section)
+            if have is None:
+                missing.append(section)
+                continue
+            missing.extend(f"{section} / {key}" for key in entries if key not in have)
+    else:
+        have = set(_config_lines(vendor, "\n".join(sections)))
+        missing = [line for line in _config_lines(vendor, rule["golden_text"]) if line not in have]
+    if not missing:
+        return []
+    return [{"check": "golden", "template": rule["golden"], "missing": missing[:20], "missing_count": len(missing)}]
+
+
+def evaluate(vendor: str, text: str, rules: list[dict]) -> list[dict]:
+    """
+    Failed rules for one config: [{rule, severity, description, failures: [...]}].
+    """
+    lines = _config_lines(vendor, text)
+    parser = PARSERS.get(vendor)
+    sections = parser(text, vendor) if parser else None
+
+    failed = []
+    for rule in rules:
+        vendors = rule.get("vendors")
+        if vendors and vendor not in vendors:
+            continue
+
+        failures = []
+        if rule.get("section"):
+            header = re.compile(rule["section"])
+            matched = [s for s in (sections or {}) if header.search(s)]
+            if not matched and rule.get("section_required"):
+                failures.append({"check": "section", "pattern": rule["section"], "where": ""})
+            for section in matched:
+                scope = [k.strip() for k in sections[section]]
+                failures.extend(_check(rule, scope, where=section))
+        else:
+            failures.extend(_check(rule, lines))
+
+        if rule.get("golden"):
+            failures.extend(_check_golden(vendor, rule, sections if parser else {line: {} for line in lines}))
+
+        if failures:
+            failed.append({
+                "rule": rule["id"],
+                "severity": rule["severity"],
+                "description": rule.get("description", ""),
+                "failures": failures,
+            })
+    return failed
+
+
+_worker_rules = None
+
+
+def _init_worker(rules: list[dict]):
+    global _worker_rules
+    _worker_rules = rules
+
+
+def _evaluate_task(task):
+    host, vendor, text = task
+    return host, evaluate(vendor, text, _worker_rules)
+
+
+# ---------------------------
+# Cache
+# ---------------------------
+
+def _load_cache(digest: str) -> tuple[dict, dict]:
+    """
+    (results by "<vendor>:<config hash>", the key each device's last scan
+    used) for these rules; empty when the rules changed.
+    """
+    path = _data_dir() / "cache.json"
+    if path.exists():
+        data = json.loads(path.read_text())
+        if data.get("rules_digest") == digest:
+            return data["results"], data.get("hosts", {})
+    return {}, {}
+
+
+def _save_json(name: str, data: dict):
+    # the API and the CLI may save at the same time: each writes its own temp file
+    path = _data_dir() / name
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, prefix=f".{path.stem}.", suffix=".tmp", delete=False) as tmp:
+        tmp.write(json.dumps(data))
+    os.replace(tmp.name, path)
+
+
+# ---------------------------
+# Scan
+# ---------------------------
+
+def scan(vendor: str | None = None, group: str | None = None, workers: int | None = None, rules_path=None) -> dict:
+    """
+    Evaluate the rules against the latest backup of every selected device.
+    Blocking: call via asyncio.to_thread from the API.
+    """
+    global _last_report
+    start = time.perf_counter()
+    cfg = _settings()
+    rules = load_rules(rules_path)
+    digest = rules_digest(rules)
+
+    if vendor or group:
+        devices, _ = select_devices(vendor=vendor, group=group)
+    else:
+        devices = get_inventory().devices
+
+    with _lock:
+        cache, host_keys = _load_cache(digest)
+        results, tasks, no_backup = {}, [], []
+        pending = {}
+
+        for d in devices:
+            store = sync_device(d["vendor"], d["id"])
+            latest = store.latest(1) if store else []
+            if not latest:
+                no_backup.append(d["id"])
+                continue
+            rev = latest[0]
+            key = host_keys[d["id"]] = f"{d['vendor']}:{rev.hash}"
+            base = {"vendor": d["vendor"], "revision": rev.rev, "backup": rev.name, "hash": rev.hash}
+            if key in cache:
+                results[d["id"]] = {**base, "failed": cache[key], "cached": True}
+            else:
+                pending[d["id"]] = (key, base)
+                tasks.append((d["id"], d["vendor"], rev.read_text()))
+
+        n_workers = workers or cfg["workers"]
+        if len(tasks) >= cfg["min_parallel"] and n_workers > 1:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=n_workers, mp_context=ctx, initializer=_init_worker, initargs=(rules,)
+            ) as pool:
+                evaluated = list(pool.map(_evaluate_task, tasks, chunksize=4))
+        else:
+            evaluated = [(host, evaluate(v, text, rules)) for host, v, text in tasks]
+
+        for host, failed in evaluated:
+            key, base = pending[host]
+            cache[key] = failed
+            results[host] = {**base, "failed": failed, "cached": False}
+
+        # keep what each device's latest scan used; devices gone from the
+        # inventory drop out
+        in_inventory = get_inventory().by_id
+        host_keys = {h: k for h, k in host_keys.items() if h in in_inventory}
+        used = set(host_keys.values())
+        cache = {k: v for k, v in cache.items() if k in used}
+        _save_json("cache.json", {"rules_digest": digest, "results": cache, "hosts": host_keys})
+
+        by_rule = {}
+        for host, r in results.items():
+            r["compliant"] = not r["failed"]
+            for f in r["failed"]:
+                entry = by_rule.setdefault(f["rule"], {"severity": f["severity"], "devices": []})
+                entry["devices"].append(host)
+
+        compliant = sum(1 for r in results.values() if r["compliant"])
+        report = {
+            "status": "success",
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "rules_digest": digest,
+            "rules": len(rules),
+            "scope": {"vendor": vendor, "group": group},
+            "devices": len(devices),
+            "checked": len(results),
+            "compliant": compliant,
+            "non_compliant": len(results) - compliant,
+            "no_backup": no_backup,
+            "evaluated": len(tasks),
+            "cached": len(results) - len(tasks),
+            "duration_ms": round((time.perf_counter() - start) * 1000),
+            "by_rule": by_rule,
+            "results": results,
+        }
+        _save_json("report.json", report)
+        _last_report = report
+    return report
+
+
+def last_report() -> dict | None:
+    global _last_report
+    if _last_report is None:
+        path = _data_dir() / "report.json"
+        if path.exists():
+            _last_report = json.loads(path.read_text())
+    return _last_report
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.compliance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sc = sub.add_parser("scan", help="check the latest backups against the rules")
+    sc.add_argument("--vendor")
+    sc.add_argument("--group")
+    sc.add_argument("--workers", type=int)
+    sc.add_argument("--rules", help="rules file (default from settings compliance.rules)")
+    sc.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = scan(args.vendor, args.group, args.workers, args.rules)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"🔎 {report['checked']} devices checked against {report['rules']} rules "
+          f"({report['evaluated']} evaluated, {report['cached']} cached) in {report['duration_ms']} ms")
+    print(f"✅ compliant: {report['compliant']}   ❌ non-compliant: {report['non_compliant']}   "
+          f"⚠️  no backup: {len(report['no_backup'])}")
+    for rule, entry in sorted(report["by_rule"].items()):
+        print(f"  [{entry['severity']}] {rule}: {len(entry['devices'])} devices - {', '.join(sorted(entry['devices']))}")
+
+
+if __name__ == "__main__":
+    main()
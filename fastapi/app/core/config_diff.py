@@ -0,0 +1,338 @@
+# fastapi/app/core/config_diff.py
+#
+# Section-aware config diff for /backup/diff.
+#
+# Instead of a line-by-line unified diff over whole files:
+#   - Cisco configs are parsed hierarchically with netcommon's NetworkConfig
+#     (from ansible/collections); each top-level line ("interface Gi0/1",
+#     "ip access-list extended X" ...) is a section holding its child lines
+#   - Junos `display set` output is grouped by the first two words after
+#     the verb ("interfaces ge-0/0/0", "system services" ...)
+#   - inside a section lines are compared as sets, so reordered ACL / set
+#     lines are not changes, and every section carries an order-independent
+#     hash so unchanged sections are skipped without comparing their lines
+#   - the vendor's volatile lines (backup_store.VOLATILE_LINES) are dropped
+#
+# Other vendors get a plain unified diff. Either way the diff is a generator
+# of text lines: the route pages through it and writes it to the log file
+# without ever holding the whole diff in memory.
+#
+# Parsed snapshots are kept in an LRU cache keyed by config hash, so
+# comparing the same revisions again (or the same config on two dates)
+# neither re-reads nor re-parses anything.
+
+import difflib
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+from app.core.backup_store import volatile_pattern
+from app.core.settings import ROOT_DIR, get_settings
+
+COLLECTIONS_DIR = ROOT_DIR / "ansible" / "collections"
+JUNOS_VERBS = ("set", "delete", "deactivate", "activate", "protect", "unprotect")
+
+_network_config = None
+
+
+def _network_config_class():
+    """
+    netcommon's NetworkConfig, or None if it can't be imported (no ansible-core).
+    """
+    global _network_config
+    if _network_config is None:
+        if str(COLLECTIONS_DIR) not in sys.path:
+            sys.path.append(str(COLLECTIONS_DIR))
+        try:
+            from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import (
+                NetworkConfig,
+            )
+        except ImportError as exc:
+            print(f"⚠️  netcommon NetworkConfig unavailable, using the built-in section parser: {exc}")
+            _network_config = False
+        else:
+            _network_config = NetworkConfig
+    return _network_config or None
+
+
+# ---------------------------
+# Parsing into sections
+# ---------------------------
+#
+# A parsed config is {section: {entry_key: display_line}}; dicts keep the
+# config's own order for output, lookups are O(1). Repeated lines (ACL
+# remarks, duplicate set lines) each get an entry: the n-th copy of a key
+# is keyed "<key>\x00<n>", so dropping one copy is a change.
+
+def _add(entries: dict, counts: dict, key: str, display: str):
+    n = counts.get(key, 0) + 1
+    counts[key] = n
+    entries[key if n == 1 else f"{key}\x00{n}"] = display
+
+
+def _drop_volatile(vendor: str, text: str) -> list[str]:
+    volatile = volatile_pattern(vendor)
+    lines = text.splitlines()
+    if volatile:
+        lines = [line for line in lines if not volatile.match(line)]
+    return lines
+
+
+def parse_cisco(text: str, vendor: str = "Cisco") -> dict:
+    lines = _drop_volatile(vendor, text)
+    NetworkConfig = _network_config_class()
+    sections = {}
+
+    if NetworkConfig is None:
+        # Indentation only: top-level line starts a section, indented lines belong to it
+        current = counts = None
+        for line in lines:
+            text_ = line.strip()
+            if not text_ or text_.startswith("!") or text_ == "end":
+                continue
+            if line[0].isspace() and current is not None:
+                _add(current, counts, text_, line.rstrip())
+            else:
+                current = sections.setdefault(text_, {})
+                counts = {}
+        return sections
+
+    counts = {}
+    for item in NetworkConfig(indent=1, contents="\n".join(lines)).items:
+        parents = item._parents  # built once per line, not per use
+        if not parents:
+            sections.setdefault(item.text, {})
+            continue
+        # key: path below the section ("ip address 10.0.0.1 ..." or "address-family ipv4 network ...")
+        path = [p.text for p in parents[1:]]
+        path.append(item.text)
+        display = "  " * len(parents) + item.text
+        section = parents[0].text
+        _add(sections.setdefault(section, {}), counts.setdefault(section, {}), " ".join(path), display)
+    return sections
+
+
+def parse_junos_set(text: str, vendor: str = "Juniper") -> dict:
+    sections = {}
+    counts = {}
+    for line in _drop_volatile(vendor, text):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        words = line.split()
+        if words[0] in JUNOS_VERBS:
+            section = " ".join(words[1:3])
+        else:
+            section = words[0]
+        _add(sections.setdefault(section, {}), counts.setdefault(section, {}), line, line)
+    return sections
+
+
+PARSERS = {
+    "Cisco": parse_cisco,
+    "Juniper": parse_junos_set,
+}
+
+
+class ParsedCache:
+    """
+    Small thread-safe LRU: (vendor, config hash) -> parsed sections.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+        value = load()  # parse outside the lock
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "max_size": self.size, "hits": self.hits, "misses": self.misses}
+
+
+_parsed_cache = None
+
+
+def parsed_cache() -> ParsedCache:
+    global _parsed_cache
+    if _parsed_cache is None:
+        _parsed_cache = ParsedCache(get_settings()["backups"]["parsed_cache_size"])
+    return _parsed_cache
+
+
+def parsed_revision(vendor: str, revision) -> dict:
+    """
+    Sections of a stored revision (backup_store.Revision), from the cache when possible.
+    Same hash = same config without volatile lines = same parse.
+    """
+    return parsed_cache().get(
+        (vendor, revision.hash), lambda: PARSERS[vendor](revision.read_text(), vendor)
+    )
+
+
+def section_digest(entries: dict) -> bytes:
+    """
+    Order-independent hash of a section's entries (repeated lines count:
+    their keys carry the copy number, see _add).
+    """
+    return hashlib.sha1("\n".join(sorted(entries)).encode()).digest()
+
+
+# ---------------------------
+# Diff
+# ---------------------------
+
+class ConfigDiff:
+    """
+    Semantic diff of two configs of one vendor. Iterate over lines() once;
+    `stats` is filled in as the lines are produced.
+
+    Output lines:
+        + <section>          section added (followed by its lines)
+        - <section>          section removed
+        @@ <section>         section changed, then "+ line" / "- line"
+    """
+
+    def __init__(self, vendor: str, old_text: str | None, new_text: str | None):
+        self.vendor = vendor
+        parser = PARSERS.get(vendor)
+        self.mode = "semantic" if parser else "unified"
+        self.stats = {
+            "sections_added": 0,
+            "sections_removed": 0,
+            "sections_changed": 0,
+            "lines_added": 0,
+            "lines_removed": 0,
+        }
+        if old_text is None:
+            return  # between(): parsed sections are filled in by the caller
+        if parser:
+            self._old = parser(old_text, vendor)
+            self._new = parser(new_text, vendor)
+        else:
+            self._old = _drop_volatile(vendor, old_text)
+            self._new = _drop_volatile(vendor, new_text)
+
+    @classmethod
+    def between(cls, vendor: str, old_rev, new_rev) -> "ConfigDiff":
+        """
+        Diff two stored revisions, using the parsed-snapshot cache.
+        """
+        if old_rev.hash == new_rev.hash:
+            # same normalized config: nothing to read or parse
+            diff = cls(vendor, None, None)
+            diff._old = diff._new = {} if diff.mode == "semantic" else []
+            return diff
+        if vendor not in PARSERS:
+            return cls(vendor, old_rev.read_text(), new_rev.read_text())
+        diff = cls(vendor, None, None)
+        diff._old = parsed_revision(vendor, old_rev)
+        diff._new = parsed_revision(vendor, new_rev)
+        return diff
+
+    def lines(self, fromfile: str = "old", tofile: str = "new"):
+        if self.mode == "unified":
+            yield from self._unified(fromfile, tofile)
+            return
+
+        old, new, stats = self._old, self._new, self.stats
+        for section, entries in new.items():
+            old_entries = old.get(section)
+            if old_entries is None:
+                stats["sections_added"] += 1
+                stats["lines_added"] += 1 + len(entries)
+                yield f"+ {section}"
+                for display in entries.values():
+                    yield f"+ {display}"
+                continue
+            if len(entries) == len(old_entries) and section_digest(entries) == section_digest(old_entries):
+                continue
+
+            removed = [d for k, d in old_entries.items() if k not in entries]
+            added = [d for k, d in entries.items() if k not in old_entries]
+            if not removed and not added:
+                continue
+            stats["sections_changed"] += 1
+            stats["lines_removed"] += len(removed)
+            stats["lines_added"] += len(added)
+            yield f"@@ {section}"
+            for display in removed:
+                yield f"- {display}"
+            for display in added:
+                yield f"+ {display}"
+
+        for section, entries in old.items():
+            if section not in new:
+                stats["sections_removed"] += 1
+                stats["lines_removed"] += 1 + len(entries)
+                yield f"- {section}"
+                for display in entries.values():
+                    yield f"- {display}"
+
+    def _unified(self, fromfile, tofile):
+        for line in difflib.unified_diff(self._old, self._new, fromfile=fromfile, tofile=tofile, lineterm=""):
+            if line.startswith("+") and not line.startswith("+++"):
+                self.stats["lines_added"] += 1
+            elif line.startswith("-") and not line.startswith("---"):
+                self.stats["lines_removed"] += 1
+            yield line
+
+
+def page_lines(lines, offset: int = 0, limit: int = 400, sink=None) -> tuple[list[str], int]:
+    """
+    Consume a line iterator once: return (lines[offset:offset+limit], total).
+    Every line is also written to `sink` (an open file) if given, so the full
+    diff reaches the log without being kept in memory.
+    """
+    shown = []
+    total = 0
+    for total, line in enumerate(lines, 1):
+        if sink is not None:
+            sink.write(line + "\n")
+        if offset < total <= offset + limit:
+            shown.append(line)
+    return shown, total
+
+
+class DiffFile:
+    """
+    page_lines() sink that creates the file on the first line written, so an
+    empty diff leaves no file behind. `written` tells whether it exists.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def written(self) -> bool:
+        return self._file is not None
+
+    def write(self, text: str):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w", errors="ignore")
+        self._file.write(text)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            self._file.close()
@@ -1,18 +1,28 @@
 # fastapi/app/core/devices_loader.py
 
+import hashlib
+import json
+import os
+import threading
+
 import yaml
 from pathlib import Path
 
+from app.core.settings import cache_dir
+
 # Project root: /home/abhiraj/Projects/device_assurance
 ROOT_DIR = Path(__file__).resolve().parents[3]
 
 # ansible inventory path (relative to project root)
 DEVICES_FILE = ROOT_DIR / "ansible" / "inventories" / "devices.yml"
 
+# libyaml's loader when PyYAML was built with it (several times faster)
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
-def load_devices():
+
+def _parse_devices(data: dict):
     """
-    Load devices from Ansible inventory into two lists:
+    Inventory YAML -> two lists:
       - branch (list of dicts)
       - core   (list of dicts)
 
@@ -25,14 +35,11 @@ def load_devices():
         "group": "branch"           # or "core"
     }
     """
-    with open(DEVICES_FILE, "r") as f:
-        data = yaml.safe_load(f)
-
     branch = []
     core = []
 
     # Navigate: all -> children -> {branch, core} -> hosts
-    groups = data.get("all", {}).get("children", {})
+    groups = (data or {}).get("all", {}).get("children", {})
 
     # ---------------------------
     # Branch devices
@@ -69,3 +76,166 @@ def load_devices():
         })
 
     return branch, core
+
+
+class Inventory:
+    """
+    Parsed devices.yml plus the lookups the routes need:
+
+      by_id            - device_id -> device (branch wins over core, as before)
+      by_vendor        - vendor -> [devices]
+      by_group         - "branch"/"core" -> [devices]
+      branch_sorted,
+      core_sorted      - sorted by display name (devices page)
+      branch_by_vendor - vendors A-Z -> sorted branch devices (devices page)
+
+    Treat it as read-only: the same instance is shared by every request
+    until devices.yml changes.
+    """
+
+    def __init__(self, branch: list, core: list, digest: str):
+        self.branch = branch
+        self.core = core
+        self.digest = digest
+
+        self.by_id = {d["id"]: d for d in core}
+        self.by_id.update({d["id"]: d for d in branch})
+
+        self.by_group = {"branch": branch, "core": core}
+        self.by_vendor = {}
+        for d in branch + core:
+            self.by_vendor.setdefault(d["vendor"], []).append(d)
+
+        self.branch_sorted = sorted(branch, key=lambda d: d["name"].lower())
+        self.core_sorted = sorted(core, key=lambda d: d["name"].lower())
+
+        branch_by_vendor = {}
+        for d in self.branch_sorted:
+            branch_by_vendor.setdefault(d.get("vendor", "Unknown"), []).append(d)
+        self.branch_by_vendor = dict(sorted(branch_by_vendor.items(), key=lambda x: x[0].lower()))
+
+    @property
+    def devices(self) -> list:
+        return self.branch + self.core
+
+
+_inventory = None
+_inventory_stat = None
+_inventory_lock = threading.Lock()
+
+
+def _parse_cached(raw: bytes, digest: str):
+    """
+    (branch, core) for devices.yml content, through a JSON file on disk
+    keyed by the content hash: the first worker process to start parses the
+    YAML, the others (and restarts) load the JSON. Plain data only, so a
+    tampered cache file can't run code the way a pickle could.
+    """
+    path = cache_dir("inventory") / "devices.json"
+    try:
+        with open(path, "rb") as f:
+            cached = json.load(f)
+        if cached["digest"] == digest:
+            return cached["branch"], cached["core"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    branch, core = _parse_devices(yaml.load(raw, Loader=YAML_LOADER))
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"digest": digest, "branch": branch, "core": core}, f)
+    os.replace(tmp, path)
+    return branch, core
+
+
+def _stat_key():
+    st = os.stat(DEVICES_FILE)
+    return st.st_mtime_ns, st.st_size
+
+
+def get_inventory() -> Inventory:
+    """
+    Parse devices.yml once and keep it in memory.
+
+    Every call does one os.stat(); the file is only re-read when its
+    mtime/size changed, and only re-parsed when the content hash changed
+    too (a plain `touch` or an identical re-save costs a read, not a parse).
+    Parses are shared between processes, see _parse_cached().
+    """
+    global _inventory, _inventory_stat
+
+    key = _stat_key()
+    if _inventory is not None and key == _inventory_stat:
+        return _inventory
+
+    with _inventory_lock:
+        if _inventory is not None and key == _inventory_stat:
+            return _inventory
+
+        raw = DEVICES_FILE.read_bytes()
+        digest = hashlib.sha1(raw).hexdigest()
+        if _inventory is None or digest != _inventory.digest:
+            branch, core = _parse_cached(raw, digest)
+            _inventory = Inventory(branch, core, digest)
+        _inventory_stat = key
+        return _inventory
+
+
+def loaded_inventory() -> Inventory | None:
+    """
+    The inventory as last loaded, without looking at devices.yml (no stat,
+    no read): None until the first get_inventory(). For the event loop.
+    """
+    return _inventory
+
+
+def load_devices():
+    """
+    (branch, core) device lists from the cached inventory.
+    See _parse_devices() for the shape of each device dict.
+    """
+    inventory = get_inventory()
+    return inventory.branch, inventory.core
+
+
+def find_device(device_id: str):
+    """
+    O(1) lookup by inventory hostname. None if unknown.
+    """
+    return get_inventory().by_id.get(device_id)
+
+
+def select_devices(hosts=None, vendor=None, group=None):
+    """
+    Pick devices for a batch/bulk run.
+
+      - hosts:  explicit list of inventory hostnames (ids)
+      - vendor: e.g. "Cisco"
+      - group:  "branch" or "core"
+
+    Filters combine (hosts AND vendor AND group). With no filters at all
+    nothing is selected, so a bad request can't hit the whole fleet.
+
+    Returns (devices, unknown_host_ids).
+    """
+    if not (hosts or vendor or group):
+        return [], []
+
+    inventory = get_inventory()
+
+    unknown = []
+    if hosts:
+        unknown = [h for h in hosts if h not in inventory.by_id]
+        devices = [inventory.by_id[h] for h in dict.fromkeys(hosts) if h in inventory.by_id]
+    elif vendor:
+        vendor_key = next((v for v in inventory.by_vendor if v.lower() == vendor.lower()), None)
+        devices = list(inventory.by_vendor.get(vendor_key, []))
+    else:
+        devices = list(inventory.by_group.get(group, []))
+
+    if vendor:
+        devices = [d for d in devices if d["vendor"].lower() == vendor.lower()]
+    if group:
+        devices = [d for d in devices if d["group"] == group]
+
+    return devices, unknown
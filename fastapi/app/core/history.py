@@ -0,0 +1,396 @@
+# fastapi/app/core/history.py
+#
+# Indexed run history (the `runs` table in app/db.py).
+#
+# Every ping/backup/uptime/restart/diff result is recorded as one row per
+# host with its status, RTT stats, duration and log path, so questions like
+# "which branches had packet loss this week" are one indexed query instead
+# of a walk over logs/.
+#
+# Older results that only exist as log files can be loaded with:
+#   cd fastapi && python -m app.core.history backfill [--logs ../logs]
+
+import argparse
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.sqlite import insert
+
+from app.ansible_runner import LOG_TS_FORMAT
+from app.core.settings import ROOT_DIR, get_settings
+from app.db import RunRecord, get_session
+
+LOGS_ROOT = ROOT_DIR / "logs"
+# log names before they carried microseconds
+OLD_LOG_TS_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+# iputils / BSD / format_stats() summaries
+PING_COUNTS_RE = re.compile(r"(\d+) packets transmitted, (\d+) (?:packets )?received.*?([\d.]+)% packet loss")
+PING_RTT_RE = re.compile(r"(?:rtt|round-trip) min/avg/max\S* = ([\d.]+)/([\d.]+)/([\d.]+)")
+PING_METHOD_RE = re.compile(r"ping statistics \((\S+)\)")
+
+TREND_BUCKETS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+}
+
+
+def parse_ping_text(text: str) -> dict:
+    """
+    Packet counts and RTT min/avg/max from ping output (empty dict if none).
+    """
+    stats = {}
+    m = PING_COUNTS_RE.search(text or "")
+    if m:
+        stats.update(sent=int(m[1]), received=int(m[2]), loss_pct=float(m[3]))
+    m = PING_RTT_RE.search(text or "")
+    if m:
+        stats.update(rtt_min=float(m[1]), rtt_avg=float(m[2]), rtt_max=float(m[3]))
+    m = PING_METHOD_RE.search(text or "")
+    if m:
+        stats["method"] = m[1]
+    return stats
+
+
+def _ping_columns(result: dict) -> dict:
+    rtt = result.get("rtt")  # native engine: the probe_host() stats dict
+    if not rtt:
+        return parse_ping_text(result.get("output", ""))
+    return {k: rtt.get(k) for k in ("method", "sent", "received", "loss_pct", "rtt_min", "rtt_avg", "rtt_max")}
+
+
+def run_row(run_type: str, result: dict, started_at=None, duration_ms=None, job_id=None, source="api") -> dict:
+    """
+    Column values for one host result dict (what the routes return).
+    """
+    row = {
+        "run_type": run_type,
+        "host": result.get("device_id"),
+        "vendor": result.get("vendor"),
+        "status": result.get("status") or "unknown",
+        "started_at": started_at or datetime.now(),
+        "duration_ms": duration_ms,
+        "log_path": str(result["logfile"]) if result.get("logfile") else None,
+        "job_id": job_id,
+        "source": source,
+        "detail": result.get("uptime") or result.get("message"),
+    }
+    if run_type == "ping":
+        row.update(_ping_columns(result))
+    return row
+
+
+# every row gets every column, so one executemany() covers a mixed batch
+ROW_DEFAULTS = dict.fromkeys(
+    ("vendor", "duration_ms", "method", "sent", "received", "loss_pct", "rtt_min", "rtt_avg", "rtt_max",
+     "detail", "log_path", "job_id", "source"),
+)
+
+
+def _insert(rows: list[dict], dedupe: bool = False) -> int:
+    """
+    dedupe: skip rows whose log file is already recorded (backfill only:
+    live runs have log files of their own, see device_log_path()).
+    """
+    rows = [{**ROW_DEFAULTS, **r} for r in rows if r.get("host")]
+    if not rows:
+        return 0
+    with get_session() as session:
+        if not dedupe:
+            session.execute(insert(RunRecord), rows)
+            session.commit()
+            return len(rows)
+        paths = [r["log_path"] for r in rows if r["log_path"]]
+        if paths:
+            known = {p for (p,) in session.query(RunRecord.log_path).filter(RunRecord.log_path.in_(paths))}
+            rows = [r for r in rows if r["log_path"] not in known]
+        if rows:
+            # a concurrent writer with the same log file -> keep its row
+            session.execute(insert(RunRecord).on_conflict_do_nothing(index_elements=["log_path"]), rows)
+            session.commit()
+        return len(rows)
+
+
+def _log_time(stem: str) -> datetime:
+    try:
+        return datetime.strptime(stem, LOG_TS_FORMAT)
+    except ValueError:
+        return datetime.strptime(stem, OLD_LOG_TS_FORMAT)
+
+
+def record_runs(run_type: str, results, started_at=None, duration_ms=None, job_id=None, source="api") -> int:
+    """
+    Record host results (iterable of result dicts). Blocking; no-op when
+    db.record_jobs is off.
+    """
+    if not get_settings()["db"]["record_jobs"]:
+        return 0
+    return _insert([run_row(run_type, r, started_at, duration_ms, job_id, source) for r in results])
+
+
+def record_job_runs(job):
+    """
+    Job engine finish listener: one row per host of the job.
+    Batch jobs (kind "<op>_batch") return {host: result}.
+    """
+    run_type = job.kind.removesuffix("_batch")
+    duration_ms = None
+    if job.started_at and job.finished_at:
+        duration_ms = (job.finished_at - job.started_at).total_seconds() * 1000
+
+    if job.error is not None or not isinstance(job.result, dict):
+        results = [
+            {"device_id": host, "vendor": job.vendor, "status": "error", "message": job.error}
+            for host in job.device_id.split(",")
+        ]
+    elif "device_id" in job.result:
+        results = [job.result]
+    else:
+        results = list(job.result.values())
+
+    _insert([run_row(run_type, r, job.started_at, duration_ms, job.id, job.source) for r in results])
+
+
+# ---------------------------
+# Queries
+# ---------------------------
+
+def _iso(value):
+    return value.isoformat(timespec="seconds") if value else None
+
+
+def run_to_dict(r: RunRecord) -> dict:
+    data = {
+        "id": r.id,
+        "type": r.run_type,
+        "host": r.host,
+        "vendor": r.vendor,
+        "status": r.status,
+        "started_at": _iso(r.started_at),
+        "duration_ms": round(r.duration_ms, 1) if r.duration_ms is not None else None,
+        "detail": r.detail,
+        "logfile": r.log_path,
+        "job_id": r.job_id,
+        "source": r.source,
+    }
+    if r.run_type == "ping":
+        data.update(
+            method=r.method, sent=r.sent, received=r.received, loss_pct=r.loss_pct,
+            rtt_min=r.rtt_min, rtt_avg=r.rtt_avg, rtt_max=r.rtt_max,
+        )
+    return data
+
+
+def query_runs(
+    run_type: str | None = None,
+    host: str | None = None,
+    vendor: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 200,
+) -> list[dict]:
+    with get_session() as session:
+        q = session.query(RunRecord)
+        if run_type:
+            q = q.filter(RunRecord.run_type == run_type)
+        if host:
+            q = q.filter(RunRecord.host == host)
+        if vendor:
+            q = q.filter(RunRecord.vendor == vendor)
+        if status:
+            q = q.filter(RunRecord.status == status)
+        if since:
+            q = q.filter(RunRecord.started_at >= since)
+        if until:
+            q = q.filter(RunRecord.started_at < until)
+        rows = q.order_by(RunRecord.started_at.desc()).limit(limit).all()
+        return [run_to_dict(r) for r in rows]
+
+
+def trend(
+    run_type: str = "ping",
+    bucket: str = "hour",
+    host: str | None = None,
+    vendor: str | None = None,
+    since: datetime | None = None,
+) -> list[dict]:
+    """
+    Per hour/day: runs, successes, and (for ping) average loss and RTT.
+    """
+    period = func.strftime(TREND_BUCKETS[bucket], RunRecord.started_at).label("period")
+    with get_session() as session:
+        q = session.query(
+            period,
+            func.count(RunRecord.id),
+            func.sum(case((RunRecord.status == "success", 1), else_=0)),
+            func.avg(RunRecord.loss_pct),
+            func.avg(RunRecord.rtt_avg),
+            func.max(RunRecord.rtt_max),
+        ).filter(RunRecord.run_type == run_type)
+        if host:
+            q = q.filter(RunRecord.host == host)
+        if vendor:
+            q = q.filter(RunRecord.vendor == vendor)
+        if since:
+            q = q.filter(RunRecord.started_at >= since)
+        rows = q.group_by(period).order_by(period).all()
+
+    return [
+        {
+            "period": p,
+            "runs": runs,
+            "succeeded": ok or 0,
+            "failed": runs - (ok or 0),
+            "avg_loss_pct": round(loss, 2) if loss is not None else None,
+            "avg_rtt": round(rtt, 3) if rtt is not None else None,
+            "max_rtt": rtt_max,
+        }
+        for p, runs, ok, loss, rtt, rtt_max in rows
+    ]
+
+
+def packet_loss(since: datetime, vendor: str | None = None, min_loss: float = 0.0) -> list[dict]:
+    """
+    Hosts with at least one ping above min_loss % loss since `since`, worst first.
+    """
+    lossy = func.sum(case((RunRecord.loss_pct > min_loss, 1), else_=0)).label("lossy")
+    with get_session() as session:
+        q = session.query(
+            RunRecord.host,
+            RunRecord.vendor,
+            func.count(RunRecord.id),
+            lossy,
+            func.max(RunRecord.loss_pct),
+            func.avg(RunRecord.loss_pct),
+            func.avg(RunRecord.rtt_avg),
+            func.max(RunRecord.started_at),
+        ).filter(RunRecord.run_type == "ping", RunRecord.started_at >= since)
+        if vendor:
+            q = q.filter(RunRecord.vendor == vendor)
+        rows = (
+            q.group_by(RunRecord.host, RunRecord.vendor)
+            .having(lossy > 0)
+            .order_by(lossy.desc(), func.max(RunRecord.loss_pct).desc())
+            .all()
+        )
+
+    return [
+        {
+            "host": host,
+            "vendor": vendor,
+            "pings": pings,
+            "pings_with_loss": n_lossy,
+            "max_loss_pct": max_loss,
+            "avg_loss_pct": round(avg_loss, 2) if avg_loss is not None else None,
+            "avg_rtt": round(avg_rtt, 3) if avg_rtt is not None else None,
+            "last_seen": _iso(last),
+        }
+        for host, vendor, pings, n_lossy, max_loss, avg_loss, avg_rtt, last in rows
+    ]
+
+
+def since_days(days: float) -> datetime:
+    return datetime.now() - timedelta(days=days)
+
+
+# ---------------------------
+# Backfill from logs/
+# ---------------------------
+
+def _recap_status(text: str, host: str) -> str:
+    m = re.search(
+        rf"^{re.escape(host)}\s*:\s*ok=\d+.*?unreachable=(\d+)\s+failed=(\d+)", text, re.MULTILINE
+    )
+    if not m:
+        return "fail"  # no recap: timed out / killed
+    return "success" if m[1] == "0" and m[2] == "0" else "fail"
+
+
+def _log_run_type(log_dir: str, text: str) -> str:
+    if log_dir == "ping_history":
+        return "ping"
+    if log_dir == "diff":
+        return "diff"
+    # logs/backup also holds uptime and restart runs: tell them apart by play name
+    play = re.search(r"^PLAY \[(.*?)\]", text, re.MULTILINE)
+    name = play[1].lower() if play else ""
+    if "uptime" in name:
+        return "uptime"
+    if "restart" in name or "reload" in name:
+        return "restart"
+    return "backup"
+
+
+def parse_log_file(path: Path, logs_root: Path = LOGS_ROOT) -> dict | None:
+    """
+    Row for one logs/<type>/<vendor>/<host>/<timestamp>.<ext> file,
+    or None if the path doesn't follow that layout.
+    """
+    try:
+        log_dir, vendor, host = path.relative_to(logs_root).parts[:3]
+        started_at = _log_time(path.stem)
+    except ValueError:
+        return None
+
+    text = path.read_text(errors="ignore")
+    run_type = _log_run_type(log_dir, text)
+    row = {
+        "run_type": run_type,
+        "host": host,
+        "vendor": vendor,
+        "started_at": started_at,
+        "log_path": str(path),
+        "source": "backfill",
+    }
+
+    if run_type == "diff":
+        row["status"] = "no_changes" if text.strip() == "NO_CHANGES" else "changes"
+    elif run_type == "ping" and "ping statistics (" in text:
+        # native engine log: just the format_stats() text
+        row.update(parse_ping_text(text))
+        row["status"] = "success" if row.get("received") else "fail"
+    else:
+        row["status"] = _recap_status(text, host)
+        if run_type == "ping":
+            row.update(parse_ping_text(text))
+    return row
+
+
+def backfill(logs_root: Path = LOGS_ROOT, batch_size: int = 500) -> dict:
+    """
+    Load every existing log file into the runs table (already known files are skipped).
+    """
+    scanned = inserted = skipped = 0
+    rows = []
+    for path in sorted(p for p in logs_root.rglob("*") if p.is_file()):
+        scanned += 1
+        row = parse_log_file(path, logs_root)
+        if row is None:
+            skipped += 1
+            continue
+        rows.append(row)
+        if len(rows) >= batch_size:
+            inserted += _insert(rows, dedupe=True)
+            rows = []
+    inserted += _insert(rows, dedupe=True)
+    return {"scanned": scanned, "inserted": inserted, "unparsed": skipped}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bf = sub.add_parser("backfill", help="load existing logs/ into the history store")
+    bf.add_argument("--logs", type=Path, default=LOGS_ROOT, help=f"log tree (default {LOGS_ROOT})")
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        stats = backfill(args.logs.resolve())
+        print(f"📚 Backfill: {stats['scanned']} files scanned, {stats['inserted']} new runs, "
+              f"{stats['unparsed']} not in logs/<type>/<vendor>/<host>/<timestamp> layout")
+
+
+if __name__ == "__main__":
+    main()
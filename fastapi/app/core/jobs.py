@@ -0,0 +1,404 @@
+# fastapi/app/core/jobs.py
+
+import asyncio
+import contextlib
+import functools
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.core import metrics
+from app.core.settings import get_settings
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+REJECTED = "rejected"  # device busy (see DeviceLocks); never ran
+
+FINISHED_STATES = (DONE, ERROR, REJECTED)
+
+
+class Job:
+    """
+    One unit of device work (ping, backup, uptime, restart ...).
+
+    `result` is whatever the job function returned (the same dict the
+    route used to return directly). `error` is set if the function raised.
+    """
+
+    def __init__(self, kind: str, device_id: str, vendor: str, source: str = "api"):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.device_id = device_id
+        self.vendor = vendor
+        self.source = source  # "api", "scheduler:<name>" ...
+        self.status = QUEUED
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.coalesced = 0  # identical requests that joined this job
+        self.waiting_for = None  # job holding a device this one needs
+        # live output, see push_line()/follow(): ring buffer of the last
+        # runner.tail_lines (line number, text); the full output is in the log
+        self.lines = deque(maxlen=get_settings()["runner"]["tail_lines"])
+        self.line_count = 0
+        self._done = asyncio.Event()
+        self._changed = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._task = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    async def wait(self):
+        await self._done.wait()
+        return self.result
+
+    def push_line(self, line: str):
+        """
+        Add one output line. Called from the worker thread running the job.
+        """
+        self.lines.append((self.line_count, line))
+        self.line_count += 1
+        self._loop.call_soon_threadsafe(self._notify)
+
+    def _notify(self):
+        # Wake every follower: set the current event and start a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self):
+        """
+        Yield output lines from the start, then live, until the job finishes.
+        Any number of followers can attach at any time. Lines that already
+        left the ring buffer are reported as skipped (they're in the log file).
+        """
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < self.line_count:
+                for number, line in list(self.lines):
+                    if number < sent:
+                        continue
+                    if number > sent:
+                        yield f"... ({number - sent} earlier lines not kept, see the log file)"
+                    yield line
+                    sent = number + 1
+            if self.finished:
+                return
+            await changed.wait()
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "device_id": self.device_id,
+            "vendor": self.vendor,
+            "source": self.source,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(timespec="seconds"),
+            "started_at": self.started_at.isoformat(timespec="seconds") if self.started_at else None,
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+            "coalesced": self.coalesced,
+        }
+        if self.status == QUEUED and self.waiting_for:
+            data["waiting_for"] = self.waiting_for.id
+        if include_result or self.status == REJECTED:
+            data["result"] = self.result
+            data["error"] = self.error
+        return data
+
+
+def job_hosts(job: Job) -> list[str]:
+    # batch jobs (kind "<op>_batch") keep the comma-joined host list in device_id
+    return job.device_id.split(",")
+
+
+class DeviceLocks:
+    """
+    Per-device mutual exclusion for operations that log into the device
+    (backup, uptime, restart ...): one FIFO asyncio.Lock per host, so two
+    sessions never hit one box at once. Lives on the event loop, like the
+    vendor semaphores.
+
+    A request for a busy device queues or is rejected, depending on its
+    operation's on_conflict policy (and max_queue per device).
+    """
+
+    def __init__(self, operations, on_conflict: dict | None = None, max_queue: int = 4):
+        self.operations = set(operations)
+        self.on_conflict = on_conflict or {}
+        self.max_queue = max_queue
+        self._locks = {}
+        self.holders = {}  # host -> Job
+        self.waiting = {}  # host -> [Job], in arrival order
+
+    def applies(self, kind: str) -> bool:
+        return kind.removesuffix("_batch") in self.operations
+
+    def _policy(self, kind: str) -> str:
+        return self.on_conflict.get(kind.removesuffix("_batch"), self.on_conflict.get("default", "queue"))
+
+    def conflict(self, kind: str, hosts: list[str]) -> str | None:
+        """
+        Why a new `kind` job for these hosts must be rejected, or None.
+        """
+        for host in hosts:
+            holder = self.holders.get(host)
+            waiting = self.waiting.get(host, [])
+            if holder is None and not waiting:
+                continue
+            busy_with = holder or waiting[0]
+            if self._policy(kind) == "reject":
+                return f"{host} is busy ({busy_with.kind} job {busy_with.id})"
+            if len(waiting) >= self.max_queue:
+                return f"{host} already has {len(waiting)} jobs queued"
+        return None
+
+    def enqueue(self, job: Job, hosts: list[str]):
+        """
+        Put the job in line for its hosts. Done at submit time, so a request
+        arriving right after it already sees the device as busy.
+        """
+        for host in set(hosts):
+            self.waiting.setdefault(host, []).append(job)
+
+    @contextlib.asynccontextmanager
+    async def hold(self, job: Job, hosts: list[str]):
+        """
+        Wait for every host's lock, in sorted order (no deadlocks between
+        batches), and keep them for the duration of the block.
+        The job must have been enqueue()d.
+        """
+        hosts = sorted(set(hosts))
+        acquired = []
+        try:
+            for host in hosts:
+                lock = self._locks.setdefault(host, asyncio.Lock())
+                if lock.locked():
+                    job.waiting_for = self.holders.get(host)
+                await lock.acquire()
+                acquired.append(host)
+                self.waiting[host].remove(job)
+                self.holders[host] = job
+            job.waiting_for = None
+            yield
+        finally:
+            for host in hosts:
+                queue = self.waiting.get(host, [])
+                if job in queue:
+                    queue.remove(job)
+            for host in acquired:
+                del self.holders[host]
+                self._locks[host].release()
+            for host in hosts:
+                if not self.waiting.get(host) and host not in self.holders:
+                    self.waiting.pop(host, None)
+                    lock = self._locks.get(host)
+                    if lock is not None and not lock.locked():
+                        del self._locks[host]
+
+    def state(self) -> dict:
+        hosts = sorted(set(self.holders) | set(self.waiting))
+        return {
+            host: {
+                "holder": self.holders[host].to_dict(include_result=False) if host in self.holders else None,
+                "queued": [j.to_dict(include_result=False) for j in self.waiting.get(host, [])],
+            }
+            for host in hosts
+        }
+
+
+class JobManager:
+    """
+    Runs blocking job functions (run_playbook and friends) on a bounded
+    thread pool so the uvicorn event loop never waits on ansible-playbook.
+
+    Each vendor gets its own semaphore, so e.g. a burst of Cisco telnet
+    backups can't use up every worker (or every VTY line on the boxes).
+
+    Per device: an identical request (same operation, device and arguments)
+    while one is queued or running joins that job instead of starting
+    another, and DeviceLocks keeps different operations on one device apart.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        vendor_limits: dict | None = None,
+        default_vendor_limit: int = 4,
+        keep_finished: int = 500,
+        device_locks: DeviceLocks | None = None,
+    ):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._vendor_limits = vendor_limits or {}
+        self._default_vendor_limit = default_vendor_limit
+        self._keep_finished = keep_finished
+        self._semaphores = {}
+        self._jobs = OrderedDict()
+        self._listeners = []
+        self.device_locks = device_locks or DeviceLocks(())
+        self._inflight = {}  # coalescing key -> unfinished Job
+
+    def add_listener(self, fn):
+        """
+        Call fn(job) in a worker thread whenever a job finishes
+        (e.g. to store it in the results DB).
+        """
+        self._listeners.append(fn)
+
+    def _call_listener(self, fn, job: Job):
+        try:
+            fn(job)
+        except Exception as exc:
+            print(f"⚠️  Job listener {getattr(fn, '__name__', fn)} failed for {job.id}: {exc}")
+
+    def _semaphore(self, vendor: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(vendor)
+        if sem is None:
+            limit = self._vendor_limits.get(vendor, self._default_vendor_limit)
+            sem = self._semaphores[vendor] = asyncio.Semaphore(limit)
+        return sem
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in finished[: max(0, len(finished) - self._keep_finished)]:
+            del self._jobs[job.id]
+
+    def submit(self, kind: str, device_id: str, vendor: str, fn, *args, source: str = "api", **kwargs) -> Job:
+        """
+        Queue fn(*args, **kwargs, on_line=job.push_line) and return the Job
+        straight away. Must be called from the event loop (i.e. inside a route).
+
+        Job functions pass on_line down to run_playbook so their output can
+        be followed live (GET /jobs/<id>/stream).
+
+        If the same job is already queued or running, that Job is returned
+        (its result is shared). If a device it needs is busy and the
+        operation must not queue, the Job comes back already REJECTED.
+        """
+        key = (kind, device_id, vendor, fn, repr(args), repr(sorted(kwargs.items())))
+        running = self._inflight.get(key)
+        if running is not None and not running.finished:
+            running.coalesced += 1
+            metrics.JOBS_COALESCED.inc(kind=kind)
+            print(f"🔗 Joined in-flight {kind} job {running.id} for {device_id}")
+            return running
+
+        job = Job(kind, device_id, vendor, source)
+        self._jobs[job.id] = job
+        self._prune()
+
+        locked = self.device_locks.applies(kind)
+        if locked:
+            reason = self.device_locks.conflict(kind, job_hosts(job))
+            if reason:
+                return self._reject(job, reason)
+            self.device_locks.enqueue(job, job_hosts(job))
+
+        self._inflight[key] = job
+        job._task = asyncio.get_running_loop().create_task(
+            self._run(job, key, locked, functools.partial(fn, *args, on_line=job.push_line, **kwargs))
+        )
+        return job
+
+    def _reject(self, job: Job, reason: str) -> Job:
+        job.status = REJECTED
+        job.error = reason
+        job.result = {"status": "busy", "message": reason, "vendor": job.vendor, "device_id": job.device_id}
+        job.finished_at = datetime.now()
+        job._done.set()
+        metrics.JOBS_FINISHED.inc(kind=job.kind, status=REJECTED)
+        print(f"⛔ Rejected {job.kind} for {job.device_id}: {reason}")
+        return job
+
+    async def _run(self, job: Job, key, locked: bool, call):
+        loop = asyncio.get_running_loop()
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                if locked:
+                    await stack.enter_async_context(self.device_locks.hold(job, job_hosts(job)))
+                await stack.enter_async_context(self._semaphore(job.vendor))
+                job.status = RUNNING
+                job.started_at = datetime.now()
+                metrics.JOB_WAIT.observe((job.started_at - job.created_at).total_seconds(), kind=job.kind)
+                job.result = await loop.run_in_executor(self._executor, call)
+                job.status = DONE
+        except Exception as exc:
+            job.status = ERROR
+            job.error = f"{type(exc).__name__}: {exc}"
+            print(f"❌ Job failed: {job.kind} vendor={job.vendor} host={job.device_id}: {job.error}")
+        finally:
+            if self._inflight.get(key) is job:
+                del self._inflight[key]
+            job.finished_at = datetime.now()
+            job._done.set()
+            job._notify()
+            metrics.JOBS_FINISHED.inc(kind=job.kind, status=job.status)
+            for fn in self._listeners:
+                loop.run_in_executor(None, self._call_listener, fn, job)
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def recent(self, limit: int = 100) -> list[Job]:
+        return list(reversed(self._jobs.values()))[:limit]
+
+    def stats(self) -> dict:
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, ERROR: 0, REJECTED: 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+
+_manager = None
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        cfg = get_settings()["jobs"]
+        _manager = JobManager(
+            max_workers=cfg["max_workers"],
+            vendor_limits=cfg["vendor_limits"],
+            default_vendor_limit=cfg["default_vendor_limit"],
+            keep_finished=cfg["keep_finished"],
+            device_locks=DeviceLocks(**cfg["device_locks"]),
+        )
+        from app.core.result_cache import get_result_cache
+
+        _manager.add_listener(get_result_cache().record_job)
+        if get_settings()["db"]["record_jobs"]:
+            from app.core.results import record_job  # sqlalchemy only needed when recording
+            from app.core.history import record_job_runs
+
+            _manager.add_listener(record_job)
+            _manager.add_listener(record_job_runs)
+    return _manager
+
+
+async def job_response(job: Job, background: bool = False) -> dict:
+    """
+    What a route returns for a submitted job:
+      - background=True  -> job summary right away (poll /jobs/<id>/)
+      - background=False -> wait (without blocking the loop) for the result
+    """
+    if background:
+        return job.to_dict(include_result=False)
+
+    result = await job.wait()
+    if job.status == ERROR:
+        return {
+            "status": "error",
+            "message": job.error,
+            "job_id": job.id,
+            "vendor": job.vendor,
+            "device_id": job.device_id,
+        }
+    return {**result, "job_id": job.id}
@@ -0,0 +1,245 @@
+# fastapi/app/core/metrics.py
+#
+# Prometheus text-format metrics for GET /metrics (no client library needed).
+#
+#   - instruments (Counter / Histogram below) are updated where things
+#     happen: playbook runs in app/ansible_runner.py, jobs in app/core/jobs.py
+#   - collectors read the current state at scrape time: job queue, device
+#     locks, inventory, result / parsed-config caches, warm workers
+#
+# Everything is in-process: with several uvicorn workers each one reports
+# its own numbers. render() must run on the event loop (GET /metrics is an
+# async route): the job engine / device lock collectors read state only the
+# loop changes.
+
+import threading
+
+PREFIX = "assurance_"
+
+# seconds: telnet logins are slow, backups of big configs slower
+DURATION_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 45, 60, 90, 120, 300)
+PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 90)
+
+_registry = []
+_collectors = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def lines(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labels, key)} {_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DURATION_BUCKETS):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1  # non-cumulative here, summed on output
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def lines(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, data in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, data):
+                cumulative += n
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {round(data[-2], 6)}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {data[-1]}"
+
+
+def collector(fn):
+    """
+    Register fn() -> [(name, kind, help, [(labels dict, value), ...]), ...],
+    called on every scrape. Usable as a decorator.
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    out = []
+    for metric in _registry:
+        out.append(f"# HELP {metric.name} {metric.help}")
+        out.append(f"# TYPE {metric.name} {metric.kind}")
+        out.extend(metric.lines())
+    for fn in _collectors:
+        try:
+            families = fn()
+        except Exception as exc:
+            out.append(f"# collector {fn.__name__} failed: {type(exc).__name__}: {_escape(exc)}")
+            continue
+        for name, kind, help, samples in families:
+            out.append(f"# HELP {PREFIX}{name} {help}")
+            out.append(f"# TYPE {PREFIX}{name} {kind}")
+            for labels, value in samples:
+                out.append(f"{PREFIX}{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+    return "\n".join(out) + "\n"
+
+
+# ---------------------------
+# Instruments
+# ---------------------------
+
+PLAYBOOK_DURATION = Histogram(
+    "playbook_duration_seconds",
+    "Wall time of one ansible-playbook run (single host or batch).",
+    ("vendor", "operation", "mode"),
+)
+PLAYBOOK_RUNS = Counter(
+    "playbook_runs_total",
+    "Playbook runs by outcome: success, failed, timeout, output_limit, error.",
+    ("vendor", "operation", "outcome"),
+)
+PLAYBOOK_HOSTS = Counter(
+    "playbook_host_results_total",
+    "Per-host results of playbook runs (a batch run counts each host).",
+    ("vendor", "operation", "status"),
+)
+PLAYBOOK_PHASE = Histogram(
+    "playbook_phase_seconds",
+    "Seconds from run start to each phase: spawn, first_output, first_result "
+    "(first host answered), completion. Only with runner.phase_timing.",
+    ("vendor", "operation", "phase"),
+    buckets=PHASE_BUCKETS,
+)
+JOBS_FINISHED = Counter(
+    "jobs_finished_total",
+    "Finished jobs by kind and final state (done, error, rejected).",
+    ("kind", "status"),
+)
+JOBS_COALESCED = Counter(
+    "jobs_coalesced_total",
+    "Requests that joined an identical job already in flight.",
+    ("kind",),
+)
+JOB_WAIT = Histogram(
+    "job_queue_wait_seconds",
+    "Time jobs spent queued (device lock + vendor limit) before running.",
+    ("kind",),
+    buckets=PHASE_BUCKETS,
+)
+
+
+# ---------------------------
+# Collectors (state at scrape time)
+# ---------------------------
+
+@collector
+def _jobs_state():
+    from app.core.jobs import get_job_manager
+
+    manager = get_job_manager()
+    counts = manager.stats()
+    locks = manager.device_locks
+    return [
+        ("jobs", "gauge", "Jobs currently known to the job engine, by state.",
+         [({"state": state}, n) for state, n in counts.items()]),
+        ("device_locks_held", "gauge", "Devices currently locked by a running job.",
+         [({}, len(locks.holders))]),
+        ("device_locks_waiting", "gauge", "Jobs waiting for a device lock.",
+         [({}, sum(len(q) for q in locks.waiting.values()))]),
+    ]
+
+
+@collector
+def _inventory_state():
+    from app.core.devices_loader import loaded_inventory
+
+    # runs on the event loop: the snapshot the app last loaded, no file access
+    inventory = loaded_inventory()
+    samples = []
+    for group, devices in (inventory.by_group.items() if inventory else ()):
+        per_vendor = {}
+        for d in devices:
+            per_vendor[d["vendor"]] = per_vendor.get(d["vendor"], 0) + 1
+        samples.extend(({"group": group, "vendor": v}, n) for v, n in sorted(per_vendor.items()))
+    return [("inventory_devices", "gauge", "Devices in devices.yml by group and vendor.", samples)]
+
+
+@collector
+def _cache_state():
+    from app.core.config_diff import parsed_cache
+    from app.core.result_cache import get_result_cache
+
+    ops = get_result_cache().stats()["operations"]
+    parsed = parsed_cache().stats()
+    return [
+        ("result_cache_entries", "gauge", "Cached read-only results by operation.",
+         [({"operation": op}, s["entries"]) for op, s in ops.items()]),
+        ("result_cache_lookups_total", "counter", "Result cache lookups by operation and outcome.",
+         [({"operation": op, "result": r}, s[k]) for op, s in ops.items() for r, k in (("hit", "hits"), ("miss", "misses"))]),
+        ("result_cache_expired_total", "counter", "Result cache entries found expired.",
+         [({"operation": op}, s["expired"]) for op, s in ops.items()]),
+        ("result_cache_evictions_total", "counter", "Result cache entries evicted by the LRU bound.",
+         [({"operation": op}, s["evictions"]) for op, s in ops.items()]),
+        ("parsed_config_cache_entries", "gauge", "Parsed configs kept for diffs.", [({}, parsed["size"])]),
+        ("parsed_config_cache_lookups_total", "counter", "Parsed config cache lookups by outcome.",
+         [({"result": "hit"}, parsed["hits"]), ({"result": "miss"}, parsed["misses"])]),
+    ]
+
+
+@collector
+def _warm_workers_state():
+    from app.ansible_worker import warm_pool_status
+
+    status = warm_pool_status()
+    states = {}
+    for state in (status["workers"] if status else []):
+        states[state] = states.get(state, 0) + 1
+    return [("warm_workers", "gauge", "Warm Ansible workers by state.",
+             [({"state": s}, n) for s, n in sorted(states.items())])]
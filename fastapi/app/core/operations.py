@@ -0,0 +1,230 @@
+# fastapi/app/core/operations.py
+#
+# The blocking device operations (ping / backup / uptime / restart) that run
+# inside the job engine. Routes, the scheduler and bulk runs all submit these,
+# so each operation returns the same result dict wherever it was started from.
+
+import asyncio
+
+from app.ansible_runner import (
+    HostRun,
+    run_playbook,
+    run_playbook_batch,
+    write_device_log,
+    PING_PLAYBOOK,
+    JUNIPER_BACKUP,
+    CISCO_BACKUP,
+    PALO_BACKUP,
+    CISCO_RESTART,
+    JUNIPER_RESTART,
+    CISCO_UPTIME,
+    JUNIPER_UPTIME,
+)
+from app.core.backup_store import ingest_new
+from app.core.changes import detect_change
+from app.core.history import record_runs
+from app.core.result_cache import get_result_cache
+from app.core.reachability import format_stats, sweep
+from app.core.settings import get_settings
+
+BACKUP_PLAYBOOKS = {
+    "Juniper": JUNIPER_BACKUP,
+    "Cisco": CISCO_BACKUP,
+    "PaloAlto": PALO_BACKUP,
+}
+
+UPTIME_PLAYBOOKS = {
+    "Juniper": JUNIPER_UPTIME,
+    "Cisco": CISCO_UPTIME,
+}
+
+RESTART_PLAYBOOKS = {
+    "Cisco": CISCO_RESTART,
+    "Juniper": JUNIPER_RESTART,
+    # "Sophos": SOPHOS_RESTART,
+}
+
+
+# ---------------------------
+# Ping
+# ---------------------------
+
+def ping_result(run: HostRun) -> dict:
+    # ping_test.yml registers the command result as ping_output;
+    # fall back to the whole log text if the task never ran.
+    output = run.value("ping_output.stdout") or run.output
+
+    return {
+        "status": "success" if run.success else "fail",
+        "logfile": run.logfile,
+        "output": output.strip(),
+        "engine": "ansible",
+        "vendor": run.vendor,
+        "device_id": run.host,
+    }
+
+
+def ping_job(hostname: str, vendor: str, on_line=None) -> dict:
+    """
+    Blocking part of an Ansible ping: runs in the job engine's worker pool.
+    """
+    return ping_result(run_playbook(PING_PLAYBOOK, hostname, vendor, on_line=on_line))
+
+
+def ping_batch_job(hosts: list[str], vendor: str, forks: int, on_line=None) -> dict:
+    runs = run_playbook_batch(PING_PLAYBOOK, hosts, vendor, forks=forks, on_line=on_line)
+    return {host: ping_result(run) for host, run in runs.items()}
+
+
+def probe_kwargs() -> dict:
+    """
+    Native ping settings (settings.yml -> ping) as probe_host()/sweep() kwargs.
+    """
+    cfg = get_settings()["ping"]
+    return {
+        "count": cfg["count"],
+        "timeout": cfg["timeout"],
+        "interval": cfg["interval"],
+        "tcp_ports": tuple(cfg["tcp_ports"]),
+    }
+
+
+def native_ping_result(device: dict, stats: dict) -> dict:
+    """
+    Save a native ping to the usual ping_history layout and build the result.
+    """
+    output = format_stats(stats)
+    logfile = write_device_log("ping_history", device["vendor"], device["id"], output + "\n")
+
+    return {
+        "status": "success" if stats["reachable"] else "fail",
+        "logfile": str(logfile),
+        "output": output,
+        "rtt": stats,
+        "engine": "native",
+        "vendor": device["vendor"],
+        "device_id": device["id"],
+    }
+
+
+def save_native_pings(devices: list[dict], stats: dict, source: str = "api") -> dict:
+    """
+    Blocking: write the logs for a native sweep and record it in the history store.
+    """
+    by_id = {d["id"]: d for d in devices}
+    results = {host: native_ping_result(by_id[host], s) for host, s in stats.items()}
+    record_runs("ping", results.values(), source=source)
+    cache = get_result_cache()
+    for host, result in results.items():
+        cache.put("ping", host, result)
+    return results
+
+
+async def ping_sweep(devices: list[dict], source: str = "api") -> dict:
+    """
+    Native ping of many devices at once (settings ping.concurrency).
+    Returns {device_id: native_ping_result(...)}; log files are written off the loop.
+    """
+    stats = await sweep(
+        {d["id"]: d["ip"] for d in devices},
+        concurrency=get_settings()["ping"]["concurrency"],
+        **probe_kwargs(),
+    )
+    return await asyncio.to_thread(save_native_pings, devices, stats, source)
+
+
+# ---------------------------
+# Backup
+# ---------------------------
+
+def backup_result(run: HostRun) -> dict:
+    result = {
+        "status": "success" if run.success else "fail",
+        "logfile": run.logfile,
+        "vendor": run.vendor,
+        "device_id": run.host,
+    }
+    if run.success:
+        # Dedup/delta-store what the playbook just wrote (nothing new: no
+        # revision is reported, rather than an older one)
+        revisions = ingest_new(run.vendor, run.host)
+        if not revisions:
+            result["new_revisions"] = []
+            return result
+        latest = revisions[-1]
+        result.update(
+            revision=latest.rev,
+            config_hash=latest.hash,
+            changed=any(r.changed for r in revisions),
+            new_revisions=[r.rev for r in revisions],
+        )
+        if get_settings()["backups"]["change_events"]:
+            # one event per changed revision, including any that piled up
+            # since the last sync
+            changes = [_change_event(run, r) for r in revisions if r.changed]
+            result["changes"] = [c for c in changes if c]
+    return result
+
+
+def _change_event(run: HostRun, revision) -> dict | None:
+    """
+    Diff + changes-index row for a backup whose config hash changed.
+    A failure here is reported but doesn't fail the backup itself.
+    """
+    try:
+        change = detect_change(run.vendor, run.host, revision, source="backup")
+    except Exception as exc:
+        print(f"⚠️  Change detection failed for {run.vendor}/{run.host}: {exc!r}")
+        return None
+    if change:
+        return {"id": change["id"], "diff_path": change["diff_path"], "summary": change["summary"]}
+    return None
+
+
+def backup_job(device_id: str, vendor: str, on_line=None) -> dict:
+    return backup_result(run_playbook(BACKUP_PLAYBOOKS[vendor], device_id, vendor, on_line=on_line))
+
+
+def backup_batch_job(hosts: list[str], vendor: str, forks: int, on_line=None) -> dict:
+    runs = run_playbook_batch(BACKUP_PLAYBOOKS[vendor], hosts, vendor, forks=forks, on_line=on_line)
+    return {host: backup_result(run) for host, run in runs.items()}
+
+
+# ---------------------------
+# Uptime / restart
+# ---------------------------
+
+def uptime_result(run: HostRun) -> dict:
+    # uptime_*.yml set_fact the line they found (empty when not found)
+    uptime = (run.value("uptime_line") or "").strip() or None
+    return {
+        "status": "success" if uptime else "fail",
+        "uptime": uptime,
+        "logfile": run.logfile,
+        "vendor": run.vendor,
+        "device_id": run.host,
+    }
+
+
+def uptime_job(device_id: str, vendor: str, on_line=None) -> dict:
+    return uptime_result(run_playbook(UPTIME_PLAYBOOKS[vendor], device_id, vendor, timeout_sec=45, on_line=on_line))
+
+
+def uptime_batch_job(hosts: list[str], vendor: str, forks: int, on_line=None) -> dict:
+    runs = run_playbook_batch(UPTIME_PLAYBOOKS[vendor], hosts, vendor, timeout_sec=45, forks=forks, on_line=on_line)
+    return {host: uptime_result(run) for host, run in runs.items()}
+
+
+def restart_job(device_id: str, vendor: str, on_line=None) -> dict:
+    run = run_playbook(RESTART_PLAYBOOKS[vendor], device_id, vendor, on_line=on_line)
+
+    # Device session output: telnet_out (Cisco) / reboot_out (Juniper)
+    output = run.value("telnet_out.stdout") or run.value("reboot_out.stdout") or run.output
+
+    return {
+        "status": "success" if run.success else "fail",
+        "output": output,
+        "logfile": run.logfile,
+        "vendor": vendor,
+        "device_id": device_id,
+    }
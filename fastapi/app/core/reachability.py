@@ -0,0 +1,239 @@
+# fastapi/app/core/reachability.py
+#
+# Native reachability checks for the ping endpoints.
+#
+# ICMP echo is sent straight from the app:
+#   - unprivileged ICMP (SOCK_DGRAM) when net.ipv4.ping_group_range allows it
+#   - raw ICMP when running as root
+# If neither is allowed, or ICMP gets no reply at all (filtered on the way),
+# we fall back to timing a TCP connect to the usual management ports
+# (22/23/443), all of them at once. A refused connection still counts as a
+# reply: the host answered with a RST, so it is up.
+#
+# Everything is asyncio, so a whole-inventory sweep is just a gather() with
+# a concurrency cap instead of one ansible-playbook per device.
+
+import asyncio
+import os
+import socket
+import struct
+import time
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+PAYLOAD = b"device-assurance"
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_request(ident: int, seq: int) -> bytes:
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = _checksum(header + PAYLOAD)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + PAYLOAD
+
+
+def _open_icmp_socket():
+    """
+    Returns (socket, is_raw), or (None, None) when ICMP isn't permitted.
+    """
+    for kind in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            sock = socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP)
+        except (PermissionError, OSError):
+            continue
+        sock.setblocking(False)
+        return sock, kind == socket.SOCK_RAW
+    return None, None
+
+
+def icmp_available() -> bool:
+    sock, _ = _open_icmp_socket()
+    if sock is None:
+        return False
+    sock.close()
+    return True
+
+
+async def _icmp_probe(sock, is_raw: bool, ip: str, ident: int, seq: int, timeout: float) -> float | None:
+    """
+    One echo request. Returns RTT in ms, or None if no reply within timeout.
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    deadline = start + timeout
+    try:
+        sock.sendto(_echo_request(ident, seq), (ip, 0))
+    except OSError:
+        return None
+
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return None
+        try:
+            data = await asyncio.wait_for(loop.sock_recv(sock, 2048), remaining)
+        except (asyncio.TimeoutError, OSError):
+            return None
+
+        if is_raw:
+            # raw sockets get the IP header too (and every ICMP packet on the box)
+            data = data[(data[0] & 0x0F) * 4:]
+        if len(data) < 8:
+            continue
+        kind, _, _, reply_id, reply_seq = struct.unpack("!BBHHH", data[:8])
+        # unprivileged sockets: the kernel owns the id and only hands us our replies
+        if kind == ICMP_ECHO_REPLY and reply_seq == seq and (not is_raw or reply_id == ident):
+            return (time.perf_counter() - start) * 1000
+
+
+async def _tcp_probe(ip: str, port: int, timeout: float) -> float | None:
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        pass  # RST from the host: it's up, port is closed
+    except (asyncio.TimeoutError, OSError):
+        return None
+    else:
+        writer.close()
+    return (time.perf_counter() - start) * 1000
+
+
+async def _tcp_round(ip: str, ports, timeout: float) -> tuple[int | None, float | None]:
+    """
+    Connect to every port at once; the first one to answer wins and the
+    rest are cancelled. Returns (port, RTT in ms), or (None, None) if none
+    answered within timeout.
+    """
+    tasks = {asyncio.ensure_future(_tcp_probe(ip, port, timeout)): port for port in ports}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                rtt = task.result()
+                if rtt is not None:
+                    return tasks[task], rtt
+        return None, None
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _tcp_ping(ip: str, count: int, timeout: float, interval: float, tcp_ports, give_up=False):
+    """
+    `count` TCP rounds, sticking with the first port that answers.
+    give_up: stop after a first round nobody answered (returns None then).
+    """
+    rtts = []
+    port = None
+    for i in range(count):
+        answered, rtt = await _tcp_round(ip, [port] if port else tcp_ports, timeout)
+        if rtt is not None:
+            port = answered
+            rtts.append(rtt)
+        elif give_up and i == 0:
+            return None
+        if i < count - 1:
+            await asyncio.sleep(interval)
+    return _stats(ip, f"tcp:{port}" if port else "tcp", count, rtts)
+
+
+def _stats(ip: str, method: str, sent: int, rtts: list[float]) -> dict:
+    received = len(rtts)
+    return {
+        "ip": ip,
+        "method": method,
+        "sent": sent,
+        "received": received,
+        "loss_pct": round(100.0 * (sent - received) / sent, 1) if sent else 100.0,
+        "rtt_min": round(min(rtts), 3) if rtts else None,
+        "rtt_avg": round(sum(rtts) / received, 3) if rtts else None,
+        "rtt_max": round(max(rtts), 3) if rtts else None,
+        "reachable": received > 0,
+    }
+
+
+async def probe_host(
+    ip: str,
+    count: int = 3,
+    timeout: float = 1.0,
+    interval: float = 0.2,
+    tcp_ports=(22, 23, 443),
+    method: str = "auto",
+) -> dict:
+    """
+    Ping one host `count` times.
+
+    method: "auto" (ICMP if permitted and answered, else TCP), "icmp" or "tcp".
+    Returns sent/received/loss and RTT min/avg/max in ms.
+
+    A host that answers neither ICMP nor the first TCP round is down; it
+    costs count * timeout (+ intervals) plus one timeout.
+    """
+    sock, is_raw = (None, None) if method == "tcp" else _open_icmp_socket()
+
+    if sock is not None:
+        ident = (os.getpid() ^ id(sock)) & 0xFFFF
+        rtts = []
+        try:
+            for seq in range(1, count + 1):
+                rtt = await _icmp_probe(sock, is_raw, ip, ident, seq, timeout)
+                if rtt is not None:
+                    rtts.append(rtt)
+                if seq < count:
+                    await asyncio.sleep(interval)
+        finally:
+            sock.close()
+        if rtts or method == "icmp" or not tcp_ports:
+            return _stats(ip, "icmp", count, rtts)
+        # No echo reply: ICMP may just be filtered, ask the management ports
+        await asyncio.sleep(interval)
+        stats = await _tcp_ping(ip, count, timeout, interval, tcp_ports, give_up=True)
+        return stats or {**_stats(ip, "icmp", count, []), "method": "icmp+tcp"}
+
+    if method == "icmp":
+        return {**_stats(ip, "icmp", 0, []), "error": "ICMP sockets not permitted"}
+
+    return await _tcp_ping(ip, count, timeout, interval, tcp_ports)
+
+
+async def sweep(targets: dict, concurrency: int = 64, **probe_kwargs) -> dict:
+    """
+    Probe many hosts at once. targets = {device_id: ip}.
+    Returns {device_id: stats}.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(device_id, ip):
+        async with sem:
+            if not ip:
+                return device_id, {**_stats(ip, "none", 0, []), "error": "no IP in inventory"}
+            return device_id, await probe_host(ip, **probe_kwargs)
+
+    results = await asyncio.gather(*(_one(d, ip) for d, ip in targets.items()))
+    return dict(results)
+
+
+def format_stats(stats: dict) -> str:
+    """
+    Text summary in the same shape as iputils ping, for the UI and log files.
+    """
+    lines = [
+        f"--- {stats['ip']} ping statistics ({stats['method']}) ---",
+        f"{stats['sent']} packets transmitted, {stats['received']} received, "
+        f"{stats['loss_pct']:g}% packet loss",
+    ]
+    if stats["received"]:
+        lines.append(f"rtt min/avg/max = {stats['rtt_min']}/{stats['rtt_avg']}/{stats['rtt_max']} ms")
+    if stats.get("error"):
+        lines.append(f"error: {stats['error']}")
+    return "\n".join(lines)
@@ -0,0 +1,143 @@
+# fastapi/app/core/result_cache.py
+#
+# Short-lived cache for read-only device queries (uptime, ping).
+#
+# Dashboards ask for the same device's uptime over and over; every miss is a
+# telnet/SSH session to a branch router over the WAN. Results are kept per
+# (operation, device) for a per-operation TTL (settings cache.ttl), in an
+# LRU bounded by cache.max_entries.
+#
+#   - filled from finished jobs (job engine listener), so API, batch and
+#     scheduled runs all warm it, and by native ping sweeps
+#   - routes serve a hit straight away; ?fresh=1 skips the cache
+#   - a restart drops the device's cached uptime and ping
+#   - hit / miss / expiry counters per operation: GET /jobs/cache
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from app.core.settings import get_settings
+
+# results of these operations go stale: drop them when the device restarts
+INVALIDATED_BY = {
+    "restart": ("uptime", "ping"),
+}
+
+COUNTERS = ("hits", "misses", "expired", "stores", "evictions")
+
+
+class ResultCache:
+    """
+    Thread-safe TTL + LRU map: (operation, device_id) -> result dict.
+    Only successful results are kept.
+    """
+
+    def __init__(self, ttls: dict, max_entries: int = 2048):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self._items = OrderedDict()  # key -> (monotonic time, datetime, result)
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, op: str, name: str):
+        counters = self._counters.setdefault(op, dict.fromkeys(COUNTERS, 0))
+        counters[name] += 1
+
+    def enabled(self, op: str) -> bool:
+        return self.ttls.get(op, 0) > 0
+
+    def get(self, op: str, device_id: str) -> dict | None:
+        """
+        Cached result with its age ("cached_age_s"), or None.
+        """
+        if not self.enabled(op):
+            return None
+        key = (op, device_id)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self._count(op, "misses")
+                return None
+            stored, stored_at, result = item
+            age = time.monotonic() - stored
+            if age > self.ttls[op]:
+                del self._items[key]
+                self._count(op, "expired")
+                self._count(op, "misses")
+                return None
+            self._items.move_to_end(key)
+            self._count(op, "hits")
+        return {
+            **result,
+            "cached": True,
+            "cached_at": stored_at.isoformat(timespec="seconds"),
+            "cached_age_s": round(age, 1),
+        }
+
+    def put(self, op: str, device_id: str, result: dict):
+        if not self.enabled(op) or not isinstance(result, dict) or result.get("status") != "success":
+            return
+        key = (op, device_id)
+        with self._lock:
+            self._items[key] = (time.monotonic(), datetime.now(), result)
+            self._items.move_to_end(key)
+            self._count(op, "stores")
+            while len(self._items) > self.max_entries:
+                (old_op, _), _ = self._items.popitem(last=False)
+                self._count(old_op, "evictions")
+
+    def invalidate(self, device_id: str, ops=None):
+        with self._lock:
+            for op in ops or list(self.ttls):
+                self._items.pop((op, device_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            sizes = {}
+            for op, _ in self._items:
+                sizes[op] = sizes.get(op, 0) + 1
+            operations = {}
+            for op in sorted(set(self.ttls) | set(self._counters)):
+                counters = self._counters.get(op, dict.fromkeys(COUNTERS, 0))
+                lookups = counters["hits"] + counters["misses"]
+                operations[op] = {
+                    "ttl_s": self.ttls.get(op, 0),
+                    "entries": sizes.get(op, 0),
+                    **counters,
+                    "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else None,
+                }
+            return {"entries": len(self._items), "max_entries": self.max_entries, "operations": operations}
+
+    def record_job(self, job):
+        """
+        Job engine finish listener: cache the per-host results of cacheable
+        operations, drop stale ones after a restart.
+        """
+        op = job.kind.removesuffix("_batch")
+        if not isinstance(job.result, dict):
+            return
+        results = [job.result] if "device_id" in job.result else list(job.result.values())
+        for result in results:
+            if not isinstance(result, dict) or not result.get("device_id"):
+                continue
+            if op in INVALIDATED_BY:
+                self.invalidate(result["device_id"], INVALIDATED_BY[op])
+            else:
+                self.put(op, result["device_id"], {**result, "job_id": job.id})
+
+
+_cache = None
+
+
+def get_result_cache() -> ResultCache:
+    global _cache
+    if _cache is None:
+        cfg = get_settings()["cache"]
+        _cache = ResultCache(cfg["ttl"], cfg["max_entries"])
+    return _cache
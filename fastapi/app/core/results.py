@@ -0,0 +1,142 @@
+# fastapi/app/core/results.py
+#
+# Writes finished jobs / schedule runs to the SQLite store (app/db.py) and
+# reads them back for the history endpoints. Everything here is blocking:
+# call it from a worker thread (asyncio.to_thread), never on the event loop.
+
+from datetime import datetime
+
+from app.db import JobRecord, ScheduleRun, get_session
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat(timespec="seconds") if value else None
+
+
+def record_job(job):
+    """
+    Job engine finish listener: store one finished Job.
+    """
+    result = job.result if isinstance(job.result, dict) else None
+    duration_ms = None
+    if job.started_at and job.finished_at:
+        duration_ms = (job.finished_at - job.started_at).total_seconds() * 1000
+
+    with get_session() as session:
+        session.merge(JobRecord(
+            id=job.id,
+            kind=job.kind,
+            device_id=job.device_id,
+            vendor=job.vendor,
+            status=job.status,
+            result_status=result.get("status") if result else None,
+            source=job.source,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            duration_ms=duration_ms,
+            error=job.error,
+            result=job.result,
+        ))
+        session.commit()
+
+
+def record_schedule_run(
+    schedule: str,
+    operation: str,
+    trigger: str,
+    started_at: datetime,
+    status: str,
+    summary: dict | None = None,
+    message: str | None = None,
+):
+    summary = summary or {}
+    with get_session() as session:
+        session.add(ScheduleRun(
+            schedule=schedule,
+            operation=operation,
+            trigger=trigger,
+            started_at=started_at,
+            finished_at=datetime.now(),
+            status=status,
+            total=summary.get("total", 0),
+            succeeded=summary.get("succeeded", 0),
+            failed=summary.get("failed", 0),
+            message=message,
+            details={h: r.get("status") for h, r in summary.get("results", {}).items()},
+        ))
+        session.commit()
+
+
+def job_record_to_dict(rec: JobRecord, include_result: bool = False) -> dict:
+    data = {
+        "job_id": rec.id,
+        "kind": rec.kind,
+        "device_id": rec.device_id,
+        "vendor": rec.vendor,
+        "status": rec.status,
+        "result_status": rec.result_status,
+        "source": rec.source,
+        "created_at": _iso(rec.created_at),
+        "started_at": _iso(rec.started_at),
+        "finished_at": _iso(rec.finished_at),
+        "duration_ms": round(rec.duration_ms, 1) if rec.duration_ms is not None else None,
+        "error": rec.error,
+    }
+    if include_result:
+        data["result"] = rec.result
+    return data
+
+
+def query_jobs(
+    kind: str | None = None,
+    device_id: str | None = None,
+    vendor: str | None = None,
+    status: str | None = None,
+    source: str | None = None,
+    since: datetime | None = None,
+    limit: int = 100,
+    include_result: bool = False,
+) -> list[dict]:
+    with get_session() as session:
+        q = session.query(JobRecord)
+        if kind:
+            q = q.filter(JobRecord.kind == kind)
+        if device_id:
+            q = q.filter(JobRecord.device_id == device_id)
+        if vendor:
+            q = q.filter(JobRecord.vendor == vendor)
+        if status:
+            # either the engine state (done/error) or the operation's status (success/fail)
+            q = q.filter((JobRecord.status == status) | (JobRecord.result_status == status))
+        if source:
+            q = q.filter(JobRecord.source.like(f"{source}%"))
+        if since:
+            q = q.filter(JobRecord.created_at >= since)
+        rows = q.order_by(JobRecord.created_at.desc()).limit(limit).all()
+        return [job_record_to_dict(r, include_result) for r in rows]
+
+
+def query_schedule_runs(schedule: str | None = None, limit: int = 50) -> list[dict]:
+    with get_session() as session:
+        q = session.query(ScheduleRun)
+        if schedule:
+            q = q.filter(ScheduleRun.schedule == schedule)
+        rows = q.order_by(ScheduleRun.started_at.desc()).limit(limit).all()
+        return [
+            {
+                "id": r.id,
+                "schedule": r.schedule,
+                "operation": r.operation,
+                "trigger": r.trigger,
+                "status": r.status,
+                "started_at": _iso(r.started_at),
+                "finished_at": _iso(r.finished_at),
+                "total": r.total,
+                "succeeded": r.succeeded,
+                "failed": r.failed,
+                "message": r.message,
+                "details": r.details,
+            }
+            for r in rows
+        ]
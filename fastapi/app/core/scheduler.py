@@ -0,0 +1,331 @@
+# fastapi/app/core/scheduler.py
+#
+# Built-in periodic assurance: nightly backups, ping sweeps every few
+# minutes, hourly uptime ... configured under `scheduler:` in settings.yml.
+#
+#   - cron-style times (5 fields: minute hour day-of-month month day-of-week)
+#   - random jitter per firing, so schedules don't all hit the boxes at :00
+#   - a schedule never overlaps itself: if the previous run is still going,
+#     the firing is skipped (and recorded as skipped_overlap)
+#   - a run is a bulk run (app/core/bulk.py), exactly like the devices
+#     page's: chunked batch jobs, per-vendor concurrency from the job engine
+#     (jobs.vendor_limits); scheduled runs never reuse cached results
+#   - every run lands in the results DB (schedule_runs + one row per job)
+#   - with several app worker processes (server.workers) only the one
+#     holding scheduler.lock_file runs the schedules
+
+import asyncio
+import fcntl
+import os
+import random
+from datetime import datetime, timedelta
+
+from app.core.bulk import ERROR, OPERATIONS, start_bulk
+from app.core.devices_loader import get_inventory, select_devices
+from app.core.settings import ROOT_DIR, get_settings
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@nightly": "0 2 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# (min, max) per cron field
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+# ---------------------------
+# Cron expressions
+# ---------------------------
+
+def _parse_field(text: str, lo: int, hi: int) -> set[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"bad step in '{text}'")
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+        else:
+            start = int(part)
+            end = hi if step > 1 else start  # "5/15" = from 5 every 15
+        if not (lo <= start <= end <= hi):
+            raise ValueError(f"'{text}' is outside {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSpec:
+    """
+    Standard 5-field cron: "*/5 * * * *", "0 2 * * 1-5", "15,45 8-18 * * *" ...
+    Day-of-week 0 and 7 are Sunday. As in cron, when both day-of-month and
+    day-of-week are restricted a day matching either one fires.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        fields = ALIASES.get(expr.strip(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron '{expr}' needs 5 fields")
+
+        parsed = [_parse_field(f, lo, hi) for f, (lo, hi) in zip(fields, FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, dow = parsed
+        self.weekdays = {d % 7 for d in dow}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays  # cron: 0 = Sunday
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def matches(self, dt: datetime) -> bool:
+        return (
+            dt.minute in self.minutes
+            and dt.hour in self.hours
+            and dt.month in self.months
+            and self._day_matches(dt)
+        )
+
+    def next_after(self, dt: datetime) -> datetime:
+        """
+        First matching minute strictly after dt. Skips whole months/days/hours
+        that can't match, so this is a handful of steps, not a minute-by-minute scan.
+        """
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t.year + 5
+        while t.year <= limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            if t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+                continue
+            return t
+        raise ValueError(f"cron '{self.expr}' never fires")
+
+
+# ---------------------------
+# Schedules
+# ---------------------------
+
+class Schedule:
+    def __init__(self, cfg: dict):
+        self.name = cfg["name"]
+        self.operation = cfg["operation"]
+        if self.operation not in OPERATIONS:
+            raise ValueError(f"schedule '{self.name}': unknown operation '{self.operation}'")
+        self.cron = CronSpec(cfg["cron"])
+        self.jitter = float(cfg.get("jitter", 0))
+        self.enabled = cfg.get("enabled", True)
+        self.hosts = cfg.get("hosts") or []
+        self.vendor = cfg.get("vendor")
+        self.group = cfg.get("group")
+
+        self.slot = None      # cron time of the next firing
+        self.due = None       # slot + jitter
+        self.running = None   # asyncio.Task of the current run
+        self.last_run = None  # summary of the last finished run
+
+    def plan(self, after: datetime):
+        self.slot = self.cron.next_after(after)
+        self.due = self.slot + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def devices(self) -> list[dict]:
+        if self.hosts or self.vendor or self.group:
+            devices, _ = select_devices(self.hosts, self.vendor, self.group)
+            return devices
+        return get_inventory().devices
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "operation": self.operation,
+            "cron": self.cron.expr,
+            "jitter": self.jitter,
+            "enabled": self.enabled,
+            "hosts": self.hosts,
+            "vendor": self.vendor,
+            "group": self.group,
+            "next_run": self.due.isoformat(timespec="seconds") if self.due else None,
+            "running": bool(self.running and not self.running.done()),
+            "last_run": self.last_run,
+        }
+
+
+async def run_operation(operation: str, devices: list[dict], source: str, scope: dict | None = None) -> dict:
+    """
+    Run one operation over a device list as a bulk run and wait for it.
+    Returns the batch-style summary (status/total/succeeded/failed/results).
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"unknown operation '{operation}'")
+    run = start_bulk(operation, devices, scope or {}, fresh=True, source=source)
+    await run.wait()
+    if run.status == ERROR:
+        raise RuntimeError(run.error)
+    return run.summary()
+
+
+class Scheduler:
+    """
+    One asyncio task on the app's event loop; wakes up for the next due
+    schedule and starts its run as a separate task.
+    """
+
+    def __init__(self, schedules: list[Schedule]):
+        self.schedules = {s.name: s for s in schedules}
+        self._task = None
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        now = datetime.now()
+        for s in self.schedules.values():
+            s.plan(now)
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+        print(f"⏱️  Scheduler started: {', '.join(self.schedules) or 'no schedules'}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            now = datetime.now()
+            for s in self.schedules.values():
+                if s.enabled and s.due <= now:
+                    # plan from the missed slot or now, whichever is later: no catch-up storms
+                    s.plan(max(s.slot, now))
+                    self.trigger(s.name)
+
+            upcoming = [s.due for s in self.schedules.values() if s.enabled]
+            # wake at least every 60s so wall-clock jumps (suspend, NTP) are noticed
+            delay = min([(d - datetime.now()).total_seconds() for d in upcoming] + [60])
+            await asyncio.sleep(max(delay, 0.5))
+
+    def trigger(self, name: str, trigger: str = "cron") -> dict:
+        """
+        Start a run of `name` now, unless one is still going.
+        """
+        s = self.schedules[name]
+        if s.running and not s.running.done():
+            print(f"⏭️  Schedule {name}: previous run still going, skipping")
+            asyncio.get_running_loop().create_task(
+                self._record(s, trigger, datetime.now(), "skipped_overlap", message="previous run still in progress")
+            )
+            return {"status": "skipped_overlap", "schedule": name}
+
+        s.running = asyncio.get_running_loop().create_task(self._execute(s, trigger))
+        return {"status": "started", "schedule": name}
+
+    async def _execute(self, s: Schedule, trigger: str):
+        started = datetime.now()
+        try:
+            devices = s.devices()
+            scope = {"hosts": s.hosts, "vendor": s.vendor, "group": s.group}
+            summary = await run_operation(s.operation, devices, source=f"scheduler:{s.name}", scope=scope)
+            status, message = summary["status"], None
+        except Exception as exc:
+            summary, status, message = None, "error", f"{type(exc).__name__}: {exc}"
+            print(f"❌ Schedule {s.name} failed: {message}")
+
+        s.last_run = {
+            "status": status,
+            "started_at": started.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "total": summary["total"] if summary else 0,
+            "succeeded": summary["succeeded"] if summary else 0,
+            "message": message,
+        }
+        await self._record(s, trigger, started, status, summary, message)
+
+    async def _record(self, s: Schedule, trigger, started, status, summary=None, message=None):
+        if not get_settings()["db"]["record_jobs"]:
+            return
+        from app.core.results import record_schedule_run
+
+        try:
+            await asyncio.to_thread(
+                record_schedule_run, s.name, s.operation, trigger, started, status, summary, message
+            )
+        except Exception as exc:
+            print(f"⚠️  Could not record run of schedule {s.name}: {exc}")
+
+
+_scheduler = None
+_lock_file = None
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is None:
+        cfg = get_settings()["scheduler"]
+        _scheduler = Scheduler([Schedule(c) for c in cfg["schedules"]])
+    return _scheduler
+
+
+def _claim_lock() -> bool:
+    """
+    Take the scheduler lock (non-blocking flock, held until the process
+    exits). False when another worker process already has it.
+    """
+    global _lock_file
+    path = ROOT_DIR / get_settings()["scheduler"]["lock_file"]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, "a+")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return False
+    f.seek(0)
+    f.truncate()
+    f.write(f"{os.getpid()}\n")
+    f.flush()
+    _lock_file = f
+    return True
+
+
+def start_scheduler():
+    """
+    Called at app startup. Does nothing unless scheduler.enabled is set,
+    or when another worker process of the app already runs the schedules.
+    """
+    if not get_settings()["scheduler"]["enabled"]:
+        return
+    if not _claim_lock():
+        print(f"⏱️  Scheduler runs in another worker process (pid {os.getpid()} stays idle)")
+        return
+    get_scheduler().start()
+
+
+async def stop_scheduler():
+    global _lock_file
+    if _scheduler is not None:
+        await _scheduler.stop()
+    if _lock_file is not None:
+        _lock_file.close()  # releases the flock
+        _lock_file = None
@@ -0,0 +1,189 @@
+# fastapi/app/core/settings.py
+
+import copy
+import os
+import yaml
+from pathlib import Path
+
+# Project root: /home/abhiraj/Projects/device_assurance
+ROOT_DIR = Path(__file__).resolve().parents[3]
+
+# Console settings (relative to project root)
+SETTINGS_FILE = ROOT_DIR / "config" / "settings.yml"
+
+# Overrides server.mode: how `python main.py --mode` reaches the worker
+# processes (also usable under gunicorn)
+MODE_ENV = "ASSURANCE_SERVER_MODE"
+
+# Defaults used for anything not set in config/settings.yml
+DEFAULTS = {
+    "server": {
+        # `python main.py` launch mode:
+        #   development: one process, reloads on code changes, templates
+        #                re-read when edited
+        #   production:  no reloader, `workers` processes, templates
+        #                compiled once (bytecode cached under cache_dir)
+        # Job engine, device locks and caches are per process: more than
+        # one worker is refused while jobs.device_locks has operations.
+        "mode": "development",
+        "host": "0.0.0.0",
+        "port": 3399,
+        "workers": 1,
+        # Caches shared by all worker processes (compiled templates,
+        # parsed inventory), relative to the project root
+        "cache_dir": "data/cache",
+        # Print every registered route at startup
+        "log_routes": False,
+    },
+    "jobs": {
+        # Threads available for running playbooks off the event loop
+        "max_workers": 16,
+        # Max concurrent playbooks per vendor (vendors not listed use the default)
+        "default_vendor_limit": 4,
+        "vendor_limits": {},
+        # How many finished jobs to keep around for /jobs/ lookups
+        "keep_finished": 500,
+        # One session per device: these operations lock the device while
+        # they run. A request for a busy device queues behind the current
+        # job (at most max_queue deep) or, for operations whose on_conflict
+        # is "reject", is turned away. Identical requests always join the
+        # job already in flight.
+        "device_locks": {
+            "operations": ["backup", "uptime", "restart"],
+            "on_conflict": {"default": "queue", "restart": "reject"},
+            "max_queue": 4,
+        },
+    },
+    "runner": {
+        # Long-lived processes with Ansible, collections and inventory
+        # already loaded (0 = always use the ansible-playbook CLI)
+        "warm_workers": 2,
+        # Output lines kept in memory per run / job for the UI tail
+        # (the full output always goes to the log file)
+        "tail_lines": 500,
+        # A playbook run printing more than this (stdout + stderr) is
+        # killed; protects the app from -vvvv / huge show commands
+        "max_output_bytes": 50 * 1024 * 1024,
+        # Per-phase timings (spawn, first output, first result, completion):
+        # /metrics histograms plus a "timing" line in each host log
+        "phase_timing": False,
+    },
+    "ping": {
+        # "native" = asyncio ICMP/TCP from the app, "ansible" = ping_test.yml
+        "engine": "native",
+        "count": 3,
+        "timeout": 1.0,      # seconds per probe
+        "interval": 0.2,     # seconds between probes to one host
+        "tcp_ports": [22, 23, 443],  # fallback when ICMP sockets aren't permitted
+        "concurrency": 64,   # hosts probed at once by /ping/all and native bulk pings
+    },
+    "batch": {
+        # Max hosts one ansible-playbook process works on in parallel
+        "forks": 20,
+        # Per-vendor override (e.g. fewer for telnet-only Cisco boxes)
+        "vendor_forks": {},
+    },
+    "bulk": {
+        # A bulk run (POST /bulk/<operation>) splits each vendor's devices
+        # into batch jobs of this many hosts ...
+        "chunk_size": 10,
+        # ... and has at most this many of them queued / running at once
+        "parallel": 4,
+        # Finished bulk runs kept in memory for GET /bulk/
+        "keep_finished": 50,
+    },
+    "backups": {
+        # Content-addressed backup store, relative to the project root
+        "store": "data/backups",
+        # Full copy (keyframe) after this many stored changes
+        "keyframe_every": 20,
+        # ... or sooner, once a delta is this big relative to the keyframe
+        "max_delta_ratio": 0.5,
+        # Replace byte-identical raw backups with hard links to the previous one
+        "hardlink_unchanged": True,
+        # Parsed configs kept in memory for repeated diffs (LRU, by config hash)
+        "parsed_cache_size": 64,
+        # Diff + changes-index entry whenever a backup's config hash changes
+        "change_events": True,
+    },
+    "compliance": {
+        # Rules file and cache/report folder, relative to the project root
+        "rules": "config/compliance.yml",
+        "data_dir": "data/compliance",
+        # Worker processes for a scan; below min_parallel configs to
+        # evaluate, the scan runs inline (spawning workers costs more)
+        "workers": 4,
+        "min_parallel": 16,
+    },
+    "cache": {
+        # Read-only results served without contacting the device for this
+        # many seconds (per operation; 0 = never cached). ?fresh=1 bypasses.
+        "ttl": {"uptime": 300, "ping": 30},
+        # LRU bound over all operations
+        "max_entries": 2048,
+    },
+    "db": {
+        # SQLite results store, relative to the project root
+        "path": "data/assurance.db",
+        # Write every finished job (and schedule run) to the store
+        "record_jobs": True,
+    },
+    "scheduler": {
+        "enabled": False,
+        # Held by the one worker process that runs the schedules
+        "lock_file": "data/scheduler.lock",
+        # [{name, cron, operation: ping|uptime|backup, jitter (s), hosts/vendor/group}]
+        "schedules": [],
+    },
+}
+
+_settings = None
+
+
+def _merge(base: dict, override: dict) -> dict:
+    merged = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_settings() -> dict:
+    """
+    Read config/settings.yml and merge it over DEFAULTS.
+    A missing or empty settings file just gives the defaults.
+    """
+    data = {}
+    if SETTINGS_FILE.exists():
+        with open(SETTINGS_FILE, "r") as f:
+            data = yaml.safe_load(f) or {}
+    settings = _merge(DEFAULTS, data)
+    if os.environ.get(MODE_ENV):
+        settings["server"]["mode"] = os.environ[MODE_ENV]
+    return settings
+
+
+def get_settings() -> dict:
+    """
+    Settings are read once per process and cached.
+    """
+    global _settings
+    if _settings is None:
+        _settings = load_settings()
+    return _settings
+
+
+def production() -> bool:
+    return get_settings()["server"]["mode"] == "production"
+
+
+def cache_dir(name: str) -> Path:
+    """
+    <server.cache_dir>/<name>, created on first use. Shared by every
+    worker process of the app.
+    """
+    path = ROOT_DIR / get_settings()["server"]["cache_dir"] / name
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,195 @@
+# fastapi/app/db.py
+#
+# SQLite results store (SQLAlchemy).
+#
+# Nothing is opened at import time: the engine and tables are created on the
+# first get_session(), so routes that never touch the store don't pay for it.
+
+import json
+import threading
+
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, JSON, String, Text, UniqueConstraint, create_engine, event,
+)
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.core.settings import ROOT_DIR, get_settings
+
+Base = declarative_base()
+
+
+class JobRecord(Base):
+    """
+    One finished job (see app/core/jobs.py). Batch jobs keep the
+    comma-joined host list in device_id, as Job does.
+    """
+
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(32), nullable=False)
+    device_id = Column(Text, nullable=False)
+    vendor = Column(String(32))
+    status = Column(String(16), nullable=False)         # done / error (job engine)
+    result_status = Column(String(32))                  # success / fail / partial ... (operation)
+    source = Column(String(64), nullable=False, default="api")
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    duration_ms = Column(Float)
+    error = Column(Text)
+    result = Column(JSON)
+
+    __table_args__ = (
+        Index("ix_jobs_kind_created", "kind", "created_at"),
+        Index("ix_jobs_device_created", "device_id", "created_at"),
+        Index("ix_jobs_vendor_created", "vendor", "created_at"),
+        Index("ix_jobs_source_created", "source", "created_at"),
+    )
+
+
+class ScheduleRun(Base):
+    """
+    One firing of a schedule (app/core/scheduler.py), including the ones
+    skipped because the previous run was still going.
+    """
+
+    __tablename__ = "schedule_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    schedule = Column(String(64), nullable=False)
+    operation = Column(String(32), nullable=False)
+    trigger = Column(String(16), nullable=False, default="cron")  # cron / manual
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+    status = Column(String(32), nullable=False)  # success / partial / fail / error / skipped_overlap
+    total = Column(Integer, default=0)
+    succeeded = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    message = Column(Text)
+    details = Column(JSON)  # {host: result status}
+
+    __table_args__ = (
+        Index("ix_schedule_runs_schedule_started", "schedule", "started_at"),
+    )
+
+
+class RunRecord(Base):
+    """
+    One host's result of one operation: ping, backup, uptime, restart or diff.
+    Filled live from finished jobs and, for older runs, by the log backfill
+    (python -m app.core.history backfill). log_path is unique, so
+    re-running the backfill never duplicates rows.
+    """
+
+    __tablename__ = "runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_type = Column(String(16), nullable=False)
+    host = Column(String(64), nullable=False)
+    vendor = Column(String(32))
+    status = Column(String(32), nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    duration_ms = Column(Float)
+    # ping only
+    method = Column(String(16))
+    sent = Column(Integer)
+    received = Column(Integer)
+    loss_pct = Column(Float)
+    rtt_min = Column(Float)
+    rtt_avg = Column(Float)
+    rtt_max = Column(Float)
+    # uptime line, diff summary, error message ...
+    detail = Column(Text)
+    log_path = Column(Text, unique=True)
+    job_id = Column(String(32))
+    source = Column(String(64), default="api")
+
+    __table_args__ = (
+        Index("ix_runs_host_type_started", "host", "run_type", "started_at"),
+        Index("ix_runs_type_started", "run_type", "started_at"),
+        Index("ix_runs_vendor_type_started", "vendor", "run_type", "started_at"),
+        Index("ix_runs_type_status_started", "run_type", "status", "started_at"),
+    )
+
+
+class ChangeRecord(Base):
+    """
+    One config change: a new backup whose normalized hash differs from the
+    previous revision (see app/core/changes.py). The diff itself is in
+    diff_path; the columns are what the changes feed filters and shows.
+    """
+
+    __tablename__ = "changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    host = Column(String(64), nullable=False)
+    vendor = Column(String(32), nullable=False)
+    detected_at = Column(DateTime, nullable=False)
+    backup_time = Column(DateTime, nullable=False)      # when the new backup was taken
+    from_rev = Column(Integer, nullable=False)
+    to_rev = Column(Integer, nullable=False)
+    from_hash = Column(String(64), nullable=False)
+    to_hash = Column(String(64), nullable=False)
+    from_backup = Column(Text)
+    to_backup = Column(Text)
+    mode = Column(String(16))                            # semantic / unified
+    sections_added = Column(Integer, default=0)
+    sections_removed = Column(Integer, default=0)
+    sections_changed = Column(Integer, default=0)
+    lines_added = Column(Integer, default=0)
+    lines_removed = Column(Integer, default=0)
+    diff_path = Column(Text)
+    source = Column(String(64), default="api")
+
+    __table_args__ = (
+        # one event per stored revision, however often detection runs
+        UniqueConstraint("vendor", "host", "to_rev", name="uq_changes_device_rev"),
+        Index("ix_changes_backup_time", "backup_time"),
+        Index("ix_changes_host_backup_time", "host", "backup_time"),
+        Index("ix_changes_vendor_backup_time", "vendor", "backup_time"),
+    )
+
+
+_engine = None
+_Session = None
+_lock = threading.Lock()
+
+
+def db_path():
+    return ROOT_DIR / get_settings()["db"]["path"]
+
+
+def get_engine():
+    global _engine, _Session
+    with _lock:
+        if _engine is None:
+            path = db_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            engine = create_engine(
+                f"sqlite:///{path}",
+                connect_args={"check_same_thread": False, "timeout": 30},
+                json_serializer=lambda obj: json.dumps(obj, default=str),
+            )
+
+            @event.listens_for(engine, "connect")
+            def _sqlite_pragmas(conn, _record):
+                # WAL: readers (history endpoints) never block the job writers
+                cur = conn.cursor()
+                cur.execute("PRAGMA journal_mode=WAL")
+                cur.execute("PRAGMA synchronous=NORMAL")
+                cur.close()
+
+            Base.metadata.create_all(engine)
+            _Session = sessionmaker(bind=engine, expire_on_commit=False)
+            _engine = engine
+    return _engine
+
+
+def get_session():
+    """
+    New session on the shared engine. Use as a context manager:
+        with get_session() as session: ...
+    """
+    get_engine()
+    return _Session()
@@ -0,0 +1,128 @@
+# fastapi/bench_startup.py
+#
+# Startup / per-request overhead benchmark:
+#   cd fastapi && python bench_startup.py [--runs 5]
+#
+#   import      cold `import main` in a fresh interpreter (median of --runs)
+#   inventory   devices.yml: pure-Python YAML, libyaml, shared JSON cache
+#   templates   devices.html: first render (compile, with and without the
+#               bytecode cache) and per-request render in both modes
+#   request     GET /devices/ through the app, development vs production
+
+import argparse
+import hashlib
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:8.2f} ms"
+
+
+def _timeit(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n
+
+
+def bench_import(runs: int):
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    print(f"import main (fresh interpreter)        {_ms(statistics.median(times))}   (min {_ms(min(times)).strip()})")
+
+
+def bench_inventory(n: int):
+    import yaml
+
+    from app.core import devices_loader
+
+    raw = devices_loader.DEVICES_FILE.read_bytes()
+    digest = hashlib.sha1(raw).hexdigest()
+    print(f"devices.yml yaml.safe_load             {_ms(_timeit(lambda: yaml.safe_load(raw), n))}")
+    print(f"devices.yml {devices_loader.YAML_LOADER.__name__:<27}{_ms(_timeit(lambda: yaml.load(raw, Loader=devices_loader.YAML_LOADER), n))}")
+    devices_loader._parse_cached(raw, digest)  # write the JSON cache
+    print(f"devices.yml shared JSON cache          {_ms(_timeit(lambda: devices_loader._parse_cached(raw, digest), n))}")
+
+
+def bench_templates(n: int):
+    from jinja2 import FileSystemBytecodeCache
+
+    from app.api.templating import TEMPLATES_DIR
+    from app.core.devices_loader import get_inventory
+    from fastapi.templating import Jinja2Templates
+
+    inventory = get_inventory()
+    context = {
+        "request": SimpleNamespace(url=SimpleNamespace(path="/devices/")),
+        "branch_devices": inventory.branch_sorted,
+        "branch_by_vendor": inventory.branch_by_vendor,
+        "core_devices": inventory.core_sorted,
+        "vendors": sorted(inventory.by_vendor),
+        "url_for": lambda *a, **k: "",
+    }
+
+    with tempfile.TemporaryDirectory() as cache:
+        def first_render(bytecode: bool) -> float:
+            env = Jinja2Templates(directory=str(TEMPLATES_DIR)).env
+            if bytecode:
+                env.bytecode_cache = FileSystemBytecodeCache(cache)
+            start = time.perf_counter()
+            env.get_template("devices.html").render(context)
+            return time.perf_counter() - start
+
+        first_render(True)  # fill the bytecode cache
+        print(f"devices.html first render (compile)    {_ms(first_render(False))}")
+        print(f"devices.html first render (bytecode)   {_ms(first_render(True))}")
+
+    for auto_reload in (True, False):
+        env = Jinja2Templates(directory=str(TEMPLATES_DIR)).env
+        env.auto_reload = auto_reload
+        env.get_template("devices.html").render(context)
+        per = _timeit(lambda: env.get_template("devices.html").render(context), n)
+        label = "development" if auto_reload else "production"
+        print(f"devices.html render ({label:<11})     {_ms(per)}")
+
+
+def bench_requests(n: int):
+    from fastapi.testclient import TestClient
+
+    import main
+    from app.api.templating import configure_templates
+    from app.core.settings import get_settings
+
+    client = TestClient(main.app)  # no lifespan: no scheduler / warm workers
+    for mode in ("development", "production"):
+        get_settings()["server"]["mode"] = mode
+        configure_templates()
+        client.get("/devices/")
+        per = _timeit(lambda: client.get("/devices/"), n)
+        print(f"GET /devices/ ({mode:<11})           {_ms(per)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python bench_startup.py")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters for the import timing")
+    parser.add_argument("-n", type=int, default=200, help="iterations for the in-process timings")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, HERE)
+    os.chdir(HERE)
+    bench_import(args.runs)
+    bench_inventory(args.n)
+    bench_templates(args.n)
+    bench_requests(args.n)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,62 @@
 # fastapi/app/main.py
+#
+#   development: python main.py                 (reloader, one process)
+#   production:  python main.py --mode production --workers 4
+#                (or gunicorn -k uvicorn.workers.UvicornWorker -w 4 main:app)
+# Defaults come from settings.yml -> server.
+#
+# Each worker process has its own job engine, device locks, result cache and
+# warm workers. Device locks (one session per device) and the sharing of
+# identical requests would only hold within one process, so more than one
+# worker is refused while jobs.device_locks.operations is non-empty: run one
+# worker (it is I/O bound; playbooks run in their own processes), or empty
+# that list knowingly. gunicorn -w N bypasses this check.
 
-from fastapi import FastAPI, Request
+import argparse
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
 from fastapi.responses import RedirectResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 
 # ROUTES
 from app.api.routes import api_router
+from app.api.templating import configure_templates
+from app.ansible_runner import warm_pool
+from app.ansible_worker import shutdown_warm_pool
+from app.core.scheduler import start_scheduler, stop_scheduler
+from app.core.settings import MODE_ENV, get_settings
 
 # -----------------------------------------------------
-# Create app instance
+# Startup / shutdown
 # -----------------------------------------------------
-app = FastAPI(title="DOS Device Assurance Console")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Templates: reloading (development) or compiled once (production)
+    configure_templates()
+    # Warm ansible workers: start at boot, stop on shutdown
+    warm_pool()
+    # Scheduled ping / uptime / backup (settings.yml -> scheduler)
+    start_scheduler()
+    # DEBUG: show all routes (settings.yml -> server.log_routes)
+    if get_settings()["server"]["log_routes"]:
+        log_routes(app)
+    try:
+        yield
+    finally:
+        await stop_scheduler()
+        shutdown_warm_pool()
 
 # -----------------------------------------------------
-# Mount static files
+# Create app instance
 # -----------------------------------------------------
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app = FastAPI(title="DOS Device Assurance Console", lifespan=lifespan)
 
 # -----------------------------------------------------
-# Jinja2 template directory
+# Mount static files
 # -----------------------------------------------------
-templates = Jinja2Templates(directory="app/templates")
+app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # -----------------------------------------------------
 # Route Registration
@@ -35,21 +70,44 @@ app.include_router(api_router)
 async def root():
     return RedirectResponse(url="/auth/login")
 
-# DEBUG: Show all routes
-print("\n==== Registered Routes ====")
-for route in app.routes:
-    try:
-        print(f"{route.path}  -->  {route.methods}")
-    except AttributeError:
-        # Static/Mount routes (no methods)
-        print(f"{route.path}  -->  MOUNT")
-print("===========================\n")
+# -----------------------------------------------------
+# DEBUG: Show all routes (settings.yml -> server.log_routes)
+# -----------------------------------------------------
+def log_routes(app: FastAPI):
+    print("\n==== Registered Routes ====")
+    for route in app.routes:
+        try:
+            print(f"{route.path}  -->  {route.methods}")
+        except AttributeError:
+            # Static/Mount routes (no methods)
+            print(f"{route.path}  -->  MOUNT")
+    print("===========================\n")
+
+
+def serve(argv=None):
+    cfg = dict(get_settings()["server"])
+    parser = argparse.ArgumentParser(prog="python main.py")
+    parser.add_argument("--mode", choices=("development", "production"), default=cfg["mode"])
+    parser.add_argument("--host", default=cfg["host"])
+    parser.add_argument("--port", type=int, default=cfg["port"])
+    parser.add_argument("--workers", type=int, default=cfg["workers"])
+    args = parser.parse_args(argv)
+    if args.mode == "production" and args.workers > 1 and get_settings()["jobs"]["device_locks"]["operations"]:
+        parser.error(
+            "device locks are per process: --workers > 1 would let two workers log into one device "
+            "at once. Run one worker, or empty jobs.device_locks.operations in settings.yml"
+        )
+
+    # uvicorn imports main:app again (in each worker process)
+    os.environ[MODE_ENV] = args.mode
+    get_settings()["server"]["mode"] = args.mode
 
-if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=3399,
-        reload=True
-    )
\ No newline at end of file
+    if args.mode == "production":
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers, reload=False)
+    else:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
+
+
+if __name__ == "__main__":
+    serve()
\ No newline at end of file
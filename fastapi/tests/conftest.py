@@ -0,0 +1,38 @@
+# fastapi/tests/conftest.py
+#
+# Run from the fastapi/ folder: python -m pytest -q tests
+
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+# Import app.* the way main.py does
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core import settings as settings_module  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    """
+    Every test gets the DEFAULTS (not config/settings.yml); tests change
+    what they need in the returned dict.
+    """
+    value = copy.deepcopy(settings_module.DEFAULTS)
+    monkeypatch.setattr(settings_module, "_settings", value)
+    return value
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch, settings):
+    """
+    A fresh results store under tmp_path for tests that record runs.
+    """
+    from app import db as db_module
+
+    settings["db"]["path"] = str(tmp_path / "assurance.db")  # absolute: ROOT_DIR / it == it
+    monkeypatch.setattr(db_module, "_engine", None)
+    monkeypatch.setattr(db_module, "_Session", None)
+    return db_module
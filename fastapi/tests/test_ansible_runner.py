@@ -0,0 +1,144 @@
+# fastapi/tests/test_ansible_runner.py
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from app import ansible_runner
+from app.ansible_runner import HostRun, OutputBudget, OutputLimitExceeded, RunCollector
+
+
+def _event(**fields) -> str:
+    return json.dumps(fields)
+
+
+def _result(host, status="ok", **result) -> str:
+    return _event(
+        event="result", status=status, host=host, play="p", task="t",
+        action="command", register="out", result=result,
+    )
+
+
+def _stats(**hosts) -> str:
+    return _event(event="stats", hosts={
+        host: {"ok": 1, "failures": failures, "unreachable": 0, "changed": 0, "skipped": 0, "rescued": 0, "ignored": 0}
+        for host, failures in hosts.items()
+    })
+
+
+def _collector(*hosts, on_line=None):
+    return RunCollector({h: HostRun(h, "Cisco", tail_lines=50) for h in hosts}, on_line, tail_lines=50)
+
+
+def test_recap_decides_success():
+    collector = _collector("r1", "r2")
+    collector.feed(_event(event="play_start", play="p"))
+    collector.feed(_result("r1", stdout="up 3 days"))
+    collector.feed(_result("r2", status="failed", msg="boom"))
+    collector.feed(_stats(r1=0, r2=1))
+    collector.finish()
+
+    assert collector.runs["r1"].success
+    assert collector.runs["r1"].value("out.stdout") == "up 3 days"
+    assert not collector.runs["r2"].success
+    assert "fatal: [r2]: FAILED!" in collector.runs["r2"].output
+    assert "r1" not in collector.runs["r2"].output
+
+
+@pytest.mark.parametrize("lines", [
+    [],  # rc 0 and not a single event
+    [_event(event="play_start", play="p")],
+    [_result("r1"), _stats(other=0)],  # recap for a different host only
+])
+def test_no_recap_is_a_failure(lines):
+    collector = _collector("r1")
+    for line in lines:
+        collector.feed(line)
+    collector.finish()
+
+    run = collector.runs["r1"]
+    assert run.stats is None
+    assert not run.success
+    assert "No PLAY RECAP for r1" in run.output
+
+
+def test_extra_output_and_note():
+    streamed = []
+    collector = _collector("r1", on_line=streamed.append)
+    collector.feed("[WARNING]: something odd")
+    collector.add_extra("stderr line")
+    collector.feed(_stats(r1=0))
+    collector.finish(ansible_runner.TIMEOUT_MESSAGE.format(timeout=5))
+
+    output = collector.runs["r1"].output
+    assert "[WARNING]: something odd" in output
+    assert "stderr line" in output
+    assert "TIMEOUT" in output
+    assert "[WARNING]: something odd" in streamed
+
+
+def test_host_log_file(tmp_path):
+    logfile = tmp_path / "r1.log"
+    collector = RunCollector({"r1": HostRun("r1", "Cisco", logfile, tail_lines=2)}, tail_lines=2)
+    collector.feed(_result("r1", stdout="first"))
+    collector.feed(_stats(r1=0))
+    collector.finish()
+
+    text = logfile.read_text()
+    assert "TASK [t]" in text and "PLAY RECAP" in text
+    # the in-memory tail is bounded, the log file is not
+    assert "TASK [t]" not in collector.runs["r1"].output
+
+
+def test_output_budget():
+    budget = OutputBudget(10)
+    budget.charge(6)
+    with pytest.raises(OutputLimitExceeded):
+        budget.charge(6)
+    assert OutputBudget(0).spend(10 ** 12)
+
+
+def test_failed_start_leaks_nothing(monkeypatch, tmp_path, settings):
+    settings["runner"]["warm_workers"] = 0
+    monkeypatch.setattr(ansible_runner, "ROOT", tmp_path)
+    monkeypatch.setattr(ansible_runner, "_build_cmd", lambda *args, **kwargs: "no-such-ansible-playbook")
+    fds = len(os.listdir("/proc/self/fd"))
+
+    with pytest.raises(FileNotFoundError):
+        ansible_runner.run_playbook_batch(ansible_runner.PING_PLAYBOOK, ["r1", "r2"], "Cisco")
+
+    assert len(os.listdir("/proc/self/fd")) == fds
+    # the per-host log files are only created once there is output
+    assert not list(tmp_path.rglob("*.log"))
+
+
+def test_long_line_hits_the_budget_unbuffered():
+    # 20 MB on one line, then hang: killed by the 1 MB budget, not the timeout
+    script = "import sys, time; sys.stdout.write('x' * 20_000_000); sys.stdout.flush(); time.sleep(60)"
+    collector = RunCollector({}, tail_lines=10)
+    seen = []
+    collector.feed = lambda line: seen.append(len(line))
+    start = time.monotonic()
+
+    success, note = ansible_runner._execute(f'{sys.executable} -c "{script}"', 30, collector, OutputBudget(1_000_000))
+
+    assert not success
+    assert collector.outcome == "output_limit"
+    assert "OUTPUT LIMIT" in note
+    assert time.monotonic() - start < 10
+    assert seen == []  # the partial line was never handed on
+
+
+def test_chunked_lines_are_reassembled():
+    script = "import sys; sys.stdout.write('y' * 200_000 + chr(10) + 'tail')"
+    collector = RunCollector({}, tail_lines=10)
+    seen = []
+    collector.feed = seen.append
+
+    success, _ = ansible_runner._execute(f'{sys.executable} -c "{script}"', 30, collector, OutputBudget(0))
+
+    assert success
+    assert seen == ["y" * 200_000, "tail"]
@@ -0,0 +1,82 @@
+# fastapi/tests/test_ansible_worker.py
+#
+# Runs real localhost playbooks through a warm worker process.
+
+import time
+
+import pytest
+
+pytest.importorskip("ansible")
+
+from app import ansible_runner  # noqa: E402
+from app.ansible_runner import HostRun, RunCollector  # noqa: E402
+from app.ansible_worker import WarmWorker  # noqa: E402
+
+INVENTORY = """
+all:
+  hosts:
+    local1:
+      ansible_connection: local
+      ansible_python_interpreter: "{{ ansible_playbook_python }}"
+"""
+
+TOUCH = """
+- hosts: all
+  gather_facts: false
+  tasks:
+    - name: touch
+      file:
+        path: "{{ target }}"
+        state: touch
+      register: touched
+"""
+
+SLOW = """
+- hosts: all
+  gather_facts: false
+  tasks:
+    - name: sleep
+      command: sleep 30
+"""
+
+
+@pytest.fixture
+def worker(tmp_path):
+    inventory = tmp_path / "inventory.yml"
+    inventory.write_text(INVENTORY)
+    worker = WarmWorker(inventory, ansible_runner.CALLBACK_PLUGINS, ansible_runner._ansible_env())
+    deadline = time.monotonic() + 60
+    while not worker.poll_ready():
+        assert worker.state != "dead", worker.error
+        assert time.monotonic() < deadline, "warm worker never got ready"
+        time.sleep(0.05)
+    yield worker
+    worker.stop()
+
+
+def test_warm_run_touches_and_reports(worker, tmp_path):
+    playbook = tmp_path / "touch.yml"
+    playbook.write_text(TOUCH)
+
+    for i in range(2):  # the same worker, twice
+        target = tmp_path / f"touched-{i}"
+        collector = RunCollector({"local1": HostRun("local1", "Local", tail_lines=50)}, tail_lines=50)
+        rc = worker.run(playbook, "local1", {"target": str(target)}, 5, 60, collector.feed, collector.add_extra)
+        collector.finish()
+
+        assert rc == 0
+        assert target.exists()
+        run = collector.runs["local1"]
+        assert run.stats["changed"] == 1
+        assert run.success
+        assert run.value("touched.dest") == str(target)
+
+
+def test_warm_run_timeout_kills_worker(worker, tmp_path):
+    playbook = tmp_path / "slow.yml"
+    playbook.write_text(SLOW)
+
+    with pytest.raises(TimeoutError):
+        worker.run(playbook, "local1", {}, 5, 2, lambda line: None)
+    assert worker.state == "dead"
+    assert not worker.poll_ready()
@@ -0,0 +1,151 @@
+# fastapi/tests/test_backup_store.py
+
+import fcntl
+import os
+
+import pytest
+
+from app.core import backup_store
+from app.core.backup_store import DeviceStore, import_all, ingest_new
+
+BASE = "\n".join(
+    ["! Last configuration change at 10:00:00 UTC Mon Mar 4 2024", "hostname r1"]
+    + [f"interface Gi0/{i}\n description port {i}\n no shutdown" for i in range(40)]
+) + "\n"
+
+
+def _config(change: int = 0, stamp: str = "10:00:00") -> str:
+    text = BASE.replace("10:00:00", stamp)
+    for i in range(change):
+        text = text.replace(f" description port {i}\n", f" description uplink {i}\n")
+    return text
+
+
+@pytest.fixture
+def roots(tmp_path, monkeypatch, settings):
+    configs = tmp_path / "configs"
+    settings["backups"]["store"] = str(tmp_path / "store")  # absolute: ROOT_DIR / it == it
+    monkeypatch.setattr(backup_store, "CONFIG_ROOT", configs)
+    monkeypatch.setattr(backup_store, "_stores", {})
+    return configs
+
+
+def _write(folder, name: str, text: str):
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{name}.cfg"
+    path.write_text(text)
+    # a fresh mtime_ns for the folder, so sync() lists it again
+    os.utime(folder, ns=(0, folder.stat().st_mtime_ns + 1000))
+    return path
+
+
+def test_round_trip_keyframes_and_deltas(roots, settings):
+    settings["backups"]["keyframe_every"] = 3
+    folder = roots / "Cisco" / "r1"
+    texts = [_config(change=i) for i in range(6)]
+    for i, text in enumerate(texts):
+        _write(folder, f"2024-03-0{i + 1}_02-00-00", text)
+
+    revisions = ingest_new("Cisco", "r1")
+    assert [r.rev for r in revisions] == [1, 2, 3, 4, 5, 6]
+    for revision, text in zip(revisions, texts):
+        assert revision.read_text() == text
+
+    store = backup_store.get_store("Cisco", "r1")
+    kinds = [store.index["objects"][r.hash]["kind"] for r in revisions]
+    # a keyframe, keyframe_every deltas against it, then a fresh keyframe
+    assert kinds == ["key", "delta", "delta", "delta", "key", "delta"]
+    assert store.index["objects"][revisions[1].hash]["base"] == revisions[0].hash
+
+    # a fresh store reads the same revisions back from disk
+    again = DeviceStore("Cisco", "r1")
+    assert [r.read_text() for r in again.revisions()] == texts
+    assert again.at(revisions[2].time).rev == 3
+
+
+def test_big_delta_cuts_a_keyframe(roots, settings):
+    settings["backups"]["max_delta_ratio"] = 0.01
+    folder = roots / "Cisco" / "r1"
+    _write(folder, "2024-03-01_02-00-00", _config())
+    _write(folder, "2024-03-02_02-00-00", _config(change=20))
+
+    first, second = ingest_new("Cisco", "r1")
+    objects = backup_store.get_store("Cisco", "r1").index["objects"]
+    assert objects[second.hash]["kind"] == "key"
+    assert second.read_text() == _config(change=20)
+
+
+def test_volatile_only_change_and_hardlinks(roots):
+    folder = roots / "Cisco" / "r1"
+    first = _write(folder, "2024-03-01_02-00-00", _config())
+    (rev1,) = ingest_new("Cisco", "r1")
+
+    # only the "Last configuration change" header differs: same config
+    _write(folder, "2024-03-02_02-00-00", _config(stamp="11:11:11"))
+    (rev2,) = ingest_new("Cisco", "r1")
+    assert rev2.hash == rev1.hash and not rev2.changed
+    assert len(backup_store.get_store("Cisco", "r1").index["objects"]) == 1
+
+    # byte-identical raw backup: replaced by a hard link to the previous file
+    third = _write(folder, "2024-03-03_02-00-00", _config(stamp="11:11:11"))
+    (rev3,) = ingest_new("Cisco", "r1")
+    assert not rev3.changed
+    assert third.samefile(folder / rev2.name)
+    assert not first.samefile(third)
+
+
+def test_ingest_new_reports_only_new_revisions(roots):
+    folder = roots / "Cisco" / "r1"
+    assert ingest_new("Cisco", "r1") is None  # no backup folder
+
+    _write(folder, "2024-03-01_02-00-00", _config())
+    assert [r.rev for r in ingest_new("Cisco", "r1")] == [1]
+    # a "successful" backup that wrote nothing: nothing new, not the old revision
+    assert ingest_new("Cisco", "r1") is None
+
+    # two backups piled up: both are reported, both changed
+    _write(folder, "2024-03-02_02-00-00", _config(change=1))
+    _write(folder, "2024-03-03_02-00-00", _config(change=2))
+    revisions = ingest_new("Cisco", "r1")
+    assert [(r.rev, r.changed) for r in revisions] == [(2, True), (3, True)]
+
+
+def test_import_all_layouts(roots, monkeypatch):
+    _write(roots / "Cisco" / "r1", "2024-03-01_02-00-00", _config())
+    _write(roots / "Cisco" / "r2", "2024-03-01_02-00-00", _config(change=1))
+    # Juniper old style: configs/<device_id>/ holds the backups directly
+    _write(roots / "j1", "2024-03-01_02-00-00", "set system host-name j1\n")
+    _write(roots / "stray", "2024-03-01_02-00-00", "x\n")
+    inventory = {"j1": {"id": "j1", "vendor": "Juniper"}}
+    monkeypatch.setattr(backup_store, "find_device", inventory.get)
+
+    stats = import_all(roots)
+
+    assert stats == {"devices": 3, "revisions": 3, "skipped": ["stray"]}
+    (revision,) = backup_store.get_store("Juniper", "j1").revisions()
+    assert revision.read_text() == "set system host-name j1\n"
+    # sync_device finds the same folder for it
+    assert backup_store.sync_device("Juniper", "j1").latest(1)[0].rev == 1
+
+
+def test_device_lock_is_held_across_processes(roots):
+    with backup_store._device_lock("Cisco", "r1"):
+        lock_file = backup_store.store_root() / "Cisco" / "r1" / ".lock"
+        # a second open file description is what another process would have
+        with open(lock_file, "a") as other, pytest.raises(BlockingIOError):
+            fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    with open(lock_file, "a") as other:
+        fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def test_stores_of_two_processes_share_the_index(roots):
+    folder = roots / "Cisco" / "r1"
+    app_store, cli_store = DeviceStore("Cisco", "r1"), DeviceStore("Cisco", "r1")
+    first = _write(folder, "2024-03-01_02-00-00", _config())
+    second = _write(folder, "2024-03-02_02-00-00", _config(change=1))
+    with backup_store._device_lock("Cisco", "r1"):
+        assert app_store.ingest(first).rev == 1
+    with backup_store._device_lock("Cisco", "r1"):
+        assert cli_store.ingest(second).rev == 2
+    assert [r.rev for r in app_store.revisions()] == [1, 2]
+    assert sorted(p.name for p in app_store.path.iterdir()) == [".lock", "index.json", "objects"]
@@ -0,0 +1,78 @@
+# fastapi/tests/test_bulk.py
+
+import asyncio
+
+from app.core import bulk, scheduler
+from app.core.bulk import DONE, start_bulk
+
+DEVICES = [{"id": f"r{i}", "vendor": "Cisco", "ip": f"192.0.2.{i}"} for i in range(1, 6)]
+
+
+def _fake_sweep(calls, gate=None):
+    async def ping_sweep(devices, source="api"):
+        calls.append([d["id"] for d in devices])
+        if gate is not None and len(calls) > 1:
+            await gate.wait()
+        return {d["id"]: {"status": "success", "device_id": d["id"], "source": source} for d in devices}
+    return ping_sweep
+
+
+def test_native_ping_reports_per_chunk(settings, monkeypatch):
+    settings["bulk"]["chunk_size"] = 2
+    settings["ping"]["concurrency"] = 2  # one sweep at a time
+    calls = []
+
+    async def scenario():
+        gate = asyncio.Event()
+        monkeypatch.setattr(bulk, "ping_sweep", _fake_sweep(calls, gate))
+        run = start_bulk("ping", DEVICES, {"group": "all"}, fresh=True)
+        seen = []
+        async for host, _ in run.follow():
+            seen.append(host)
+            if len(seen) == 2:
+                # the first chunk is out while the second is still being swept
+                assert run.progress()["pending"] == 3
+                gate.set()
+        return run, seen
+
+    run, seen = asyncio.run(scenario())
+    assert calls == [["r1", "r2"], ["r3", "r4"], ["r5"]]
+    assert seen == ["r1", "r2", "r3", "r4", "r5"]
+    assert run.status == DONE
+    assert run.progress()["succeeded"] == 5
+
+
+def test_scheduler_runs_bulk(settings, monkeypatch):
+    calls = []
+    monkeypatch.setattr(bulk, "ping_sweep", _fake_sweep(calls))
+
+    async def scenario():
+        return await scheduler.run_operation("ping", DEVICES, source="scheduler:test", scope={"group": "all"})
+
+    summary = asyncio.run(scenario())
+    assert summary["status"] == "success"
+    assert summary["total"] == 5
+    assert set(summary["results"]) == {d["id"] for d in DEVICES}
+    assert summary["results"]["r1"]["source"] == "scheduler:test"
+    assert bulk.get_bulk(summary["bulk_id"]).scope == {"group": "all"}
+
+
+def test_ping_run_batch_is_a_bulk_run(settings, monkeypatch):
+    from app.api import routes_ping
+    from app.api.schemas import DeviceSelection
+
+    calls = []
+    monkeypatch.setattr(bulk, "ping_sweep", _fake_sweep(calls))
+    monkeypatch.setattr(routes_ping, "select_devices", lambda hosts, vendor, group: (DEVICES, ["gone"]))
+
+    async def scenario():
+        waited = await routes_ping.ping_batch(DeviceSelection(vendor="Cisco"))
+        queued = await routes_ping.ping_batch(DeviceSelection(vendor="Cisco"), background=True)
+        await bulk.get_bulk(queued["bulk_id"]).wait()
+        return waited, queued
+
+    waited, queued = asyncio.run(scenario())
+    assert (waited["status"], waited["total"], waited["unknown"]) == ("success", 5, ["gone"])
+    assert bulk.get_bulk(waited["bulk_id"]).scope == {"hosts": [], "vendor": "Cisco", "group": None}
+    assert queued["status"] == "queued"
+    assert "results" not in queued
@@ -0,0 +1,28 @@
+# fastapi/tests/test_changes.py
+
+import os
+
+from app.core import backup_store, changes
+from app.db import ChangeRecord, RunRecord
+
+
+def test_a_change_is_recorded_once(tmp_path, monkeypatch, settings, db):
+    folder = tmp_path / "configs" / "Cisco" / "r1"
+    folder.mkdir(parents=True)
+    settings["backups"]["store"] = str(tmp_path / "store")
+    monkeypatch.setattr(backup_store, "CONFIG_ROOT", tmp_path / "configs")
+    monkeypatch.setattr(backup_store, "_stores", {})
+    monkeypatch.setattr(changes, "DIFF_LOG_ROOT", tmp_path / "logs" / "diff")
+    for day, description in ((1, "uplink"), (2, "core uplink")):
+        (folder / f"2024-03-0{day}_02-00-00.cfg").write_text(
+            f"hostname r1\ninterface Gi0/1\n description {description}\n"
+        )
+    os.utime(folder, ns=(0, folder.stat().st_mtime_ns + 1000))
+    revision = backup_store.latest_revisions("Cisco", "r1", 1)[0]
+
+    first = changes.detect_change("Cisco", "r1", revision)
+    assert first["summary"]["sections_changed"] == 1
+    assert changes.detect_change("Cisco", "r1", revision) == first
+    with db.get_session() as session:
+        assert session.query(ChangeRecord).count() == 1
+        assert session.query(RunRecord).filter_by(run_type="diff").count() == 1
@@ -0,0 +1,187 @@
+# fastapi/tests/test_compliance.py
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import compliance
+from app.core.compliance import evaluate, load_rules, scan
+
+RULES = """\
+rules:
+  - id: ssh-only
+    severity: critical
+    vendors: [Cisco]
+    section: ^line vty
+    section_required: true
+    require: transport input ssh
+    forbid: transport input (telnet|all)
+  - id: no-http
+    forbid: ^ip http server
+  - id: baseline
+    severity: info
+    vendors: [Cisco]
+    golden: golden/cisco.cfg
+"""
+
+GOLDEN = """\
+service password-encryption
+logging host 192.0.2.10
+"""
+
+GOOD = """\
+! Last configuration change at 10:00:00 UTC Mon Mar 4 2024
+service password-encryption
+logging host 192.0.2.10
+line vty 0 4
+ transport input ssh
+end
+"""
+
+BAD = """\
+ip http server
+logging host 192.0.2.10
+line vty 0 4
+ transport input telnet
+end
+"""
+
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(compliance, "CONFIG_DIR", tmp_path)
+    (tmp_path / "golden").mkdir()
+    (tmp_path / "golden" / "cisco.cfg").write_text(GOLDEN)
+    path = tmp_path / "compliance.yml"
+    path.write_text(RULES)
+    return path
+
+
+def _failed(vendor, text, rules):
+    return {f["rule"]: f for f in evaluate(vendor, text, rules)}
+
+
+def test_load_rules(rules_file):
+    rules = load_rules(rules_file)
+    assert [r["id"] for r in rules] == ["ssh-only", "no-http", "baseline"]
+    assert rules[1]["severity"] == "warning"  # the default
+    assert rules[2]["golden_text"] == GOLDEN
+
+
+@pytest.mark.parametrize("rule, message", [
+    ("- severity: info\n    forbid: x", "needs an id"),
+    ("- id: empty", "nothing to check"),
+    ("- id: loud\n    severity: fatal\n    forbid: x", "severity must be one of"),
+])
+def test_load_rules_rejects(tmp_path, rule, message):
+    path = tmp_path / "compliance.yml"
+    path.write_text(f"rules:\n  {rule}\n")
+    with pytest.raises(ValueError, match=message):
+        load_rules(path)
+
+
+def test_load_rules_rejects_bad_regex(tmp_path):
+    path = tmp_path / "compliance.yml"
+    path.write_text("rules:\n  - id: broken\n    forbid: '(unclosed'\n")
+    with pytest.raises(Exception):
+        load_rules(path)
+
+
+def test_evaluate(rules_file):
+    rules = load_rules(rules_file)
+    assert evaluate("Cisco", GOOD, rules) == []
+
+    failed = _failed("Cisco", BAD, rules)
+    assert sorted(failed) == ["baseline", "no-http", "ssh-only"]
+    checks = {f["check"]: f for f in failed["ssh-only"]["failures"]}
+    assert checks["require"]["where"] == "line vty 0 4"
+    assert checks["forbid"]["lines"] == ["transport input telnet"]
+    assert failed["baseline"]["failures"][0]["missing"] == ["service password-encryption"]
+
+
+def test_evaluate_vendor_scope_and_required_section(rules_file):
+    rules = load_rules(rules_file)
+    # Cisco-only rules don't apply to Juniper
+    assert sorted(_failed("Juniper", "set system host-name r1\n", rules)) == []
+    failed = _failed("Cisco", "hostname r1\n" + GOLDEN, rules)
+    assert failed["ssh-only"]["failures"] == [{"check": "section", "pattern": "^line vty", "where": ""}]
+
+
+class FakeStore:
+    def __init__(self, configs, host):
+        self.configs, self.host = configs, host
+
+    def latest(self, n):
+        text = self.configs.get(self.host)
+        if text is None:
+            return []
+        sha = compliance.hashlib.sha256(text.encode()).hexdigest()
+        return [SimpleNamespace(rev=1, name="backup.cfg", hash=sha, read_text=lambda: text)]
+
+
+@pytest.fixture
+def fleet(tmp_path, monkeypatch, settings, rules_file):
+    settings["compliance"]["data_dir"] = str(tmp_path / "data")
+    settings["compliance"]["rules"] = str(rules_file)
+    devices = [{"id": f"r{i}", "vendor": "Cisco"} for i in range(1, 5)]
+    configs = {"r1": GOOD, "r2": BAD, "r3": GOOD.replace("r1", "r3") + "!\n"}
+    inventory = SimpleNamespace(devices=devices, by_id={d["id"]: d for d in devices})
+    monkeypatch.setattr(compliance, "get_inventory", lambda: inventory)
+    monkeypatch.setattr(compliance, "sync_device", lambda vendor, host: FakeStore(configs, host))
+    monkeypatch.setattr(compliance, "select_devices", lambda vendor=None, group=None: (devices[:1], None))
+    monkeypatch.setattr(compliance, "_last_report", None)
+    return SimpleNamespace(devices=devices, configs=configs, inventory=inventory, rules=rules_file,
+                           data=tmp_path / "data")
+
+
+def test_scan_and_cache(fleet):
+    report = scan()
+    assert (report["checked"], report["compliant"], report["evaluated"]) == (3, 2, 3)
+    assert report["no_backup"] == ["r4"]
+    assert report["by_rule"]["no-http"]["devices"] == ["r2"]
+
+    again = scan()
+    assert (again["evaluated"], again["cached"]) == (0, 3)
+    assert again["results"]["r2"]["failed"] == report["results"]["r2"]["failed"]
+
+    # a changed config is evaluated again, the others still come from the cache
+    fleet.configs["r2"] = GOOD + "!\n!\n"
+    changed = scan()
+    assert (changed["evaluated"], changed["compliant"]) == (1, 3)
+
+    # changed rules invalidate everything
+    fleet.rules.write_text(RULES.replace("severity: info", "severity: warning"))
+    assert scan()["evaluated"] == 3
+    assert sorted(p.name for p in fleet.data.iterdir()) == ["cache.json", "report.json"]
+
+
+def test_cache_keeps_only_entries_in_use(fleet):
+    scan()
+    fleet.configs["r2"] = GOOD + "!\n!\n"
+    scan()
+    cache = json.loads((fleet.data / "cache.json").read_text())
+    assert len(cache["results"]) == 3  # r2's old config is gone
+    assert sorted(cache["hosts"]) == ["r1", "r2", "r3"]
+
+    # a scoped scan leaves the other devices' entries alone
+    fleet.configs["r1"] = BAD
+    assert scan(group="core")["evaluated"] == 1
+    cache = json.loads((fleet.data / "cache.json").read_text())
+    assert sorted(cache["hosts"]) == ["r1", "r2", "r3"]
+    assert len(cache["results"]) == 3
+
+    # devices gone from the inventory drop out
+    del fleet.inventory.by_id["r3"]
+    fleet.inventory.devices[:] = [d for d in fleet.inventory.devices if d["id"] != "r3"]
+    scan()
+    cache = json.loads((fleet.data / "cache.json").read_text())
+    assert sorted(cache["hosts"]) == ["r1", "r2"]
+    assert len(cache["results"]) == 2
+
+
+def test_scan_on_a_process_pool(fleet, settings):
+    settings["compliance"]["min_parallel"] = 2
+    report = scan(workers=2)
+    assert (report["evaluated"], report["compliant"]) == (3, 2)
+    assert report["results"]["r2"]["failed"] == evaluate("Cisco", BAD, load_rules(fleet.rules))
@@ -0,0 +1,160 @@
+# fastapi/tests/test_config_diff.py
+
+import pytest
+
+from app.core import config_diff
+from app.core.config_diff import ConfigDiff, DiffFile, ParsedCache, page_lines
+
+OLD = """\
+! Last configuration change at 10:00:00 UTC Mon Mar 4 2024
+hostname r1
+!
+interface Gi0/1
+ description uplink
+ ip address 10.0.0.1 255.255.255.0
+!
+ip access-list extended MGMT
+ permit tcp any any eq 22
+ permit tcp any any eq 443
+!
+router ospf 1
+ network 10.0.0.0 0.0.0.255 area 0
+!
+end
+"""
+
+
+@pytest.fixture(params=["netcommon", "indentation"])
+def cisco_parser(request, monkeypatch):
+    """parse_cisco with netcommon's NetworkConfig and with the built-in fallback."""
+    if request.param == "indentation":
+        monkeypatch.setattr(config_diff, "_network_config", False)
+    return request.param
+
+
+def _diff(vendor, old, new):
+    diff = ConfigDiff(vendor, old, new)
+    return list(diff.lines()), diff.stats
+
+
+def test_reordering_is_not_a_change(cisco_parser):
+    reordered = OLD.replace(
+        " permit tcp any any eq 22\n permit tcp any any eq 443\n",
+        " permit tcp any any eq 443\n permit tcp any any eq 22\n",
+    )
+    # whole sections moved around too
+    blocks = reordered.split("!\n")
+    reordered = "!\n".join([blocks[0], blocks[3], blocks[1], blocks[2], blocks[4]])
+    assert reordered != OLD
+
+    lines, stats = _diff("Cisco", OLD, reordered)
+    assert lines == []
+    assert stats["lines_added"] == stats["lines_removed"] == 0
+
+
+def test_volatile_lines_are_ignored(cisco_parser):
+    new = OLD.replace("10:00:00 UTC Mon Mar 4", "23:59:59 UTC Tue Mar 5")
+    assert _diff("Cisco", OLD, new)[0] == []
+
+
+def test_sections_added_removed_changed(cisco_parser):
+    new = (
+        OLD.replace(" description uplink\n", " description core uplink\n")
+        .replace("router ospf 1\n network 10.0.0.0 0.0.0.255 area 0\n", "")
+        .replace("end\n", "ntp server 10.0.0.9\nend\n")
+    )
+    lines, stats = _diff("Cisco", OLD, new)
+
+    assert lines[0] == "@@ interface Gi0/1"
+    assert lines[1].startswith("- ") and lines[1].endswith("description uplink")
+    assert lines[2].startswith("+ ") and lines[2].endswith("description core uplink")
+    assert lines[3] == "+ ntp server 10.0.0.9"
+    # removed sections come last, with their lines
+    assert lines[4] == "- router ospf 1"
+    assert lines[5].endswith("network 10.0.0.0 0.0.0.255 area 0")
+    assert stats == {
+        "sections_added": 1,
+        "sections_removed": 1,
+        "sections_changed": 1,
+        "lines_added": 2,
+        "lines_removed": 3,
+    }
+
+
+def test_junos_set_sections():
+    old = (
+        "## Last commit: 2024-03-04 10:00:00 UTC by root\n"
+        "set system host-name j1\n"
+        "set interfaces ge-0/0/0 unit 0 family inet address 10.0.0.1/24\n"
+        "set interfaces ge-0/0/0 description uplink\n"
+    )
+    new = (
+        "## Last commit: 2024-03-05 11:00:00 UTC by root\n"
+        "set interfaces ge-0/0/0 description uplink\n"
+        "set interfaces ge-0/0/0 unit 0 family inet address 10.0.0.2/24\n"
+        "set system host-name j1\n"
+    )
+    lines, stats = _diff("Juniper", old, new)
+    assert lines == [
+        "@@ interfaces ge-0/0/0",
+        "- set interfaces ge-0/0/0 unit 0 family inet address 10.0.0.1/24",
+        "+ set interfaces ge-0/0/0 unit 0 family inet address 10.0.0.2/24",
+    ]
+    assert stats["sections_changed"] == 1
+
+
+def test_other_vendors_get_a_unified_diff():
+    diff = ConfigDiff("Sophos", "a\nb\n", "a\nc\n")
+    lines = list(diff.lines("r1", "r2"))
+    assert diff.mode == "unified"
+    assert lines[:2] == ["--- r1", "+++ r2"]
+    assert "-b" in lines and "+c" in lines
+    assert diff.stats["lines_added"] == diff.stats["lines_removed"] == 1
+
+
+def test_page_lines_and_diff_file(tmp_path):
+    sink_path = tmp_path / "diff" / "r1.diff"
+    with DiffFile(sink_path) as sink:
+        shown, total = page_lines((f"line {i}" for i in range(10)), offset=3, limit=2, sink=sink)
+    assert shown == ["line 3", "line 4"]
+    assert total == 10
+    assert sink_path.read_text().count("\n") == 10
+
+    empty_path = tmp_path / "empty.diff"
+    with DiffFile(empty_path) as sink:
+        assert page_lines(iter(()), sink=sink) == ([], 0)
+    assert not sink.written and not empty_path.exists()
+
+
+def test_parsed_cache_lru():
+    cache = ParsedCache(2)
+    loads = []
+
+    def load(key):
+        return lambda: loads.append(key) or key.upper()
+
+    assert cache.get("a", load("a")) == "A"
+    assert cache.get("b", load("b")) == "B"
+    assert cache.get("a", load("a")) == "A"  # hit, and now the newest
+    cache.get("c", load("c"))                 # evicts b
+    cache.get("b", load("b"))
+    assert loads == ["a", "b", "c", "b"]
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 1, "misses": 4}
+
+
+def test_removing_a_repeated_line_is_a_change(cisco_parser):
+    old = OLD.replace(" permit tcp any any eq 443\n", " remark web\n permit tcp any any eq 443\n remark web\n")
+    new = OLD.replace(" permit tcp any any eq 443\n", " remark web\n permit tcp any any eq 443\n")
+    lines, stats = _diff("Cisco", old, new)
+    assert lines[0] == "@@ ip access-list extended MGMT"
+    assert [line.split()[:2] for line in lines[1:]] == [["-", "remark"]]
+    assert stats["lines_removed"] == 1 and stats["lines_added"] == 0
+    # the same two copies in another order: unchanged
+    moved = OLD.replace(" permit tcp any any eq 443\n", " permit tcp any any eq 443\n remark web\n remark web\n")
+    assert _diff("Cisco", old, moved)[0] == []
+
+
+def test_junos_repeated_set_lines():
+    line = "set firewall filter F term t then count c\n"
+    lines, stats = _diff("Juniper", line * 2, line)
+    assert lines == ["@@ firewall filter", f"- {line.strip()}"]
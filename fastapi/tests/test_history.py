@@ -0,0 +1,44 @@
+# fastapi/tests/test_history.py
+
+from datetime import datetime
+
+from app import ansible_runner
+from app.core import history
+from app.db import RunRecord
+
+
+def test_device_log_paths_are_unique(tmp_path, monkeypatch):
+    monkeypatch.setattr(ansible_runner, "ROOT", tmp_path)
+    paths = {ansible_runner.device_log_path("backup", "Cisco", "r1") for _ in range(200)}
+    assert len(paths) == 200
+    path = next(iter(paths))
+    assert path.parent == tmp_path / "logs" / "backup" / "Cisco" / "r1"
+    # names still parse back to a time
+    assert isinstance(history._log_time(path.stem), datetime)
+
+
+def test_old_log_names_still_parse():
+    assert history._log_time("2024-03-01_10-02-30") == datetime(2024, 3, 1, 10, 2, 30)
+    assert history._log_time("2024-03-01_10-02-30_000123") == datetime(2024, 3, 1, 10, 2, 30, 123)
+
+
+def _result(status, logfile):
+    return {"device_id": "r1", "vendor": "Cisco", "status": status, "logfile": logfile}
+
+
+def test_live_runs_are_all_recorded(db):
+    # two runs of the same second: each has its own log and its own row
+    first = ansible_runner.device_log_path("backup", "Cisco", "r1")
+    second = ansible_runner.device_log_path("backup", "Cisco", "r1")
+    assert history.record_runs("uptime", [_result("fail", first)]) == 1
+    assert history.record_runs("backup", [_result("success", second)]) == 1
+    with db.get_session() as session:
+        assert sorted(r.run_type for r in session.query(RunRecord)) == ["backup", "uptime"]
+
+
+def test_backfill_skips_known_logs(db, tmp_path):
+    log = tmp_path / "logs" / "ping_history" / "Cisco" / "r1" / "2024-03-01_10-02-30.log"
+    log.parent.mkdir(parents=True)
+    log.write_text("--- 192.0.2.1 ping statistics (icmp) ---\n3 packets transmitted, 3 received, 0% packet loss\n")
+    assert history.backfill(tmp_path / "logs")["inserted"] == 1
+    assert history.backfill(tmp_path / "logs")["inserted"] == 0
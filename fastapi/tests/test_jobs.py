@@ -0,0 +1,139 @@
+# fastapi/tests/test_jobs.py
+
+import asyncio
+import threading
+
+from app.core.jobs import DONE, QUEUED, REJECTED, RUNNING, DeviceLocks, JobManager
+
+
+def _manager(max_queue: int = 4) -> JobManager:
+    locks = DeviceLocks(
+        ["backup", "uptime", "restart"],
+        on_conflict={"default": "queue", "restart": "reject"},
+        max_queue=max_queue,
+    )
+    return JobManager(max_workers=8, default_vendor_limit=8, device_locks=locks)
+
+
+class Gate:
+    """A job function that blocks until released, recording the call order."""
+
+    def __init__(self):
+        self.calls = []
+        self._events = {}
+
+    def __call__(self, name, on_line=None):
+        self.calls.append(name)
+        self._events.setdefault(name, threading.Event()).wait(5)
+        return {"status": "success", "name": name}
+
+    def release(self, name):
+        self._events.setdefault(name, threading.Event()).set()
+
+
+async def _until(predicate, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition never became true")
+
+
+def test_busy_device_queues_in_order():
+    async def scenario():
+        manager, gate = _manager(), Gate()
+        backup = manager.submit("backup", "r1", "Cisco", gate, "backup")
+        await _until(lambda: backup.status == RUNNING)
+        uptime = manager.submit("uptime", "r1", "Cisco", gate, "uptime")
+        other = manager.submit("uptime", "r2", "Cisco", gate, "other")  # another device: not held up
+        await _until(lambda: other.status == RUNNING)
+        await asyncio.sleep(0.05)
+
+        assert uptime.status == QUEUED
+        assert uptime.to_dict()["waiting_for"] == backup.id
+        assert manager.device_locks.state()["r1"]["holder"]["job_id"] == backup.id
+
+        gate.release("backup")
+        gate.release("other")
+        await backup.wait()
+        await _until(lambda: uptime.status == RUNNING)
+        gate.release("uptime")
+        await uptime.wait()
+        await other.wait()
+
+        assert gate.calls.index("backup") < gate.calls.index("uptime")
+        assert uptime.status == DONE
+        # nothing left behind once the device is idle
+        assert manager.device_locks.state() == {}
+        assert manager.device_locks._locks == {}
+
+    asyncio.run(scenario())
+
+
+def test_reject_policy_and_max_queue():
+    async def scenario():
+        manager, gate = _manager(max_queue=1), Gate()
+        backup = manager.submit("backup", "r1", "Cisco", gate, "backup")
+        await _until(lambda: backup.status == RUNNING)
+
+        restart = manager.submit("restart", "r1", "Cisco", gate, "restart")
+        assert restart.status == REJECTED
+        assert restart.result["status"] == "busy"
+        assert backup.id in restart.error
+
+        queued = manager.submit("uptime", "r1", "Cisco", gate, "uptime")
+        assert queued.status == QUEUED
+        full = manager.submit("uptime", "r1", "Cisco", gate, "uptime-2")
+        assert full.status == REJECTED
+        assert "1 jobs queued" in full.error
+
+        for name in ("backup", "uptime"):
+            gate.release(name)
+        await queued.wait()
+        assert "restart" not in gate.calls
+
+    asyncio.run(scenario())
+
+
+def test_identical_requests_coalesce():
+    async def scenario():
+        manager, gate = _manager(), Gate()
+        first = manager.submit("backup", "r1", "Cisco", gate, "backup")
+        second = manager.submit("backup", "r1", "Cisco", gate, "backup")
+        different = manager.submit("backup", "r1", "Cisco", gate, "backup-2")
+
+        assert second is first
+        assert first.coalesced == 1
+        assert different is not first
+
+        gate.release("backup")
+        gate.release("backup-2")
+        assert (await second.wait())["name"] == "backup"
+        await different.wait()
+        # once finished, the same request starts a new job
+        gate.release("backup")
+        third = manager.submit("backup", "r1", "Cisco", gate, "backup")
+        assert third is not first
+        await third.wait()
+
+    asyncio.run(scenario())
+
+
+def test_batch_holds_every_host():
+    async def scenario():
+        manager, gate = _manager(), Gate()
+        batch = manager.submit("backup_batch", "r1,r2", "Cisco", gate, "batch")
+        await _until(lambda: batch.status == RUNNING)
+        single = manager.submit("uptime", "r2", "Cisco", gate, "single")
+        ping = manager.submit("ping", "r2", "Cisco", gate, "ping")  # not a locked operation
+        await _until(lambda: ping.status == RUNNING)
+        await asyncio.sleep(0.05)
+        assert single.status == QUEUED
+
+        for name in ("batch", "single", "ping"):
+            gate.release(name)
+        await single.wait()
+        await ping.wait()
+        assert gate.calls.index("batch") < gate.calls.index("single")
+
+    asyncio.run(scenario())
@@ -0,0 +1,40 @@
+# fastapi/tests/test_main.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.core import devices_loader
+
+
+def test_lifespan_starts_and_stops(settings, monkeypatch):
+    settings["runner"]["warm_workers"] = 0
+    calls = []
+    monkeypatch.setattr(main, "start_scheduler", lambda: calls.append("start"))
+
+    async def stop():
+        calls.append("stop")
+
+    monkeypatch.setattr(main, "stop_scheduler", stop)
+    with TestClient(main.app) as client:
+        assert calls == ["start"]
+        assert client.get("/", follow_redirects=False).status_code == 307
+    assert calls == ["start", "stop"]
+
+
+def test_several_workers_need_device_locks_off(settings, capsys):
+    with pytest.raises(SystemExit):
+        main.serve(["--mode", "production", "--workers", "4"])
+    assert "device locks are per process" in capsys.readouterr().err
+
+
+def test_inventory_cache_is_json(tmp_path, settings):
+    settings["server"]["cache_dir"] = str(tmp_path)
+    raw = b"all:\n  children:\n    core:\n      hosts:\n        r1: {vendor: Cisco, ip: 192.0.2.1}\n"
+    branch, core = devices_loader._parse_cached(raw, "abc")
+    assert core[0]["id"] == "r1" and branch == []
+
+    cached = devices_loader.cache_dir("inventory") / "devices.json"
+    assert cached.read_text().startswith('{"digest": "abc"')
+    # served from the JSON file, not re-parsed
+    assert devices_loader._parse_cached(b"not: [yaml", "abc") == (branch, core)
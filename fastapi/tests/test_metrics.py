@@ -0,0 +1,59 @@
+# fastapi/tests/test_metrics.py
+
+import asyncio
+import inspect
+
+from app.api import routes_metrics
+from app.core import metrics
+
+
+def test_instruments_render():
+    counter = metrics.Counter("test_things_total", "Things.", ("kind",))
+    histogram = metrics.Histogram("test_wait_seconds", "Waits.", ("kind",), buckets=(1, 5))
+    try:
+        counter.inc(kind="a")
+        counter.inc(2, kind='quote"d')
+        histogram.observe(0.5, kind="a")
+        histogram.observe(3, kind="a")
+        histogram.observe(60, kind="a")
+        text = metrics.render()
+    finally:
+        metrics._registry.remove(counter)
+        metrics._registry.remove(histogram)
+
+    assert "# TYPE assurance_test_things_total counter" in text
+    assert 'assurance_test_things_total{kind="a"} 1' in text
+    assert 'assurance_test_things_total{kind="quote\\"d"} 2' in text
+    assert 'assurance_test_wait_seconds_bucket{kind="a",le="1"} 1' in text
+    assert 'assurance_test_wait_seconds_bucket{kind="a",le="5"} 2' in text
+    assert 'assurance_test_wait_seconds_bucket{kind="a",le="+Inf"} 3' in text
+    assert 'assurance_test_wait_seconds_count{kind="a"} 3' in text
+
+
+def test_scrape_runs_on_the_event_loop():
+    # collectors read loop-owned dicts: the route must not go to the threadpool
+    assert inspect.iscoroutinefunction(routes_metrics.get_metrics)
+
+    async def scrape():
+        return (await routes_metrics.get_metrics()).body.decode()
+
+    text = asyncio.run(scrape())
+    assert "assurance_jobs{" in text
+    assert "assurance_device_locks_held " in text
+    assert "collector _jobs_state failed" not in text
+
+
+def test_inventory_gauge_uses_the_loaded_snapshot(monkeypatch):
+    from app.core import devices_loader
+
+    def no_file_access():
+        raise AssertionError("devices.yml touched on the event loop")
+
+    monkeypatch.setattr(devices_loader, "_stat_key", no_file_access)
+    monkeypatch.setattr(devices_loader, "_inventory", None)
+    assert metrics._inventory_state() == [("inventory_devices", "gauge", "Devices in devices.yml by group and vendor.", [])]
+
+    branch = [{"id": "r1", "name": "R1", "vendor": "Cisco"}, {"id": "r2", "name": "R2", "vendor": "Juniper"}]
+    monkeypatch.setattr(devices_loader, "_inventory", devices_loader.Inventory(branch, [], "digest"))
+    (_, _, _, samples), = metrics._inventory_state()
+    assert samples == [({"group": "branch", "vendor": "Cisco"}, 1), ({"group": "branch", "vendor": "Juniper"}, 1)]
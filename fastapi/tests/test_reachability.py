@@ -0,0 +1,125 @@
+# fastapi/tests/test_reachability.py
+#
+# localhost and closed ports stand in for devices; the unanswered paths
+# patch the probes so they don't depend on the network around the box.
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+from app.core import reachability
+from app.core.reachability import probe_host, sweep
+
+
+def _closed_port() -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.mark.skipif(not reachability.icmp_available(), reason="ICMP sockets not permitted here")
+def test_icmp_localhost():
+    stats = asyncio.run(probe_host("127.0.0.1", count=2, timeout=1.0, interval=0.01, method="icmp"))
+    assert stats["method"] == "icmp"
+    assert stats["received"] == 2
+    assert stats["reachable"]
+
+
+def test_tcp_closed_port_counts_as_up():
+    port = _closed_port()
+    stats = asyncio.run(probe_host("127.0.0.1", count=2, timeout=1.0, interval=0.01, tcp_ports=[port], method="tcp"))
+    assert stats["method"] == f"tcp:{port}"
+    assert stats["received"] == 2
+    assert stats["loss_pct"] == 0
+
+
+def test_tcp_ports_are_raced(monkeypatch):
+    delays = {22: None, 23: 0.05, 443: None}  # None: filtered, never answers
+
+    async def fake_probe(ip, port, timeout):
+        if delays[port] is None:
+            await asyncio.sleep(timeout)
+            return None
+        await asyncio.sleep(delays[port])
+        return delays[port] * 1000
+
+    monkeypatch.setattr(reachability, "_tcp_probe", fake_probe)
+    start = time.perf_counter()
+    stats = asyncio.run(probe_host("192.0.2.1", count=3, timeout=1.0, interval=0.01, method="tcp"))
+    elapsed = time.perf_counter() - start
+
+    assert stats["method"] == "tcp:23"
+    assert stats["received"] == 3
+    # three rounds of the fast port, never a full timeout per filtered port
+    assert elapsed < 1.0
+
+
+def test_filtered_host_times_out_once_per_round(monkeypatch):
+    async def filtered(ip, port, timeout):
+        await asyncio.sleep(timeout)
+        return None
+
+    monkeypatch.setattr(reachability, "_tcp_probe", filtered)
+    start = time.perf_counter()
+    stats = asyncio.run(probe_host("192.0.2.1", count=2, timeout=0.2, interval=0.01, method="tcp"))
+    elapsed = time.perf_counter() - start
+
+    assert not stats["reachable"]
+    assert stats["sent"] == 2 and stats["loss_pct"] == 100.0
+    assert elapsed < 2 * 0.2 + 0.3  # not count * ports * timeout
+
+
+class _FakeIcmpSocket:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def icmp_unanswered(monkeypatch):
+    """ICMP sockets allowed, but no echo reply ever comes back."""
+    async def no_reply(sock, is_raw, ip, ident, seq, timeout):
+        return None
+
+    monkeypatch.setattr(reachability, "_open_icmp_socket", lambda: (_FakeIcmpSocket(), False))
+    monkeypatch.setattr(reachability, "_icmp_probe", no_reply)
+
+
+def test_no_icmp_reply_falls_back_to_tcp(icmp_unanswered):
+    port = _closed_port()
+    stats = asyncio.run(probe_host("127.0.0.1", count=2, timeout=0.5, interval=0.01, tcp_ports=[port]))
+    assert stats["method"] == f"tcp:{port}"
+    assert stats["reachable"]
+
+
+def test_no_icmp_reply_and_no_tcp_is_down(icmp_unanswered, monkeypatch):
+    calls = []
+
+    async def filtered(ip, port, timeout):
+        calls.append(port)
+        return None
+
+    monkeypatch.setattr(reachability, "_tcp_probe", filtered)
+    stats = asyncio.run(probe_host("192.0.2.1", count=3, timeout=0.1, interval=0.01))
+
+    assert stats["method"] == "icmp+tcp"
+    assert stats["sent"] == 3 and not stats["reachable"]
+    assert sorted(calls) == [22, 23, 443]  # one TCP round, then given up
+
+
+def test_icmp_only_does_not_fall_back(icmp_unanswered):
+    stats = asyncio.run(probe_host("127.0.0.1", count=1, timeout=0.1, method="icmp"))
+    assert stats["method"] == "icmp"
+    assert not stats["reachable"]
+
+
+def test_sweep_missing_ip():
+    port = _closed_port()
+    results = asyncio.run(sweep(
+        {"r1": "127.0.0.1", "r2": None}, count=1, timeout=0.5, tcp_ports=[port], method="tcp",
+    ))
+    assert results["r1"]["reachable"]
+    assert results["r2"]["error"] == "no IP in inventory"
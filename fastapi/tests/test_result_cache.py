@@ -0,0 +1,79 @@
+# fastapi/tests/test_result_cache.py
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import result_cache
+from app.core.result_cache import ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _ok(device_id, **fields):
+    return {"status": "success", "device_id": device_id, **fields}
+
+
+def test_ttl(clock):
+    cache = ResultCache({"uptime": 300, "ping": 30})
+    cache.put("uptime", "r1", _ok("r1", uptime="3 days"))
+    cache.put("ping", "r1", _ok("r1"))
+
+    clock[0] += 60
+    hit = cache.get("uptime", "r1")
+    assert hit["uptime"] == "3 days"
+    assert hit["cached"] and hit["cached_age_s"] == 60.0
+    assert cache.get("ping", "r1") is None  # past its 30 s
+
+    clock[0] += 241
+    assert cache.get("uptime", "r1") is None
+    counters = cache.stats()["operations"]
+    assert counters["uptime"]["hits"] == 1 and counters["uptime"]["expired"] == 1
+    assert counters["ping"]["expired"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru(clock):
+    cache = ResultCache({"uptime": 300}, max_entries=2)
+    cache.put("uptime", "r1", _ok("r1"))
+    cache.put("uptime", "r2", _ok("r2"))
+    assert cache.get("uptime", "r1")  # r1 is now the most recent
+    cache.put("uptime", "r3", _ok("r3"))
+
+    assert cache.get("uptime", "r2") is None
+    assert cache.get("uptime", "r1") and cache.get("uptime", "r3")
+    assert cache.stats()["operations"]["uptime"]["evictions"] == 1
+
+
+def test_only_successes_of_cached_operations(clock):
+    cache = ResultCache({"uptime": 300, "ping": 0})
+    cache.put("uptime", "r1", {"status": "fail", "device_id": "r1"})
+    cache.put("ping", "r1", _ok("r1"))  # ttl 0: never cached
+    cache.put("backup", "r1", _ok("r1"))  # no ttl at all
+
+    assert cache.get("uptime", "r1") is None
+    assert cache.get("ping", "r1") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_record_job_and_restart_invalidation(clock):
+    cache = ResultCache({"uptime": 300, "ping": 30})
+    batch = SimpleNamespace(id="j1", kind="uptime_batch", result={
+        "r1": _ok("r1", uptime="1 day"),
+        "r2": {"status": "fail", "device_id": "r2"},
+    })
+    cache.record_job(batch)
+    cache.record_job(SimpleNamespace(id="j2", kind="ping", result=_ok("r1")))
+
+    assert cache.get("uptime", "r1")["job_id"] == "j1"
+    assert cache.get("uptime", "r2") is None
+    assert cache.get("ping", "r1")
+
+    cache.record_job(SimpleNamespace(id="j3", kind="restart", result=_ok("r1")))
+    assert cache.get("uptime", "r1") is None
+    assert cache.get("ping", "r1") is None
@@ -0,0 +1,83 @@
+# fastapi/tests/test_routes_backup.py
+
+import asyncio
+import os
+
+import pytest
+
+from app.api import routes_backup
+from app.core import backup_store, changes
+from app.db import ChangeRecord, RunRecord
+
+
+def _config(description: str, acl: str = "permit ip any any") -> str:
+    return (
+        "! Last configuration change at 10:00:00 UTC Mon Mar 4 2024\n"
+        "hostname r1\n"
+        f"interface Gi0/1\n description {description}\n"
+        f"ip access-list extended EDGE\n {acl}\n"
+    )
+
+
+@pytest.fixture
+def device(tmp_path, monkeypatch, settings, db):
+    folder = tmp_path / "configs" / "Cisco" / "r1"
+    settings["backups"]["store"] = str(tmp_path / "store")
+    monkeypatch.setattr(backup_store, "CONFIG_ROOT", tmp_path / "configs")
+    monkeypatch.setattr(backup_store, "_stores", {})
+    monkeypatch.setattr(changes, "DIFF_LOG_ROOT", tmp_path / "logs" / "diff")
+    monkeypatch.setattr(routes_backup, "find_device", lambda device_id: {"id": device_id, "vendor": "Cisco"})
+
+    def backup(day: int, text: str):
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"2024-03-0{day}_02-00-00.cfg").write_text(text)
+        os.utime(folder, ns=(0, folder.stat().st_mtime_ns + 1000))
+
+    return backup
+
+
+def _diff(**params):
+    return asyncio.run(routes_backup.diff_latest_backup("r1", **params))
+
+
+def _rows(db, model):
+    with db.get_session() as session:
+        return session.query(model).count()
+
+
+def test_latest_diff_is_the_recorded_change(device, db, tmp_path):
+    device(1, _config("uplink"))
+    device(2, _config("core uplink"))
+
+    first = _diff()
+    assert first["total_lines"] == 3
+    assert first["summary"]["sections_changed"] == 1
+    assert first["logfile"].startswith(str(tmp_path / "logs" / "diff"))
+
+    # asked again: served from the change's diff log, nothing new written or recorded
+    again = _diff(max_lines=1, offset=1)
+    assert again["logfile"] == first["logfile"]
+    assert again["diff"].splitlines()[0] == first["diff"].splitlines()[1]
+    assert (_rows(db, ChangeRecord), _rows(db, RunRecord)) == (1, 1)
+    assert len(list((tmp_path / "logs" / "diff").rglob("*.diff"))) == 1
+
+
+def test_latest_diff_without_changes(device, db, tmp_path):
+    device(1, _config("uplink"))
+    device(2, _config("uplink").replace("10:00:00", "11:00:00"))
+    result = _diff()
+    assert (result["diff"], result["total_lines"], result["logfile"]) == ("NO_CHANGES", 0, None)
+    assert (_rows(db, ChangeRecord), _rows(db, RunRecord)) == (0, 0)
+
+
+def test_ad_hoc_range_is_diffed_in_memory(device, db, tmp_path):
+    device(1, _config("uplink"))
+    device(2, _config("core uplink"))
+    device(3, _config("core uplink", acl="deny ip any any"))
+
+    result = _diff(from_rev=1, to_rev=3)
+    assert (result["from_rev"], result["to_rev"]) == (1, 3)
+    assert result["summary"]["sections_changed"] == 2
+    assert result["logfile"] is None
+    assert (_rows(db, ChangeRecord), _rows(db, RunRecord)) == (0, 0)
+    assert not (tmp_path / "logs").exists()
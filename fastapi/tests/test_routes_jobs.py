@@ -0,0 +1,20 @@
+# fastapi/tests/test_routes_jobs.py
+
+from app.api.routes_jobs import sse_event
+
+
+def test_sse_event_plain_line():
+    assert sse_event("line", "ok: [r1]") == "event: line\ndata: ok: [r1]\n\n"
+
+
+def test_sse_event_keeps_carriage_returns_as_data():
+    # a bare CR would otherwise end the data field and drop the rest
+    text = "Building configuration...\r\rCurrent configuration : 1234 bytes\r\n!"
+    assert sse_event("line", text) == (
+        "event: line\n"
+        "data: Building configuration...\n"
+        "data: \n"
+        "data: Current configuration : 1234 bytes\n"
+        "data: !\n"
+        "\n"
+    )
@@ -0,0 +1,58 @@
+# fastapi/tests/test_routes_ping.py
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import routes_ping
+from app.core import result_cache
+
+DEVICE = {"id": "r1", "vendor": "Cisco", "ip": "192.0.2.1"}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(result_cache, "_cache", None)
+    monkeypatch.setattr(routes_ping, "find_device", lambda device_id: DEVICE)
+    return result_cache.get_result_cache()
+
+
+@pytest.fixture
+def ansible(monkeypatch):
+    # the background flag of every ansible ping that reached the job engine
+    submitted = []
+
+    async def job_response(job, background):
+        submitted.append(background)
+        return {"status": "success", "engine": "ansible", "device_id": "r1"}
+
+    monkeypatch.setattr(routes_ping, "get_job_manager", lambda: SimpleNamespace(submit=lambda *args: None))
+    monkeypatch.setattr(routes_ping, "job_response", job_response)
+    return submitted
+
+
+def _ping(**params):
+    return asyncio.run(routes_ping.ping("r1", **params))
+
+
+def test_cache_only_serves_the_engine_asked_for(cache, ansible):
+    cache.put("ping", "r1", {"status": "success", "engine": "native", "device_id": "r1"})
+
+    assert _ping()["cached"]
+    assert _ping(engine="native")["cached"]
+    assert "cached" not in _ping(engine="ansible")
+    assert ansible == [False]
+
+
+def test_background_skips_the_cache(cache, ansible):
+    cache.put("ping", "r1", {"status": "success", "engine": "ansible", "device_id": "r1"})
+    assert "cached" not in _ping(engine="ansible", background=True)
+    assert ansible == [True]
+
+
+def test_unknown_engine_is_rejected(cache, ansible):
+    result = _ping(engine="icmp")
+    assert result["status"] == "unsupported_engine"
+    assert result["supported"] == ["native", "ansible"]
+    assert ansible == []
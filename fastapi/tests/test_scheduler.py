@@ -0,0 +1,63 @@
+# fastapi/tests/test_scheduler.py
+
+from datetime import datetime
+
+import pytest
+
+from app.core.scheduler import CronSpec
+
+
+@pytest.mark.parametrize("expr, after, expected", [
+    ("*/5 * * * *", datetime(2024, 3, 1, 10, 2, 30), datetime(2024, 3, 1, 10, 5)),
+    ("*/5 * * * *", datetime(2024, 3, 1, 10, 5), datetime(2024, 3, 1, 10, 10)),  # strictly after
+    ("7 * * * *", datetime(2024, 3, 1, 23, 8), datetime(2024, 3, 2, 0, 7)),
+    ("0 2 * * *", datetime(2024, 12, 31, 3, 0), datetime(2025, 1, 1, 2, 0)),
+    ("@nightly", datetime(2024, 3, 1, 1, 59), datetime(2024, 3, 1, 2, 0)),
+    ("15,45 8-18 * * *", datetime(2024, 3, 1, 18, 46), datetime(2024, 3, 2, 8, 15)),
+    ("5/20 * * * *", datetime(2024, 3, 1, 10, 26), datetime(2024, 3, 1, 10, 45)),
+    # weekdays only: Friday evening -> Monday
+    ("0 2 * * 1-5", datetime(2024, 3, 1, 3, 0), datetime(2024, 3, 4, 2, 0)),
+    # day 31 skips the short months
+    ("0 0 31 * *", datetime(2024, 4, 1), datetime(2024, 5, 31)),
+    # Feb 29 waits for the next leap year
+    ("0 0 29 2 *", datetime(2024, 3, 1), datetime(2028, 2, 29)),
+])
+def test_next_after(expr, after, expected):
+    assert CronSpec(expr).next_after(after) == expected
+
+
+def test_day_matches():
+    sunday, monday, first = datetime(2024, 3, 3), datetime(2024, 3, 4), datetime(2024, 3, 1)
+
+    # 0 and 7 are both Sunday
+    assert CronSpec("0 0 * * 0")._day_matches(sunday)
+    assert CronSpec("0 0 * * 7")._day_matches(sunday)
+    assert not CronSpec("0 0 * * 7")._day_matches(monday)
+
+    # only one of day-of-month / day-of-week restricted: that one decides
+    assert CronSpec("0 0 1 * *")._day_matches(first)
+    assert not CronSpec("0 0 1 * *")._day_matches(monday)
+
+    # both restricted: either one (cron semantics)
+    both = CronSpec("0 0 1 * 1")
+    assert both._day_matches(first)  # a Friday
+    assert both._day_matches(monday)
+    assert not both._day_matches(sunday)
+
+
+@pytest.mark.parametrize("expr", [
+    "* * * *",          # 4 fields
+    "60 * * * *",       # minute out of range
+    "0 0 0 * *",        # day 0
+    "*/0 * * * *",      # zero step
+    "0 0 * 13 *",
+    "x * * * *",
+])
+def test_bad_expressions(expr):
+    with pytest.raises(ValueError):
+        CronSpec(expr)
+
+
+def test_never_fires():
+    with pytest.raises(ValueError):
+        CronSpec("0 0 30 2 *").next_after(datetime(2024, 1, 1))